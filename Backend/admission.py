@@ -0,0 +1,278 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from celery_config import LARGE_QUEUE, SMALL_QUEUE, celery_app
+from routing import queue_for_chars
+from task_status import STATUS_REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Uploads that would wait longer than this behind the backlog get a 429 with Retry-After (0 admits everything)
+ADMISSION_SLO_SECONDS = int(os.getenv("ADMISSION_SLO_SECONDS", 4 * 3600))
+# A queue's throughput is the characters its workers finished over this many seconds
+THROUGHPUT_WINDOW_SECONDS = int(os.getenv("THROUGHPUT_WINDOW_SECONDS", 900))
+# Throughput assumed for a queue while less has been measured (idle or freshly started workers)
+MIN_CHARS_PER_SECOND = float(os.getenv("MIN_CHARS_PER_SECOND", 40))
+# Jobs not (re)started for this long are dropped from the backlog; their task was lost
+BACKLOG_ENTRY_TTL = int(os.getenv("BACKLOG_ENTRY_TTL", 24 * 3600))
+# Jobs that reported progress and then went quiet for this long were killed; no task runs longer
+BACKLOG_IDLE_TTL = int(os.getenv("BACKLOG_IDLE_TTL", celery_app.conf.task_time_limit or 2400))
+# Extracted characters per uploaded byte, to size a job before extraction (EPUBs are zipped)
+CHARS_PER_UPLOAD_BYTE = {".pdf": 0.4, ".epub": 1.5}
+# Throughput counters are kept per slice of this many seconds
+BUCKET_SECONDS = 10
+KEY_PREFIX = "orator:backlog:"
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    queue: str
+    # Until the new job would be finished; None if the backlog couldn't be read
+    estimated_seconds: float | None
+    # Seconds until the backlog is expected to fit the SLO again; 0 when admitted
+    retry_after: int
+    backlog_chars: int
+    chars_per_second: float
+
+
+class RedisBacklog:
+    """Outstanding synthesis work per queue, shared by the API and the workers.
+
+    ``jobs`` maps task ids to their queue, size and start time; ``done`` holds
+    the characters each has finished (``HINCRBY``, so chord subtasks can
+    report at once), kept across retries since their chunks are resumed, and
+    ``seen`` when it last did. A queued job expires after ``entry_ttl``, a
+    running one once it has been quiet for ``idle_ttl``.
+    Characters the model synthesized also go into per-queue counters of
+    BUCKET_SECONDS that expire once they leave the throughput window; cache
+    hits take no worker time and would overstate the throughput.
+    """
+
+    def __init__(self, url: str, window: int = THROUGHPUT_WINDOW_SECONDS, entry_ttl: int = BACKLOG_ENTRY_TTL,
+                 idle_ttl: int = BACKLOG_IDLE_TTL):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.window = window
+        self.entry_ttl = entry_ttl
+        self.idle_ttl = idle_ttl
+        self.jobs_key = KEY_PREFIX + "jobs"
+        self.done_key = KEY_PREFIX + "done"
+        self.seen_key = KEY_PREFIX + "seen"
+
+    def _rate_key(self, queue: str, bucket: int) -> str:
+        return f"{KEY_PREFIX}rate:{queue}:{bucket}"
+
+    def track(self, task_id: str, queue: str, chars: int, now: float | None = None) -> None:
+        """(Re)start counting ``chars`` characters of ``task_id`` as outstanding on ``queue``."""
+        now = time.time() if now is None else now
+        pipe = self.client.pipeline()
+        pipe.hset(self.jobs_key, task_id, json.dumps({"queue": queue, "chars": chars, "started": now}))
+        # A redelivered job may sit in the queue again before it resumes
+        pipe.hdel(self.seen_key, task_id)
+        pipe.execute()
+
+    def progress(self, task_id: str, chars: int, synthesized: bool = True, now: float | None = None) -> None:
+        """Count ``chars`` more characters of ``task_id`` as finished, and as throughput if ``synthesized``."""
+        raw = self.client.hget(self.jobs_key, task_id)
+        if raw is None:
+            return
+        now = time.time() if now is None else now
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.done_key, task_id, chars)
+        pipe.hset(self.seen_key, task_id, now)
+        if synthesized:
+            key = self._rate_key(json.loads(raw)["queue"], int(now // BUCKET_SECONDS))
+            pipe.incrby(key, chars)
+            pipe.expire(key, self.window + BUCKET_SECONDS)
+        pipe.execute()
+
+    def forget(self, task_id: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.hdel(self.jobs_key, task_id)
+        pipe.hdel(self.done_key, task_id)
+        pipe.hdel(self.seen_key, task_id)
+        pipe.execute()
+
+    def pending(self, queue: str, now: float | None = None) -> tuple[int, int]:
+        """(jobs, characters) not yet synthesized on ``queue``."""
+        now = time.time() if now is None else now
+        pipe = self.client.pipeline()
+        pipe.hgetall(self.jobs_key)
+        pipe.hgetall(self.done_key)
+        pipe.hgetall(self.seen_key)
+        entries, done, seen = pipe.execute()
+        jobs = chars = 0
+        stale = []
+        for task_id, raw in entries.items():
+            entry = json.loads(raw)
+            if (now - entry["started"] > self.entry_ttl
+                    or task_id in seen and now - float(seen[task_id]) > self.idle_ttl):
+                stale.append(task_id)
+            elif entry["queue"] == queue:
+                remaining = entry["chars"] - int(done.get(task_id, 0))
+                if remaining > 0:
+                    jobs += 1
+                    chars += remaining
+        if stale:
+            pipe = self.client.pipeline()
+            pipe.hdel(self.jobs_key, *stale)
+            pipe.hdel(self.done_key, *stale)
+            pipe.hdel(self.seen_key, *stale)
+            pipe.execute()
+        return jobs, chars
+
+    def throughput(self, queue: str, now: float | None = None) -> float:
+        """Characters per second finished on ``queue`` over the window."""
+        now = time.time() if now is None else now
+        newest = int(now // BUCKET_SECONDS)
+        buckets = range(newest - self.window // BUCKET_SECONDS + 1, newest + 1)
+        counts = self.client.mget([self._rate_key(queue, bucket) for bucket in buckets])
+        return sum(int(count) for count in counts if count) / self.window
+
+
+class MemoryBacklog:
+    """Process-local stand-in for tests and eager mode."""
+
+    def __init__(self, window: int = THROUGHPUT_WINDOW_SECONDS, entry_ttl: int = BACKLOG_ENTRY_TTL,
+                 idle_ttl: int = BACKLOG_IDLE_TTL):
+        self.window = window
+        self.entry_ttl = entry_ttl
+        self.idle_ttl = idle_ttl
+        self._jobs: dict[str, dict] = {}
+        self._rates: dict[str, dict[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, task_id: str, queue: str, chars: int, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            done = self._jobs.get(task_id, {}).get("done", 0)
+            self._jobs[task_id] = {"queue": queue, "chars": chars, "started": now, "done": done, "seen": None}
+
+    def progress(self, task_id: str, chars: int, synthesized: bool = True, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._jobs.get(task_id)
+            if entry is None:
+                return
+            entry["done"] += chars
+            entry["seen"] = now
+            if not synthesized:
+                return
+            buckets = self._rates.setdefault(entry["queue"], {})
+            bucket = int(now // BUCKET_SECONDS)
+            buckets[bucket] = buckets.get(bucket, 0) + chars
+            for old in [b for b in buckets if b <= bucket - self.window // BUCKET_SECONDS]:
+                del buckets[old]
+
+    def forget(self, task_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(task_id, None)
+
+    def pending(self, queue: str, now: float | None = None) -> tuple[int, int]:
+        now = time.time() if now is None else now
+        with self._lock:
+            for task_id in [t for t, e in self._jobs.items()
+                            if now - e["started"] > self.entry_ttl
+                            or e["seen"] is not None and now - e["seen"] > self.idle_ttl]:
+                del self._jobs[task_id]
+            remaining = [e["chars"] - e["done"] for e in self._jobs.values() if e["queue"] == queue]
+        remaining = [chars for chars in remaining if chars > 0]
+        return len(remaining), sum(remaining)
+
+    def throughput(self, queue: str, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        oldest = int(now // BUCKET_SECONDS) - self.window // BUCKET_SECONDS
+        with self._lock:
+            buckets = self._rates.get(queue, {})
+            return sum(chars for bucket, chars in buckets.items() if bucket > oldest) / self.window
+
+
+_backlog = None
+_backlog_lock = threading.Lock()
+
+
+def get_backlog():
+    global _backlog
+    with _backlog_lock:
+        if _backlog is None:
+            _backlog = RedisBacklog(STATUS_REDIS_URL) if STATUS_REDIS_URL else MemoryBacklog()
+        return _backlog
+
+
+def estimate_chars(content_length: int, ext: str) -> int:
+    """Rough extracted length of an upload, before it has been parsed."""
+    return int(content_length * CHARS_PER_UPLOAD_BYTE.get(ext, 1.0))
+
+
+def queue_load(queue: str, backlog=None, now: float | None = None) -> tuple[int, int, float]:
+    """(jobs, characters, characters per second) for ``queue``, throughput floored at MIN_CHARS_PER_SECOND."""
+    backlog = backlog or get_backlog()
+    jobs, chars = backlog.pending(queue, now)
+    return jobs, chars, max(MIN_CHARS_PER_SECOND, backlog.throughput(queue, now))
+
+
+def admit(chars: int, backlog=None, slo: float | None = None, now: float | None = None) -> Admission:
+    """Decide whether a new job of ``chars`` characters is accepted.
+
+    The wait is the queue's outstanding characters over its recent
+    throughput, a pessimistic (FIFO) figure since shorter books jump ahead.
+    A job is refused only when that wait alone exceeds ``slo``, so a single
+    long book still gets in while the queue is short. If the backlog can't be
+    read the job is admitted without an estimate.
+    """
+    slo = ADMISSION_SLO_SECONDS if slo is None else slo
+    queue = queue_for_chars(chars)
+    try:
+        _, backlog_chars, rate = queue_load(queue, backlog, now)
+    except Exception as e:
+        logger.warning(f"Could not read the {queue} backlog, admitting without an estimate: {e}")
+        return Admission(True, queue, None, 0, 0, 0.0)
+    wait = backlog_chars / rate
+    estimate = wait + chars / rate
+    if slo <= 0 or wait <= slo:
+        return Admission(True, queue, estimate, 0, backlog_chars, rate)
+    return Admission(False, queue, estimate, max(1, math.ceil(wait - slo)), backlog_chars, rate)
+
+
+def backlog_summary() -> dict:
+    """Per-queue load for /health; empty if the backlog can't be read."""
+    summary = {}
+    try:
+        for queue in (SMALL_QUEUE, LARGE_QUEUE):
+            jobs, chars, rate = queue_load(queue)
+            summary[queue] = {"jobs": jobs, "chars": chars, "chars_per_second": round(rate, 1),
+                              "wait_seconds": round(chars / rate)}
+    except Exception as e:
+        logger.warning(f"Could not read the backlog: {e}")
+    return summary
+
+
+def track_job(task_id: str, queue: str, chars: int) -> None:
+    """Best effort: count a job's characters as outstanding on ``queue`` from now on."""
+    try:
+        get_backlog().track(task_id, queue, chars)
+    except Exception as e:
+        logger.warning(f"Could not add job {task_id} to the backlog: {e}")
+
+
+def job_progress(task_id: str, chars: int, synthesized: bool = True) -> None:
+    """Best effort: count ``chars`` characters of a job as finished (by the model if ``synthesized``)."""
+    try:
+        get_backlog().progress(task_id, chars, synthesized)
+    except Exception as e:
+        logger.warning(f"Could not record progress of job {task_id}: {e}")
+
+
+def forget_job(task_id: str) -> None:
+    """Best effort: drop a finished or failed job from the backlog."""
+    try:
+        get_backlog().forget(task_id)
+    except Exception as e:
+        logger.warning(f"Could not remove job {task_id} from the backlog: {e}")
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from audio_index import touch_audio
+from metrics import CACHE_LOOKUPS
+from storage import LocalStorage
+
+# How long an in-flight entry is trusted before we assume its task died (task_time_limit)
+AUDIO_CACHE_PENDING_TTL = int(os.getenv("AUDIO_CACHE_PENDING_TTL", 2400))
+
+
+def file_key_hasher(model_name: str):
+    """Incremental form of :func:`file_key` for uploads hashed while they stream in."""
+    return hashlib.sha256(f"file\0{model_name}\0".encode())
+
+
+def file_key(data: bytes, model_name: str) -> str:
+    """Cache key for the raw upload bytes synthesized with a given model."""
+    digest = file_key_hasher(model_name)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def text_key(text: str, model_name: str) -> str:
+    """Cache key for extracted text, so the same book in a different file still hits."""
+    digest = hashlib.sha256(f"text\0{model_name}\0".encode())
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """Content-addressed index over generated audio files.
+
+    Each key maps to a small JSON entry under ``<audio_dir>/.cache``. Entries
+    are shared between the API and the workers through the same audio volume.
+    The audio itself lives in ``storage`` (by default the files beside the
+    index). The cache deletes no audio itself: the retention sweep
+    (``AUDIO_TTL_SECONDS``, ``AUDIO_QUOTA_BYTES``) is the only evictor. Hits
+    count as uses in the audio index it orders files by, and an entry whose
+    file it removed is dropped at its next lookup.
+    """
+
+    def __init__(self, audio_dir: str, pending_ttl: int = AUDIO_CACHE_PENDING_TTL, storage=None):
+        self.audio_dir = audio_dir
+        self.storage = storage or LocalStorage(audio_dir)
+        self.index_dir = os.path.join(audio_dir, ".cache")
+        self.pending_ttl = pending_ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "pending_hits": 0, "misses": 0}
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def _read(self, key: str) -> dict | None:
+        try:
+            with open(self._entry_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, entry: dict) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = self._entry_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+        CACHE_LOOKUPS.labels("audio", name).inc()
+
+    def lookup(self, *keys: str) -> dict | None:
+        """Return the first usable entry for ``keys`` and mark its audio as used.
+
+        A completed entry carries ``audio_filename``; a pending one only has the
+        ``task_id`` of the conversion that is still running.
+        """
+        for key in keys:
+            entry = self._read(key)
+            if entry is None:
+                continue
+            audio_filename = entry.get("audio_filename")
+            if audio_filename:
+                if self.storage.size(audio_filename) is None:
+                    self._remove(key)
+                    continue
+                # A cache hit is a use of the file as far as retention is concerned
+                touch_audio(audio_filename)
+                self._count("hits")
+                return entry
+            if time.time() - entry.get("created", 0) < self.pending_ttl:
+                self._count("pending_hits")
+                return entry
+            self._remove(key)
+        self._count("misses")
+        return None
+
+    def mark_pending(self, keys, task_id: str) -> None:
+        """Point ``keys`` at an in-flight task so duplicate uploads join it."""
+        for key in keys:
+            entry = self._read(key)
+            if entry and entry.get("audio_filename"):
+                continue
+            self._write(key, {"task_id": task_id, "created": time.time()})
+
+    def store(self, keys, audio_filename: str, task_id: str | None = None, **info) -> None:
+        """Record a finished conversion under every key."""
+        entry = {"task_id": task_id, "audio_filename": audio_filename, "created": time.time(), **info}
+        for key in keys:
+            self._write(key, entry)
+
+    def discard(self, keys) -> None:
+        """Forget in-flight entries for a conversion that gave up."""
+        for key in keys:
+            entry = self._read(key)
+            if entry and not entry.get("audio_filename"):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["pending_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["pending_hits"]) / lookups if lookups else 0.0
+        return stats
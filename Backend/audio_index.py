@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from task_status import STATUS_REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Downloads only refresh a file's last-access time this often, so seeking doesn't write per request
+AUDIO_TOUCH_INTERVAL = float(os.getenv("AUDIO_TOUCH_INTERVAL", 60))
+KEY_PREFIX = "orator:audio:"
+
+
+class RedisAudioIndex:
+    """Index of finished audio files in Redis, shared by the API, workers and beat.
+
+    Two sorted sets order the files by creation (for paging ``/files``) and by
+    last access (for TTL and LRU eviction); a small hash per file holds its
+    size and owning task, and a counter tracks the total size so quota checks
+    cost one ``GET``. Unlike Celery results and status records, entries don't
+    expire: they live exactly as long as the file.
+    """
+
+    def __init__(self, url: str, touch_interval: float = AUDIO_TOUCH_INTERVAL):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.touch_interval = touch_interval
+        self._touched: dict[str, float] = {}
+        self.created_key = KEY_PREFIX + "created"
+        self.accessed_key = KEY_PREFIX + "accessed"
+        self.bytes_key = KEY_PREFIX + "bytes"
+
+    def _file_key(self, name: str) -> str:
+        return f"{KEY_PREFIX}file:{name}"
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{KEY_PREFIX}task:{task_id}"
+
+    def add(self, name: str, size: int, task_id: str | None = None, created: float | None = None,
+            accessed: float | None = None, **info) -> bool:
+        """Index a finished file; returns False if it was already indexed."""
+        created = time.time() if created is None else created
+        if not self.client.zadd(self.created_key, {name: created}, nx=True):
+            return False
+        entry = {"filename": name, "size": size, "created": created, "task_id": task_id, **info}
+        pipe = self.client.pipeline()
+        pipe.hset(self._file_key(name), mapping={k: json.dumps(v) for k, v in entry.items()})
+        pipe.zadd(self.accessed_key, {name: created if accessed is None else accessed})
+        pipe.incrby(self.bytes_key, size)
+        if task_id:
+            pipe.set(self._task_key(task_id), name)
+        pipe.execute()
+        return True
+
+    def get(self, name: str) -> dict | None:
+        raw = self.client.hgetall(self._file_key(name))
+        return {k: json.loads(v) for k, v in raw.items()} if raw else None
+
+    def by_task(self, task_id: str) -> dict | None:
+        """The file a task produced, after its Celery result and status record have expired."""
+        name = self.client.get(self._task_key(task_id))
+        return self.get(name) if name else None
+
+    def remove(self, name: str) -> dict | None:
+        """Drop a file from the index and return its entry."""
+        entry = self.get(name)
+        if not self.client.zrem(self.created_key, name):
+            return None
+        pipe = self.client.pipeline()
+        pipe.zrem(self.accessed_key, name)
+        pipe.delete(self._file_key(name))
+        if entry:
+            pipe.decrby(self.bytes_key, entry.get("size", 0))
+            if entry.get("task_id"):
+                pipe.delete(self._task_key(entry["task_id"]))
+        pipe.execute()
+        self._touched.pop(name, None)
+        return entry
+
+    def touch(self, name: str, now: float | None = None) -> None:
+        """Record an access; calls within ``touch_interval`` of the last one are skipped."""
+        now = time.time() if now is None else now
+        if now - self._touched.get(name, float("-inf")) < self.touch_interval:
+            return
+        self._touched[name] = now
+        self.client.zadd(self.accessed_key, {name: now}, xx=True)
+
+    def count(self) -> int:
+        return self.client.zcard(self.created_key)
+
+    def total_bytes(self) -> int:
+        return int(self.client.get(self.bytes_key) or 0)
+
+    def page(self, offset: int = 0, limit: int = 50) -> list[dict]:
+        """Newest files first."""
+        names = self.client.zrevrange(self.created_key, offset, offset + limit - 1)
+        pipe = self.client.pipeline()
+        for name in names:
+            pipe.hgetall(self._file_key(name))
+        return [{k: json.loads(v) for k, v in raw.items()} for raw in pipe.execute() if raw]
+
+    def least_recent(self, limit: int, accessed_before: float = float("inf")) -> list[str]:
+        """Least recently accessed files, oldest first."""
+        upper = "+inf" if accessed_before == float("inf") else f"({accessed_before}"
+        return self.client.zrangebyscore(self.accessed_key, "-inf", upper, start=0, num=limit)
+
+    def names(self) -> set[str]:
+        return {name for name, _ in self.client.zscan_iter(self.created_key, count=1000)}
+
+
+class MemoryAudioIndex:
+    """Process-local stand-in for tests and eager mode."""
+
+    def __init__(self, touch_interval: float = 0):
+        self.touch_interval = touch_interval
+        self._entries: dict[str, dict] = {}
+        self._accessed: dict[str, float] = {}
+        self._tasks: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, size: int, task_id: str | None = None, created: float | None = None,
+            accessed: float | None = None, **info) -> bool:
+        created = time.time() if created is None else created
+        with self._lock:
+            if name in self._entries:
+                return False
+            self._entries[name] = {"filename": name, "size": size, "created": created, "task_id": task_id, **info}
+            self._accessed[name] = created if accessed is None else accessed
+            if task_id:
+                self._tasks[task_id] = name
+            return True
+
+    def get(self, name: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(name)
+            return dict(entry) if entry else None
+
+    def by_task(self, task_id: str) -> dict | None:
+        name = self._tasks.get(task_id)
+        return self.get(name) if name else None
+
+    def remove(self, name: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            self._accessed.pop(name, None)
+            if entry and entry.get("task_id"):
+                self._tasks.pop(entry["task_id"], None)
+            return entry
+
+    def touch(self, name: str, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            if name in self._accessed and now - self._accessed[name] >= self.touch_interval:
+                self._accessed[name] = now
+
+    def count(self) -> int:
+        return len(self._entries)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values())
+
+    def page(self, offset: int = 0, limit: int = 50) -> list[dict]:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e["created"], reverse=True)
+            return [dict(entry) for entry in entries[offset:offset + limit]]
+
+    def least_recent(self, limit: int, accessed_before: float = float("inf")) -> list[str]:
+        with self._lock:
+            ordered = sorted((t, name) for name, t in self._accessed.items() if t < accessed_before)
+            return [name for _, name in ordered[:limit]]
+
+    def names(self) -> set[str]:
+        with self._lock:
+            return set(self._entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_audio_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RedisAudioIndex(STATUS_REDIS_URL) if STATUS_REDIS_URL else MemoryAudioIndex()
+        return _index
+
+
+def record_audio(name: str, size: int, task_id: str | None = None, **info) -> None:
+    """Best-effort index update; the next GC sweep indexes anything missed here."""
+    try:
+        get_audio_index().add(name, size, task_id=task_id, **info)
+    except Exception as e:
+        logger.warning(f"Could not index {name}: {e}")
+
+
+def touch_audio(name: str) -> None:
+    try:
+        get_audio_index().touch(name)
+    except Exception as e:
+        logger.warning(f"Could not record access to {name}: {e}")
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import os
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+from encoders import media_type_for
+
+# Seconds a file's stat result is trusted before the disk is checked again
+AUDIO_STAT_CACHE_SECONDS = float(os.getenv("AUDIO_STAT_CACHE_SECONDS", 60))
+# Finished audio is never rewritten under the same name, so clients and CDNs may keep it for good
+AUDIO_CACHE_CONTROL = os.getenv("AUDIO_CACHE_CONTROL", "public, max-age=31536000, immutable")
+STAT_CACHE_SIZE = 4096
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+class FileInfo(NamedTuple):
+    path: str
+    stat_result: os.stat_result
+    etag: str
+    last_modified: str
+
+
+def content_etag(path: str) -> str:
+    """Strong ETag from the file's bytes, so identical audio validates anywhere."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+    return f'"{digest.hexdigest()}"'
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_ino, a.st_size, a.st_mtime_ns) == (b.st_ino, b.st_size, b.st_mtime_ns)
+
+
+def _etags(header: str) -> set[str]:
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def not_modified(request_headers: Headers, info: FileInfo) -> bool:
+    """Whether a GET can be answered with 304, per the RFC 9110 precedence rules."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = _etags(if_none_match)
+        return "*" in tags or info.etag in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(info.stat_result.st_mtime) <= since
+    return False
+
+
+class AudioFiles:
+    """Serves finished audio files with validators, conditional GETs and byte ranges.
+
+    Stat results and content ETags are cached per path for ``ttl`` seconds, so
+    a player seeking through an hour-long book doesn't cost a full stat and
+    validator check per request, and each file is hashed once per process.
+    A hit still checks that the file exists, since the retention sweep runs
+    in another process and may have deleted it. When an entry expires the
+    file is stat'ed again and only re-hashed if it changed. Range and
+    If-Range handling is Starlette's ``FileResponse``, which is handed the
+    cached stat result and these headers.
+    """
+
+    def __init__(self, directory: str, ttl: float = AUDIO_STAT_CACHE_SECONDS,
+                 max_entries: int = STAT_CACHE_SIZE, clock=time.monotonic):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, FileInfo]] = OrderedDict()
+        self._hashing: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.hashes = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "hashes": self.hashes}
+
+    def invalidate(self, filename: str) -> None:
+        self._entries.pop(os.path.abspath(os.path.join(self.directory, filename)), None)
+
+    async def info(self, filename: str) -> FileInfo | None:
+        """Cached stat and ETag for ``filename``, or None if it isn't a file."""
+        path = os.path.abspath(os.path.join(self.directory, filename))
+        entry = self._entries.get(path)
+        now = self.clock()
+        if entry is not None and now - entry[0] < self.ttl:
+            if not await asyncio.to_thread(os.path.exists, path):
+                # Opening it would fail after the response headers were sent
+                self._entries.pop(path, None)
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        try:
+            stat_result = await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        if entry is not None and _same_file(entry[1].stat_result, stat_result):
+            info = entry[1]
+        else:
+            info = FileInfo(path, stat_result, await self._etag(path),
+                            formatdate(stat_result.st_mtime, usegmt=True))
+        self._entries[path] = (now, info)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return info
+
+    async def _etag(self, path: str) -> str:
+        # Concurrent first requests for one file share a single hash
+        pending = self._hashing.get(path)
+        if pending is None:
+            self.hashes += 1
+            pending = asyncio.ensure_future(asyncio.to_thread(content_etag, path))
+            self._hashing[path] = pending
+            pending.add_done_callback(lambda _: self._hashing.pop(path, None))
+        return await asyncio.shield(pending)
+
+    async def response(self, request_headers: Headers, filename: str,
+                       disposition: str = "inline") -> Response | None:
+        """Response for a GET/HEAD of ``filename``, or None if it doesn't exist."""
+        info = await self.info(filename)
+        if info is None:
+            return None
+        headers = {
+            "ETag": info.etag,
+            "Last-Modified": info.last_modified,
+            "Cache-Control": AUDIO_CACHE_CONTROL,
+        }
+        if not_modified(request_headers, info):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(
+            info.path,
+            headers=headers,
+            media_type=media_type_for(filename),
+            filename=filename,
+            stat_result=info.stat_result,
+            content_disposition_type=disposition,
+        )
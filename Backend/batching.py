@@ -0,0 +1,96 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Most chunks synthesized in one model call (1 disables batching). Only models with a batched
+# ``tts_to_files`` entry point gain from more; the bundled Coqui model has none yet
+TTS_MAX_BATCH_SIZE = int(os.getenv("TTS_MAX_BATCH_SIZE", 1))
+# How long the first chunk of a batch waits for others before it runs alone
+TTS_BATCH_WAIT_SECONDS = float(os.getenv("TTS_BATCH_WAIT_MS", 50)) / 1000
+
+
+def one_by_one(model):
+    """``(texts, paths) -> errors`` calling ``model.tts_to_file`` once per text."""
+    def run(texts, paths):
+        errors = []
+        for text, path in zip(texts, paths):
+            try:
+                model.tts_to_file(text=text, file_path=path)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+    return run
+
+
+def batch_runner(model):
+    """``(texts, paths) -> errors`` for ``model``, one entry per text (None on success)."""
+    if hasattr(model, "tts_to_files"):
+        return model.tts_to_files
+    return one_by_one(model)
+
+
+class BatchingSynthesizer:
+    """Group concurrent ``tts_to_file`` calls into batched model calls.
+
+    Callers block exactly as before. One thread owns the model: it takes the
+    first pending chunk, waits up to ``max_wait`` for more (at most
+    ``max_batch_size``), and synthesizes them together. Chunks come from
+    every thread of the worker, so concurrent jobs share batches too. A text
+    the model rejects fails only its own call.
+    """
+
+    def __init__(self, model, max_batch_size: int = TTS_MAX_BATCH_SIZE,
+                 max_wait: float = TTS_BATCH_WAIT_SECONDS):
+        self.model = model
+        self.synthesizer = getattr(model, "synthesizer", None)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.chunks = 0
+        # With batching off (the model server still serializes through here) the model runs as is
+        self._run_batch = batch_runner(model) if self.max_batch_size > 1 else one_by_one(model)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str, file_path) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="tts-batcher", daemon=True)
+                self._thread.start()
+        future: Future = Future()
+        self._queue.put((text, file_path, future))
+        return future
+
+    def tts_to_file(self, text: str, file_path) -> None:
+        self.submit(text, file_path).result()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch: list) -> None:
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            errors = self._run_batch([text for text, _, _ in batch], [path for _, path, _ in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        self.batches += 1
+        self.chunks += len(batch)
+        for (_, _, future), error in zip(batch, errors):
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
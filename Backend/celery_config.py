@@ -1,6 +1,13 @@
 import os
 from pathlib import Path
 from celery import Celery
+from retention import AUDIO_GC_INTERVAL, AUDIO_RECONCILE_INTERVAL
+
+# Queues: books are routed by length once their text is extracted (routing.py), so a
+# long book never holds the worker slot a one-page upload is waiting for
+SMALL_QUEUE = "tts_small"
+LARGE_QUEUE = "tts_large"
+HEALTH_QUEUE = "health"
 # Environment variables (with default fallbacks)
 broker_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 result_backend = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
@@ -30,6 +37,13 @@ celery_app.conf.update(
     
     # Task routing and execution
     task_always_eager=False,  # Don't execute tasks synchronously
+    task_default_queue=SMALL_QUEUE,  # Uploads start here; long books are handed to LARGE_QUEUE
+    task_routes={
+        'tasks.health_check': {'queue': HEALTH_QUEUE},
+        'tasks.test_tts_short': {'queue': HEALTH_QUEUE},
+        'tasks.collect_garbage': {'queue': HEALTH_QUEUE},
+        'tasks.reconcile_audio_index': {'queue': HEALTH_QUEUE},
+    },
     task_eager_propagates=True,  # Propagate exceptions when eager
     
     # Worker settings
@@ -48,6 +62,13 @@ celery_app.conf.update(
     broker_connection_retry=True,
     broker_connection_max_retries=10,
     
+    # Honour message priorities (0 runs first) on the Redis broker
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+    
     # Result backend settings
     result_backend_transport_options={
         'retry_on_timeout': True,
@@ -60,11 +81,18 @@ celery_app.conf.update(
     
     # Memory management
     worker_max_memory_per_child=1024000,  # 1GB memory limit per worker child
+    
+    # Periodic jobs (run by the celery-beat service)
+    beat_schedule={
+        'collect-garbage': {
+            'task': 'tasks.collect_garbage',
+            'schedule': AUDIO_GC_INTERVAL,
+            'options': {'expires': AUDIO_GC_INTERVAL},  # Don't let sweeps pile up behind a backlog
+        },
+        'reconcile-audio-index': {
+            'task': 'tasks.reconcile_audio_index',
+            'schedule': AUDIO_RECONCILE_INTERVAL,
+            'options': {'expires': AUDIO_RECONCILE_INTERVAL},
+        },
+    },
 )
-
-# # Optional: Add task routes for different queues
-# celery_app.conf.task_routes = {
-#     'tasks.convert_text_to_audio': {'queue': 'tts_queue'},
-#     'tasks.health_check': {'queue': 'default'},
-#     'tasks.test_tts_short': {'queue': 'tts_queue'},
-# }
\ No newline at end of file
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import re
+import threading
+
+# Byte cap for cached chunk audio; least recently used chunks are dropped first
+CHUNK_CACHE_MAX_BYTES = int(os.getenv("CHUNK_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+CHUNK_CACHE_ENABLED = os.getenv("CHUNK_CACHE_ENABLED", "true").lower() == "true"
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Collapse whitespace so the same sentence from different layouts shares a key."""
+    return _whitespace.sub(" ", text).strip()
+
+
+def chunk_key(text: str, model_name: str) -> str:
+    digest = hashlib.sha256(f"{model_name}\0".encode())
+    digest.update(normalize_chunk_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChunkCache:
+    """Disk cache of synthesized chunk audio shared by every job and worker.
+
+    Books repeat a lot of boilerplate (copyright pages, chapter headings,
+    disclaimers), so each chunk's WAV is stored under a hash of its normalized
+    text and the model name. File mtime is the LRU clock; hits touch it.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_bytes: int = CHUNK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # Lazily measured, then tracked on put
+
+    def _path(self, text: str) -> str:
+        key = chunk_key(text, self.model_name)
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+
+    def get(self, text: str) -> bytes | None:
+        path = self._path(text)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data or None
+
+    def put(self, text: str, data: bytes) -> None:
+        path = self._path(text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._measure()[1]
+            else:
+                self._size += len(data)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _measure(self) -> tuple[list[tuple[float, int, str]], int]:
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".wav"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files, sum(size for _, size, _ in files)
+
+    def evict(self) -> int:
+        """Drop least recently used chunks until the cache fits in ``max_bytes``."""
+        files, total = self._measure()
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._size = total
+        return evicted
+
+
+_caches: dict[tuple[str, str], ChunkCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_chunk_cache(cache_dir: str, model_name: str) -> ChunkCache:
+    """The process's ChunkCache for ``cache_dir``, so the directory is only measured once.
+
+    After that first walk the size is tracked from this process's own writes;
+    ``evict`` measures the directory afresh, catching up with other processes.
+    """
+    key = (os.path.abspath(cache_dir), model_name)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ChunkCache(cache_dir, model_name)
+        return cache
@@ -0,0 +1,141 @@
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends for the fallback splitter: terminal punctuation, closing quotes or brackets, then whitespace
+SENTENCE_END = re.compile(r"[.!?]+[\"'”’)\]]*(?=\s)")
+# Clause boundaries an oversized sentence may be split after
+CLAUSE_END = re.compile(r"[,;:–—)](?=\s)")
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _load_punkt():
+    try:
+        from nltk.tokenize import PunktTokenizer
+        return PunktTokenizer("english")
+    except ImportError:
+        # nltk < 3.8.2 ships the pickled model instead of punkt_tab
+        import nltk
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+
+
+def sentence_tokenizer():
+    """NLTK's Punkt tokenizer, loaded once per process; None if its data isn't installed."""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        with _tokenizer_lock:
+            if not _tokenizer_loaded:
+                try:
+                    _tokenizer = _load_punkt()
+                except (ImportError, LookupError, OSError) as e:
+                    logger.warning(f"Punkt unavailable ({type(e).__name__}), splitting sentences on punctuation")
+                _tokenizer_loaded = True
+    return _tokenizer
+
+
+def _trim(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    """(start, end) offsets of each sentence, without surrounding whitespace."""
+    tokenizer = sentence_tokenizer()
+    if tokenizer is not None:
+        raw = tokenizer.span_tokenize(text)
+    else:
+        ends = [m.end() for m in SENTENCE_END.finditer(text)]
+        raw = zip([0] + ends, ends + [len(text)])
+    spans = []
+    for start, end in raw:
+        start, end = _trim(text, start, end)
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def split_span(text: str, start: int, end: int, max_chars: int) -> list[tuple[int, int]]:
+    """Cut a span longer than ``max_chars`` into pieces that fit.
+
+    Each cut goes after the last clause boundary in the window, else at the
+    last space, and only mid-word when the window has no whitespace at all
+    (tables, URLs, scripts without spaces). A boundary in the first quarter
+    of the window is ignored so pieces don't come out tiny.
+    """
+    pieces = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        floor = start + max_chars // 4
+        cut = None
+        for match in CLAUSE_END.finditer(text, floor, limit):
+            cut = match.end()
+        if cut is None:
+            space = text.rfind(" ", floor, limit + 1)
+            cut = space if space > start else limit
+        piece = _trim(text, start, cut)
+        if piece[0] < piece[1]:
+            pieces.append(piece)
+        start = _trim(text, cut, end)[0]
+    if start < end:
+        pieces.append((start, end))
+    return pieces
+
+
+def _pack(spans: list[tuple[int, int]], capacity: int) -> list[tuple[int, int]]:
+    """Greedily group consecutive spans into chunks no longer than ``capacity``."""
+    chunks = []
+    chunk_start, chunk_end = spans[0]
+    for start, end in spans[1:]:
+        if end - chunk_start > capacity:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = start
+        chunk_end = end
+    chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def make_chunks(text: str, min_chars: int, max_chars: int) -> list[str]:
+    """Split text into sentence-based chunks of at most ``max_chars``, evenly sized.
+
+    Works on offsets into ``text`` and slices each chunk once, so the cost is
+    linear in the text. Sentences longer than ``max_chars`` are split at
+    clause or word boundaries first. The fewest chunks that fit are then
+    re-balanced: the smallest capacity that still packs into that many
+    chunks is found by bisection, so parallel synthesis finishes evenly
+    instead of leaving one short straggler. A trailing chunk under
+    ``min_chars`` is merged into the previous one if they fit together.
+    """
+    text = text.replace("\n", " ")
+    spans = []
+    for start, end in sentence_spans(text):
+        if end - start > max_chars:
+            spans.extend(split_span(text, start, end, max_chars))
+        else:
+            spans.append((start, end))
+    if not spans:
+        return []
+
+    count = len(_pack(spans, max_chars))
+    # Smallest capacity that still packs into `count` chunks; greedy packing
+    # never needs more chunks as capacity grows, so bisection applies
+    low = max(end - start for start, end in spans)
+    high = max_chars
+    while low < high:
+        middle = (low + high) // 2
+        if len(_pack(spans, middle)) <= count:
+            high = middle
+        else:
+            low = middle + 1
+    chunks = _pack(spans, low)
+
+    if len(chunks) > 1 and chunks[-1][1] - chunks[-1][0] < min_chars and chunks[-1][1] - chunks[-2][0] <= max_chars:
+        chunks[-2:] = [(chunks[-2][0], chunks[-1][1])]
+    return [text[start:end] for start, end in chunks]
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import struct
+import time
+
+CLAMD_HOST = os.getenv("CLAMD_HOST", "clamd")
+CLAMD_PORT = int(os.getenv("CLAMD_PORT", 3310))
+# Idle sessions kept open for reuse; scans beyond this open (and then close) extra connections
+CLAMD_POOL_SIZE = int(os.getenv("CLAMD_POOL_SIZE", 4))
+# Per connect / per reply timeout in seconds
+CLAMD_TIMEOUT = float(os.getenv("CLAMD_TIMEOUT", 10))
+# Consecutive connection failures that open the breaker, and how long it stays open
+CLAMD_FAILURE_THRESHOLD = int(os.getenv("CLAMD_FAILURE_THRESHOLD", 3))
+CLAMD_RESET_SECONDS = float(os.getenv("CLAMD_RESET_SECONDS", 30))
+# Drop pooled sessions before clamd's own IdleTimeout (30 s by default) closes them
+CLAMD_IDLE_SECONDS = float(os.getenv("CLAMD_IDLE_SECONDS", 20))
+# Must not exceed clamd's StreamMaxLength (clamav/clamd.conf); larger files can't be scanned
+CLAMD_STREAM_MAX_BYTES = int(os.getenv("CLAMD_STREAM_MAX_BYTES", 32 * 1024 * 1024))
+# Largest INSTREAM frame sent in one go
+INSTREAM_CHUNK_BYTES = 64 * 1024
+
+
+class ClamdError(Exception):
+    """clamd answered, but with an error (e.g. the stream exceeded StreamMaxLength)."""
+
+
+class ClamdUnavailable(ClamdError):
+    """clamd could not be reached, timed out, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Trip after ``threshold`` consecutive failures; allow one trial call after ``reset_timeout``."""
+
+    def __init__(self, threshold: int = CLAMD_FAILURE_THRESHOLD,
+                 reset_timeout: float = CLAMD_RESET_SECONDS, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = self.clock()
+
+
+class _Session:
+    """One clamd connection in IDSESSION mode; replies are tagged with request ids."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 1
+        self.last_used = time.monotonic()
+
+    def usable(self, max_idle: float) -> bool:
+        return (not self.reader.at_eof() and not self.writer.is_closing()
+                and time.monotonic() - self.last_used < max_idle)
+
+    async def reply(self, timeout: float) -> str:
+        line = await asyncio.wait_for(self.reader.readuntil(b"\0"), timeout)
+        request_id, _, answer = line[:-1].decode("utf-8", "replace").partition(": ")
+        if request_id != str(self.next_id):
+            raise ClamdError(f"Out-of-order clamd reply: {line!r}")
+        self.next_id += 1
+        return answer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class InstreamScan:
+    """An INSTREAM scan fed block by block while the upload is still arriving.
+
+    Write failures don't propagate into the upload: the scan just stops
+    sending and :meth:`result` raises the stored error.
+    """
+
+    def __init__(self, client: "AsyncClamd", session: _Session):
+        self.client = client
+        self.session = session
+        self.error: ClamdError | None = None
+        self.bytes_sent = 0
+
+    async def write(self, data: bytes) -> None:
+        if self.error is not None or self.session is None:
+            return
+        if self.bytes_sent + len(data) > self.client.stream_max:
+            self._fail(ClamdError(f"Stream exceeds StreamMaxLength ({self.client.stream_max} bytes)"))
+            return
+        try:
+            for start in range(0, len(data), INSTREAM_CHUNK_BYTES):
+                frame = data[start:start + INSTREAM_CHUNK_BYTES]
+                self.session.writer.write(struct.pack("!L", len(frame)) + frame)
+                await asyncio.wait_for(self.session.writer.drain(), self.client.timeout)
+            self.bytes_sent += len(data)
+        except (OSError, asyncio.TimeoutError) as e:
+            # clamd answers and hangs up once a stream passes StreamMaxLength; that
+            # is a verdict about the file, not an outage, so it must not skip the scan
+            answer = await self._early_reply()
+            if answer and answer.endswith("ERROR"):
+                self._fail(ClamdError(answer))
+            else:
+                self._fail(ClamdUnavailable(f"clamd stream interrupted: {e}"))
+
+    async def _early_reply(self) -> str | None:
+        try:
+            return await self.session.reply(min(self.client.timeout, 1.0))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ClamdError):
+            return None
+
+    async def result(self) -> str | None:
+        """Finish the stream and return the signature name, or None if clean."""
+        if self.error is None and self.session is not None:
+            try:
+                self.session.writer.write(struct.pack("!L", 0))
+                answer = await self.session.reply(self.client.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                self._fail(ClamdUnavailable(f"clamd did not answer: {e}"))
+            except ClamdError as e:
+                self._fail(e)
+            else:
+                session, self.session = self.session, None
+                if answer.endswith("ERROR"):
+                    # clamd hangs up after an INSTREAM error, so the session is not reused
+                    session.close()
+                    self.error = ClamdError(answer)
+                else:
+                    self.client._release(session)
+                    self.client.breaker.record_success()
+                    if answer.endswith("FOUND"):
+                        return answer[len("stream: "):-len(" FOUND")]
+                    return None
+        raise self.error or ClamdError("Scan already finished")
+
+    def abort(self) -> None:
+        """Give up on an unfinished scan; the half-sent session can't be reused."""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def _fail(self, error: ClamdError) -> None:
+        self.error = error
+        self.abort()
+        if isinstance(error, ClamdUnavailable):
+            self.client.breaker.record_failure()
+
+
+class AsyncClamd:
+    """asyncio clamd client with a pool of persistent IDSESSION connections.
+
+    An open circuit breaker makes :meth:`instream` fail immediately, so an
+    unreachable clamd costs one connect timeout per reset period instead of
+    one per upload.
+    """
+
+    def __init__(self, host: str = CLAMD_HOST, port: int = CLAMD_PORT,
+                 pool_size: int = CLAMD_POOL_SIZE, timeout: float = CLAMD_TIMEOUT,
+                 breaker: CircuitBreaker | None = None, max_idle: float = CLAMD_IDLE_SECONDS,
+                 stream_max: int = CLAMD_STREAM_MAX_BYTES):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.stream_max = stream_max
+        self.breaker = breaker or CircuitBreaker()
+        self._idle: list[_Session] = []
+        self._loop = None
+
+    async def _connect(self) -> _Session:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        writer.write(b"zIDSESSION\0")
+        await asyncio.wait_for(writer.drain(), self.timeout)
+        return _Session(reader, writer)
+
+    async def _acquire(self) -> _Session:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections belong to the loop that opened them
+            self._idle = []
+            self._loop = loop
+        while self._idle:
+            session = self._idle.pop()
+            if session.usable(self.max_idle):
+                return session
+            session.close()
+        if not self.breaker.allow():
+            raise ClamdUnavailable(f"clamd circuit open after {self.breaker.failures} failures")
+        try:
+            session = await self._connect()
+        except (OSError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            raise ClamdUnavailable(f"Could not connect to clamd at {self.host}:{self.port}: {e}") from e
+        self.breaker.record_success()
+        return session
+
+    def _release(self, session: _Session) -> None:
+        session.last_used = time.monotonic()
+        if len(self._idle) < self.pool_size and asyncio.get_running_loop() is self._loop:
+            self._idle.append(session)
+        else:
+            session.close()
+
+    async def instream(self) -> InstreamScan:
+        """Start an INSTREAM scan on a pooled session."""
+        session = await self._acquire()
+        try:
+            session.writer.write(b"zINSTREAM\0")
+        except OSError as e:
+            session.close()
+            self.breaker.record_failure()
+            raise ClamdUnavailable(f"clamd connection lost: {e}") from e
+        return InstreamScan(self, session)
+
+    async def scan_bytes(self, data: bytes) -> str | None:
+        scan = await self.instream()
+        await scan.write(data)
+        return await scan.result()
+
+    async def ping(self) -> bool:
+        try:
+            session = await self._acquire()
+        except ClamdUnavailable:
+            return False
+        try:
+            session.writer.write(b"zPING\0")
+            answer = await session.reply(self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ClamdError):
+            session.close()
+            self.breaker.record_failure()
+            return False
+        self._release(session)
+        self.breaker.record_success()
+        return answer == "PONG"
+
+    def close(self) -> None:
+        for session in self._idle:
+            session.close()
+        self._idle = []
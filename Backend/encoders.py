@@ -0,0 +1,191 @@
+import mimetypes
+import os
+import subprocess
+import tempfile
+import threading
+import wave
+from typing import NamedTuple
+
+# Codec for finished audiobooks: wav, opus, mp3 or flac
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "wav").lower()
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# Speech stays clear at far lower bitrates than music needs
+OPUS_BITRATE = os.getenv("OPUS_BITRATE", "32k")
+MP3_BITRATE = os.getenv("MP3_BITRATE", "64k")
+# Frames piped to the encoder per write
+ENCODE_BLOCK_FRAMES = 64 * 1024
+WAV_HEADER_BYTES = 44
+
+
+class AudioFormat(NamedTuple):
+    name: str
+    extension: str
+    media_type: str
+    # ffmpeg output options; None means chunks are concatenated as WAV in-process
+    ffmpeg_args: list[str] | None
+
+
+FORMATS = {
+    "wav": AudioFormat("wav", ".wav", "audio/wav", None),
+    # libopus only takes 8/12/16/24/48 kHz, so resample whatever the model produces
+    "opus": AudioFormat("opus", ".ogg", "audio/ogg", ["-c:a", "libopus", "-b:a", OPUS_BITRATE,
+                                                      "-application", "voip", "-ar", "24000", "-f", "ogg"]),
+    "mp3": AudioFormat("mp3", ".mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", MP3_BITRATE, "-f", "mp3"]),
+    "flac": AudioFormat("flac", ".flac", "audio/flac", ["-c:a", "flac", "-f", "flac"]),
+}
+_MEDIA_TYPES = {fmt.extension: fmt.media_type for fmt in FORMATS.values()}
+
+
+class EncoderError(RuntimeError):
+    pass
+
+
+def output_format(name: str | None = None) -> AudioFormat:
+    name = (name or AUDIO_FORMAT).lower()
+    if name not in FORMATS:
+        raise ValueError(f"Unknown audio format {name!r}; expected one of {', '.join(FORMATS)}")
+    return FORMATS[name]
+
+
+def media_type_for(filename: str) -> str:
+    """Content type for a generated audio file, from its extension."""
+    ext = os.path.splitext(filename)[1].lower()
+    return _MEDIA_TYPES.get(ext) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def size_stats(audio_format: str, audio_bytes: int, wav_bytes: int) -> dict:
+    """Task-result fields comparing the stored file with the WAV it replaces.
+
+    ``bytes_saved`` is saved once on disk and again on every full download.
+    """
+    return {
+        "audio_format": audio_format,
+        "audio_bytes": audio_bytes,
+        "wav_bytes": wav_bytes,
+        "bytes_saved": wav_bytes - audio_bytes,
+        "compression_ratio": round(wav_bytes / audio_bytes, 2) if audio_bytes else 0.0,
+    }
+
+
+class StreamingEncoder:
+    """Encode WAV chunks into one compressed file as they are handed over.
+
+    ffmpeg is started on the first chunk, with raw PCM in that chunk's format
+    on stdin, and each later chunk's frames are piped straight through, so the
+    encode finishes moments after the last chunk is synthesized instead of
+    running as a pass over the whole book. Chunks must share one format.
+
+    ``output`` is a path for ffmpeg to write, or a binary file object (such as
+    a storage writer) that ffmpeg's stdout is copied into as it is produced.
+    """
+
+    def __init__(self, output, audio_format: AudioFormat):
+        self.output = output
+        self.output_path = output if isinstance(output, str) else None
+        self.audio_format = audio_format
+        self.params = None
+        self.pcm_bytes = 0
+        self._process = None
+        self._stderr = None
+        self._copier = None
+        self._copy_error = None
+
+    @property
+    def wav_bytes(self) -> int:
+        """Size the same audio would have had as a single WAV file."""
+        return WAV_HEADER_BYTES + self.pcm_bytes
+
+    def _start(self, channels: int, sampwidth: int, framerate: int) -> None:
+        if sampwidth != 2:
+            raise EncoderError(f"Only 16-bit PCM chunks can be encoded, got {8 * sampwidth}-bit")
+        command = [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+            "-f", "s16le", "-ar", str(framerate), "-ac", str(channels), "-i", "pipe:0",
+            *self.audio_format.ffmpeg_args, self.output_path or "pipe:1",
+        ]
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stderr=self._stderr,
+                stdout=subprocess.DEVNULL if self.output_path else subprocess.PIPE,
+            )
+        except OSError as e:
+            self._stderr.close()
+            raise EncoderError(f"Could not start {FFMPEG_BINARY}: {e}") from e
+        if self.output_path is None:
+            self._copier = threading.Thread(target=self._copy_output, name="encoder-output", daemon=True)
+            self._copier.start()
+
+    def _copy_output(self) -> None:
+        try:
+            while block := self._process.stdout.read1(64 * 1024):
+                self.output.write(block)
+        except Exception as e:
+            self._copy_error = e
+            # Stop ffmpeg; the next add() or close() reports this error
+            self._process.kill()
+        finally:
+            self._process.stdout.close()
+
+    def add(self, wav_path: str) -> None:
+        """Append one chunk's audio to the encoded output."""
+        with wave.open(wav_path, "rb") as chunk:
+            params = (chunk.getnchannels(), chunk.getsampwidth(), chunk.getframerate())
+            if self.params is None:
+                self._start(*params)
+                self.params = params
+            elif params != self.params:
+                raise ValueError(f"Chunk format {params} does not match {self.params}")
+            try:
+                while True:
+                    block = chunk.readframes(ENCODE_BLOCK_FRAMES)
+                    if not block:
+                        break
+                    self._process.stdin.write(block)
+                    self.pcm_bytes += len(block)
+            except BrokenPipeError:
+                message = self._wait()
+                if self._copy_error is not None:
+                    message = f"could not store encoded audio: {self._copy_error}"
+                raise EncoderError(f"Encoder exited early: {message}") from None
+
+    def _wait(self) -> str:
+        """Wait for ffmpeg to exit and return what it logged."""
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._process.wait()
+        if self._copier is not None:
+            self._copier.join()
+        self._stderr.seek(0)
+        message = self._stderr.read().decode(errors="replace").strip()
+        self._stderr.close()
+        return message or f"exit status {self._process.returncode}"
+
+    def close(self) -> int:
+        """Finish the file and return its size in bytes (0 for file-object outputs)."""
+        if self._process is None:
+            raise ValueError("No audio chunks to encode")
+        message = self._wait()
+        if self._copy_error is not None:
+            raise EncoderError(f"Could not store encoded audio: {self._copy_error}") from self._copy_error
+        if self._process.returncode != 0:
+            self._remove_output()
+            raise EncoderError(f"Encoding to {self.audio_format.extension} failed: {message}")
+        return os.path.getsize(self.output_path) if self.output_path else 0
+
+    def abort(self) -> None:
+        """Stop encoding and remove the partial file."""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._wait()
+        self._remove_output()
+
+    def _remove_output(self) -> None:
+        if self.output_path is None:
+            return
+        try:
+            os.remove(self.output_path)
+        except FileNotFoundError:
+            pass
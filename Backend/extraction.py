@@ -0,0 +1,93 @@
+import posixpath
+import zipfile
+from html.parser import HTMLParser
+from io import BytesIO
+from typing import Iterator
+from xml.etree import ElementTree
+
+# Elements that end a line of text when flattening XHTML
+_BLOCK_TAGS = {
+    "p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "section", "article", "title", "dt", "dd", "pre",
+}
+_SKIP_TAGS = {"script", "style", "head"}
+
+
+def _as_file(source):
+    return BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def iter_pdf_pages(source) -> Iterator[str]:
+    """Yield the text of each PDF page, releasing the page's parsed objects as we go."""
+    import pdfplumber
+
+    with pdfplumber.open(_as_file(source)) as pdf:
+        for page in pdf.pages:
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+
+class _XHTMLText(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def iter_epub_chapters(source) -> Iterator[str]:
+    """Yield the text of each EPUB content document in reading (spine) order."""
+    with zipfile.ZipFile(_as_file(source)) as book:
+        container = ElementTree.fromstring(book.read("META-INF/container.xml"))
+        rootfile = container.find(".//{*}rootfile")
+        if rootfile is None:
+            raise ValueError("EPUB container has no rootfile")
+        opf_path = rootfile.get("full-path")
+        opf = ElementTree.fromstring(book.read(opf_path))
+        opf_dir = posixpath.dirname(opf_path)
+
+        manifest = {item.get("id"): item for item in opf.iterfind(".//{*}manifest/{*}item")}
+        for itemref in opf.iterfind(".//{*}spine/{*}itemref"):
+            item = manifest.get(itemref.get("idref"))
+            if item is None or "html" not in (item.get("media-type") or ""):
+                continue
+            href = posixpath.normpath(posixpath.join(opf_dir, item.get("href")))
+            parser = _XHTMLText()
+            parser.feed(book.read(href).decode("utf-8", errors="replace"))
+            parser.close()
+            yield parser.text()
+
+
+def iter_document_pages(source, ext: str) -> Iterator[str]:
+    """Yield pages (PDF) or chapters (EPUB) of a document lazily."""
+    if ext == ".pdf":
+        return iter_pdf_pages(source)
+    if ext == ".epub":
+        return iter_epub_chapters(source)
+    raise ValueError(f"Unsupported document type: {ext}")
+
+
+def extract_text(source, ext: str) -> str:
+    """Extract a document's text, joining the non-empty pages once at the end."""
+    return "".join(f"{page}\n" for page in iter_document_pages(source, ext) if page)
@@ -0,0 +1,65 @@
+import json
+import logging
+import os
+import time
+
+# "json" writes one object per line for log shippers; "text" the usual human-readable lines
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, the running task and ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        task = _current_task()
+        if task is not None:
+            entry["task_id"] = task.request.id
+            entry["task_name"] = task.name
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _current_task():
+    from celery import current_task
+
+    try:
+        return current_task if current_task and current_task.request.id else None
+    except Exception:
+        return None
+
+
+def formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def configure_logging() -> None:
+    """Send this process's log records to stderr in LOG_FORMAT; safe to call more than once."""
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    for handler in root.handlers:
+        if getattr(handler, "orator", False):
+            return
+    handler = logging.StreamHandler()
+    handler.orator = True
+    handler.setFormatter(formatter())
+    root.addHandler(handler)
+
+
+def use_formatter(logger: logging.Logger) -> None:
+    """Switch the handlers Celery set up on ``logger`` to LOG_FORMAT."""
+    for handler in logger.handlers:
+        handler.setFormatter(formatter())
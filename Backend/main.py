@@ -1,19 +1,64 @@
 import os
 import asyncio
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import logging
+from fastapi import FastAPI, File, Query, Request, UploadFile, HTTPException
 import time
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import pdfplumber
-from io import BytesIO
-import subprocess
-import pyclamd
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
 import tasks  
+import admission
+import metrics
+from logs import configure_logging
 from fastapi.staticfiles import StaticFiles
-from celery_config import celery_app
+from celery_config import HEALTH_QUEUE, celery_app
+from audio_cache import AudioCache, file_key_hasher
+import clamav
+import segments
+import task_status
+import uploads
+from audio_index import get_audio_index, touch_audio
+from audio_serving import AudioFiles
+from storage import open_storage
+from progress import SSE_KEEPALIVE_SECONDS, ProgressHub, sse_message
+from worker_monitor import WorkerMonitor
 
-app = FastAPI()
+configure_logging()
+logger = logging.getLogger(__name__)
+# Queue depth is read from the backlog when /metrics is scraped
+metrics.register_queue_collector()
+
+# Worker liveness from heartbeats, so uploads don't send a probe task through the queue
+worker_monitor = WorkerMonitor(celery_app)
+# Routes task progress events to open /task/{id}/events streams
+progress_hub = ProgressHub()
+# Finished audio: files under static/audio, or objects in S3 that clients fetch directly
+storage = open_storage(os.path.join("static", "audio"))
+# Result of the writability probe made once at startup, reported by /health
+storage_status = "unchecked"
+
+async def check_storage() -> None:
+    global storage_status
+    try:
+        await asyncio.to_thread(storage.check)
+        storage_status = "healthy"
+    except Exception as e:
+        logger.warning(f"Audio storage is not writable - {e}")
+        storage_status = f"error: {e}"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Eager mode runs tasks in-process; there are no workers to watch
+    if not celery_app.conf.task_always_eager:
+        worker_monitor.start()
+    await check_storage()
+    await progress_hub.start()
+    yield
+    await progress_hub.stop()
+    worker_monitor.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Create static directory if it doesn't exist
 os.makedirs("static/audio", exist_ok=True)
@@ -25,6 +70,14 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 ALLOWED_EXTENSIONS = {".pdf", ".epub"}
 ALLOWED_MIME_TYPES = {"application/pdf", "application/epub+zip"}
 MAX_FILE_SIZE_MB = 30
+# Header naming the tenant an upload counts against for fair scheduling; the client address otherwise
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant-ID")
+# Addresses of the proxies that set TENANT_HEADER; from anyone else it is ignored, or a bulk
+# uploader could dodge the fairness penalty by sending a new tenant id with every upload
+TRUSTED_PROXIES = {addr.strip() for addr in os.getenv("TRUSTED_PROXIES", "").split(",") if addr.strip()}
+
+# Refuse oversized bodies while they stream in rather than after buffering them
+app.add_middleware(uploads.UploadSizeLimit, max_bytes=MAX_FILE_SIZE_MB * 1024 * 1024)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,27 +87,100 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-CLAMD_HOST = os.getenv("CLAMD_HOST", "clamd")
-CLAMD_PORT = int(os.getenv("CLAMD_PORT", 3310))
+# Content-addressed cache of finished conversions, shared with the workers
+audio_cache = AudioCache(os.path.join("static", "audio"), storage=storage)
+# Finished audio with cached stat results and content ETags
+audio_files = AudioFiles(os.path.join("static", "audio"))
+
 ENABLE_ANTIVIRUS = os.getenv("ENABLE_ANTIVIRUS", "true").lower() == "true"
+# Pooled clamd sessions; its circuit breaker skips scans quickly while clamd is down
+clamd = clamav.AsyncClamd()
+# Uploads spooled and virus-scanned at once; more wait up to SCAN_WAIT_SECONDS for a slot, then get a 429
+MAX_CONCURRENT_SCANS = int(os.getenv("MAX_CONCURRENT_SCANS", 8))
+SCAN_WAIT_SECONDS = int(os.getenv("SCAN_WAIT_SECONDS", 10))
+scan_slots = asyncio.Semaphore(MAX_CONCURRENT_SCANS)
 
-async def get_clamd():
-    host, port = CLAMD_HOST, CLAMD_PORT
-    
-    for attempt in range(10):
-        try:
-            cd = pyclamd.ClamdNetworkSocket(host=host, port=port)
-            if cd.ping():
-                return cd
-        except (pyclamd.ConnectionError, ConnectionRefusedError, OSError) as e:
-            print(f"Attempt {attempt + 1}: Could not connect to ClamAV at {host}:{port} - {e}")
-            if attempt < 9:
-                await asyncio.sleep(1)
-    
-    raise HTTPException(status_code=503, detail="Antivirus engine not available.")
+@asynccontextmanager
+async def scan_slot():
+    """Hold one of MAX_CONCURRENT_SCANS slots for the duration of an upload's spool and scan."""
+    try:
+        await asyncio.wait_for(scan_slots.acquire(), SCAN_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        metrics.UPLOADS.labels("busy").inc()
+        raise HTTPException(status_code=429, detail="Too many uploads in progress. Please try again shortly.",
+                            headers={"Retry-After": str(SCAN_WAIT_SECONDS)})
+    try:
+        yield
+    finally:
+        scan_slots.release()
+
+async def start_scan() -> clamav.InstreamScan | None:
+    """Open an INSTREAM scan for an incoming upload, or None if scanning is skipped."""
+    if not ENABLE_ANTIVIRUS:
+        logger.debug("Antivirus scanning disabled")
+        return None
+    try:
+        return await clamd.instream()
+    except clamav.ClamdUnavailable as e:
+        logger.warning(f"ClamAV not available, skipping virus scan - {e}")
+        return None
+
+async def finish_scan(scan: clamav.InstreamScan | None) -> None:
+    if scan is None:
+        return
+    try:
+        with metrics.timed("virus_scan"):
+            signature = await scan.result()
+    except clamav.ClamdUnavailable as e:
+        logger.warning(f"ClamAV not available, skipping virus scan - {e}")
+        return
+    except clamav.ClamdError as e:
+        logger.error(f"ClamAV scan failed: {e}")
+        metrics.UPLOADS.labels("rejected").inc()
+        raise HTTPException(status_code=400, detail="File could not be scanned for malware.")
+    if signature:
+        logger.warning("Malware detected in upload", extra={"signature": signature})
+        metrics.UPLOADS.labels("rejected").inc()
+        raise HTTPException(status_code=400, detail="Malware detected in uploaded file.")
+
+def audio_urls(audio_filename: str) -> dict:
+    # Remote storage has no /static mount; /stream redirects to the object instead
+    audio_url = f"/static/audio/{audio_filename}" if storage.is_local else f"/stream/{audio_filename}"
+    return {"audio_url": audio_url, "download_url": f"/download/{audio_filename}"}
+
+def tenant_of(request: Request) -> str | None:
+    """Who an upload counts against: TENANT_HEADER from a trusted proxy, else the client address."""
+    client = request.client.host if request.client else None
+    if client in TRUSTED_PROXIES:
+        return request.headers.get(TENANT_HEADER) or client
+    return client
+
+def cached_upload_response(file: UploadFile, content_length: int, entry: dict) -> dict:
+    """Upload response for a file whose audio already exists or is being produced."""
+    response = {
+        "filename": file.filename,
+        "content_length": content_length,
+        "type": file.content_type,
+        "task_id": entry.get("task_id"),
+        "cached": True,
+    }
+    audio_filename = entry.get("audio_filename")
+    if audio_filename:
+        response.update({
+            "status": "completed",
+            **audio_urls(audio_filename),
+            "audio_filename": audio_filename,
+            "message": "Audio for this content already exists.",
+        })
+    else:
+        response.update({
+            "status": "processing",
+            "message": "This content is already being converted. Use the task_id to check status.",
+        })
+    return response
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(request: Request, file: UploadFile = File(...)):
     # Validation
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
@@ -63,178 +189,264 @@ async def upload_file(file: UploadFile = File(...)):
     if file.content_type not in ALLOWED_MIME_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported MIME type.")
     
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE_MB * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large.")
+    # Refuse from the declared size before taking a scan slot or spooling a byte;
+    # queue_upload decides again on the size that actually arrived
+    declared_length = request.headers.get("content-length", "")
+    if declared_length.isdigit():
+        check_admission(await asyncio.to_thread(admission.admit, admission.estimate_chars(int(declared_length), ext)))
     
-    # Antivirus scan
-    if ENABLE_ANTIVIRUS:
+    async with scan_slot():
+        # Spool to the shared upload volume, hashing and virus-scanning as the bytes
+        # arrive; the upload is never held in memory
+        hasher = file_key_hasher(tasks.TTS_MODEL_NAME)
+        scan = await start_scan()
         try:
-            cd = await get_clamd()
-            scan_result = cd.scan_stream(content)
-            if scan_result:
-                raise HTTPException(status_code=400, detail="Malware detected in uploaded file.")
-        except HTTPException as e:
-            if e.status_code == 503:
-                print("Warning: ClamAV not available, skipping virus scan")
-    else:
-        print("Antivirus scanning disabled")
-    
-    # Extract text from PDF
-    text_content = ""
-    try:
-        with pdfplumber.open(BytesIO(content)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to extract text from PDF: {str(e)}")
-    
-    if not text_content.strip():
-        raise HTTPException(status_code=400, detail="No text could be extracted from the PDF.")
+            with metrics.timed("upload_spool"):
+                upload_name, content_length = await uploads.spool_upload(
+                    file, ext, MAX_FILE_SIZE_MB * 1024 * 1024, hasher=hasher, scanner=scan
+                )
+        except BaseException as e:
+            if scan is not None:
+                scan.abort()
+            if isinstance(e, (uploads.UploadTooLarge, uploads.UploadRejected)):
+                metrics.UPLOADS.labels("rejected").inc()
+                raise HTTPException(status_code=400, detail=str(e))
+            raise
+        
+        try:
+            return await queue_upload(file, ext, upload_name, content_length, [hasher.hexdigest()], scan,
+                                      tenant_of(request))
+        except BaseException:
+            # Anything but a queued extraction task leaves the spooled file without an owner
+            uploads.discard_upload(upload_name)
+            raise
+
+def check_admission(decision: admission.Admission) -> None:
+    """Refuse work that would only start hours from now, and say when the backlog should have room."""
+    if decision.admitted:
+        return
+    logger.warning("Upload refused, backlog over the SLO",
+                   extra={"queue": decision.queue, "backlog_chars": decision.backlog_chars,
+                          "chars_per_second": round(decision.chars_per_second, 1),
+                          "retry_after": decision.retry_after})
+    metrics.UPLOADS.labels("refused").inc()
+    raise HTTPException(status_code=429, detail="The conversion queue is full. Please try again later.",
+                        headers={"Retry-After": str(decision.retry_after)})
+
+async def queue_upload(file: UploadFile, ext: str, upload_name: str, content_length: int,
+                       cache_keys: list[str], scan: clamav.InstreamScan | None, tenant: str | None = None) -> dict:
+    # Identical bytes were already scanned and synthesized, so skip straight to the result
+    cached = audio_cache.lookup(*cache_keys)
+    if cached:
+        logger.info("Audio cache hit for upload", extra={"upload": file.filename})
+        metrics.UPLOADS.labels("cached").inc()
+        if scan is not None:
+            scan.abort()
+        uploads.discard_upload(upload_name)
+        return cached_upload_response(file, content_length, cached)
     
-    print(f"Extracted text length: {len(text_content)} characters")
+    # The scan has already seen every byte; this only waits for clamd's verdict
+    await finish_scan(scan)
     
-    # Test Celery connection before queuing task
-    try:
-        # Quick health check
-        health_task = tasks.health_check.delay()
-        # Wait briefly to see if worker is responsive
-        for _ in range(5):  # Wait up to 5 seconds
-            if health_task.ready():
-                break
-            await asyncio.sleep(1)
-        
-        if not health_task.ready():
-            print("Warning: Celery worker seems slow to respond")
-        elif health_task.failed():
-            raise Exception("Health check task failed")
-            
-    except Exception as e:
-        print(f"Celery health check failed: {e}")
+    # Worker availability is tracked in the background; checking it costs nothing
+    queue_status = worker_monitor.status()
+    if queue_status == "broker_unreachable":
+        logger.error(f"Celery broker unreachable: {worker_monitor.broker_error}")
         raise HTTPException(status_code=503, detail="Task queue is not responding. Please try again later.")
+    if queue_status == "no_workers":
+        logger.warning("No Celery worker heartbeats; the task will wait in the queue")
     
-    # Queue the TTS task
+    # The backlog may have grown while this upload was spooled and scanned
+    estimated_chars = admission.estimate_chars(content_length, ext)
+    decision = await asyncio.to_thread(admission.admit, estimated_chars)
+    check_admission(decision)
+    
+    # Queue extraction + TTS; only the spooled file's name goes through the broker
     try:
-        result_task = tasks.convert_text_to_audio.delay(text_content)
-        print(f"Task queued with ID: {result_task.id}")
+        result_task = tasks.start_document_conversion(upload_name, ext, cache_keys=cache_keys, tenant=tenant,
+                                                      estimated_chars=estimated_chars)
+        logger.info("Task queued", extra={"task_id": result_task.id, "upload": file.filename,
+                                          "estimated_chars": estimated_chars})
+        metrics.UPLOADS.labels("queued").inc()
+        audio_cache.mark_pending(cache_keys, result_task.id)
     except Exception as e:
-        print(f"Failed to queue TTS task: {e}")
+        logger.error(f"Failed to queue TTS task: {e}")
         raise HTTPException(status_code=503, detail="Failed to queue conversion task. Please try again later.")
     # Return immediately with task info for polling
     return {
         "filename": file.filename, 
-        "content_length": len(content), 
+        "content_length": content_length, 
         "type": file.content_type, 
         "task_id": result_task.id,
         "status": "processing",
+        "estimated_completion_seconds": (round(decision.estimated_seconds)
+                                         if decision.estimated_seconds is not None else None),
+        "live_stream_url": f"/stream/live/{result_task.id}",
+        "events_url": f"/task/{result_task.id}/events",
         "message": "Text-to-speech conversion started. Use the task_id to check status."
     }
 
-@app.get("/download/{audio_filename}")
-async def download_audio(audio_filename: str):
-    """Download endpoint for audio files"""
+def check_audio_filename(audio_filename: str) -> None:
     # Validate filename to prevent directory traversal
     if ".." in audio_filename or "/" in audio_filename or "\\" in audio_filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
-    
-    # Use consistent path construction
-    audio_path = os.path.join("static", "audio", audio_filename)
-    
-    print(f"Download requested for: {audio_filename}")
-    print(f"Looking for file at: {audio_path}")
-    print(f"File exists: {os.path.exists(audio_path)}")
-    
-    if not os.path.exists(audio_path):
+
+@app.api_route("/download/{audio_filename}", methods=["GET", "HEAD"])
+async def download_audio(audio_filename: str, request: Request):
+    """Download endpoint for audio files (byte ranges, ETag and conditional GETs)"""
+    check_audio_filename(audio_filename)
+    logger.debug(f"Download requested for: {audio_filename}")
+    # Downloads keep a file from expiring
+    touch_audio(audio_filename)
+    if not storage.is_local:
+        return RedirectResponse(storage.download_url(audio_filename, attachment=True), status_code=307)
+    response = await audio_files.response(request.headers, audio_filename, disposition="attachment")
+    if response is None:
         raise HTTPException(status_code=404, detail="Audio file not found")
+    return response
+
+@app.api_route("/stream/{audio_filename}", methods=["GET", "HEAD"])
+async def stream_audio(audio_filename: str, request: Request):
+    """Streaming endpoint for audio files; players seek with Range requests"""
+    check_audio_filename(audio_filename)
+    touch_audio(audio_filename)
+    if not storage.is_local:
+        return RedirectResponse(storage.download_url(audio_filename), status_code=307)
+    response = await audio_files.response(request.headers, audio_filename)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    return response
+
+@app.get("/stream/live/{task_id}")
+async def stream_live_audio(task_id: str):
+    """Play a conversion while it is still running.
+
+    Streams one WAV over chunked HTTP: each chunk is sent as soon as the worker
+    publishes it, and the response waits for the next one until the job ends.
+    A job still in the queue is waited for up to LIVE_START_TIMEOUT.
+    """
+    if not task_id.replace("-", "").isalnum():
+        raise HTTPException(status_code=400, detail="Invalid task id")
     
-    # Get file size for logging
-    file_size = os.path.getsize(audio_path)
-    print(f"File size: {file_size} bytes")
-    
-    return FileResponse(
-        path=audio_path,
+    job_dir = segments.job_dir_for(os.path.join("static", "audio"), task_id)
+    # Without a job directory only a queued job's status record says there will be one;
+    # anything else (unknown, expired or already pruned) would hold the connection for nothing
+    if not await asyncio.to_thread(segments.job_started, job_dir):
+        try:
+            record = await asyncio.to_thread(task_status.get_status_store().get, task_id)
+        except Exception as e:
+            logger.warning(f"Could not read status of {task_id}: {e}")
+            record = {}
+        if not record or record.get("stage") in task_status.FINAL_STAGES:
+            raise HTTPException(status_code=404, detail="No live stream for this task")
+    return StreamingResponse(
+        segments.iter_live_wav(job_dir),
         media_type="audio/wav",
-        filename=audio_filename,
-        headers={
-            "Content-Disposition": f"attachment; filename={audio_filename}",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET",
-            "Access-Control-Allow-Headers": "*"
-        }
+        headers={"Cache-Control": "no-cache"}
     )
 
-@app.get("/stream/{audio_filename}")
-async def stream_audio(audio_filename: str):
-    """Streaming endpoint for audio files"""
-    # Validate filename to prevent directory traversal
-    if ".." in audio_filename or "/" in audio_filename or "\\" in audio_filename:
-        raise HTTPException(status_code=400, detail="Invalid filename")
-    
-    audio_path = os.path.join("static", "audio", audio_filename)
+def completed_task_response(task_id: str, stats: dict) -> dict:
+    audio_filename = stats["audio_filename"]
+    # Tasks record the size of what they stored; only older results need a lookup
+    file_size = stats.get("audio_bytes") or storage.size(audio_filename)
+    if file_size is None:
+        return {
+            "status": "processing", 
+            "task_id": task_id, 
+            "message": "Audio file is being written to disk"
+        }
+    return {
+        **stats,
+        "status": "completed",
+        "task_id": task_id,
+        **audio_urls(audio_filename),
+        "audio_filename": audio_filename,
+        "file_size": file_size
+    }
+
+def status_record_response(task_id: str, record: dict) -> dict:
+    """Client view of a status record written by the task itself."""
+    stage = record.get("stage")
+    if stage == "completed":
+        stats = {k: v for k, v in record.items() if k not in ("stage", "updated", "chunks_done", "total")}
+        return completed_task_response(task_id, stats)
+    if stage == "failed":
+        return {"status": "failed", "task_id": task_id, "error": record.get("error") or "Unknown error"}
+    # Still in flight; clients keep polling while the status is "pending"
+    response = {"status": "pending", "task_id": task_id, "stage": stage, "updated": record.get("updated")}
+    if record.get("total"):
+        response["progress"] = {"chunks_done": record.get("chunks_done", 0), "total": record["total"]}
+    if stage == "retrying":
+        response["error"] = record.get("error")
+    return response
+
+@app.get("/task/{task_id}/events")
+async def task_events(task_id: str):
+    """Push a job's progress instead of having clients poll /task/{task_id}.
+
+    Server-sent events: a ``status`` snapshot first, then a ``progress`` event
+    for every stage change and finished chunk (chunk index, total, seconds of
+    audio so far, ETA), and a final ``status`` once the job completes or fails.
+    """
+    store = task_status.get_status_store()
     
-    if not os.path.exists(audio_path):
-        raise HTTPException(status_code=404, detail="Audio file not found")
+    async def events():
+        # Listen before reading the record so no event falls in between
+        async with progress_hub.listen(task_id) as queue:
+            record = store.get(task_id)
+            if not record:
+                yield sse_message({"status": "unknown", "task_id": task_id}, event="status")
+                return
+            yield sse_message(status_record_response(task_id, record), event="status")
+            if record.get("stage") in task_status.FINAL_STAGES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event.get("stage") in task_status.FINAL_STAGES:
+                    yield sse_message(status_record_response(task_id, store.get(task_id)), event="status")
+                    return
+                yield sse_message(event, event="progress")
     
-    return FileResponse(
-        path=audio_path,
-        media_type="audio/wav",
-        filename=audio_filename
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.get("/task/{task_id}")
 async def get_task_status(task_id: str):
-    """Get the status of a TTS task with detailed information"""
+    """Get the status of a TTS task.
+
+    Tasks keep a small status record (stage, chunk i/N, result) up to date, so
+    this is a single key read; the Celery result is only consulted for tasks
+    that have no record.
+    """
     try:
-        result_task = celery_app.AsyncResult(task_id)
+        record = task_status.get_status_store().get(task_id)
+        if record:
+            return status_record_response(task_id, record)
         
-        print(f"Checking task {task_id}: state={result_task.state}, status={result_task.status}")
+        result_task = celery_app.AsyncResult(task_id)
         
-        # Get detailed task info
-        task_info = {
-            "task_id": task_id,
-            "state": result_task.state,
-            "status": result_task.state.lower()
-        }
+        logger.debug(f"Checking task {task_id}: state={result_task.state}, status={result_task.status}")
         
         if result_task.state == 'PENDING':
-            # Check if task actually exists
-            try:
-                inspect = celery_app.control.inspect()
-                active_tasks = inspect.active()
-                
-                # Look for our task in active tasks
-                task_found = False
-                if active_tasks:
-                    for worker, tasks in active_tasks.items():
-                        for task in tasks:
-                            if task.get('id') == task_id:
-                                task_found = True
-                                task_info["worker"] = worker
-                                break
-                
-                if not task_found:
-                    # Check if task is in queue
-                    reserved_tasks = inspect.reserved()
-                    if reserved_tasks:
-                        for worker, tasks in reserved_tasks.items():
-                            for task in tasks:
-                                if task.get('id') == task_id:
-                                    task_found = True
-                                    task_info["worker"] = worker
-                                    task_info["status"] = "queued"
-                                    break
-                
-                if not task_found:
-                    task_info["status"] = "unknown"
-                    task_info["message"] = "Task not found in active or reserved queues"
-                    
-            except Exception as e:
-                print(f"Error inspecting tasks: {e}")
-                task_info["message"] = "Unable to get detailed task status"
-                
-            return task_info
+            # Celery reports unknown ids as PENDING; anything we queued has a status record,
+            # and once that has expired the audio index still knows what the task produced
+            entry = get_audio_index().by_task(task_id)
+            if entry:
+                return completed_task_response(task_id, {"audio_filename": entry["filename"],
+                                                         "audio_bytes": entry["size"]})
+            return {
+                "task_id": task_id,
+                "state": result_task.state,
+                "status": "unknown",
+                "message": "Task not found"
+            }
             
         elif result_task.state == 'FAILURE':
             error_info = str(result_task.info) if result_task.info else "Unknown error"
@@ -246,33 +458,11 @@ async def get_task_status(task_id: str):
             }
             
         elif result_task.state == 'SUCCESS':
-            audio_filename = result_task.result
-            audio_path = os.path.join("static", "audio", audio_filename)
-            
-            if os.path.exists(audio_path):
-                file_size = os.path.getsize(audio_path)
-                return {
-                    "status": "completed",
-                    "task_id": task_id,
-                    "audio_url": f"/static/audio/{audio_filename}",
-                    "download_url": f"/download/{audio_filename}",
-                    "audio_filename": audio_filename,
-                    "file_size": file_size
-                }
-            else:
-                return {
-                    "status": "processing", 
-                    "task_id": task_id, 
-                    "message": "Audio file is being written to disk"
-                }
+            result = result_task.result
+            # Older tasks returned the bare filename; newer ones return a stats dict
+            stats = result if isinstance(result, dict) else {"audio_filename": result}
+            return completed_task_response(task_id, stats)
                 
-        elif result_task.state in ['PROGRESS', 'RETRY']:
-            progress_info = result_task.info if result_task.info else {}
-            return {
-                "status": result_task.state.lower(),
-                "task_id": task_id,
-                "progress": progress_info
-            }
         else:
             return {
                 "status": result_task.state.lower(), 
@@ -281,7 +471,7 @@ async def get_task_status(task_id: str):
             }
             
     except Exception as e:
-        print(f"Error checking task {task_id}: {e}")
+        logger.error(f"Error checking task {task_id}: {e}")
         return {
             "status": "error", 
             "task_id": task_id, 
@@ -294,98 +484,73 @@ async def health_check():
     """Health check for the API and Celery"""
     health_status = {"api": "healthy"}
     
-    try:
-        # Test Celery connection
-        inspect = celery_app.control.inspect()
-        if inspect:
-            stats = inspect.stats()
-            if stats:
-                health_status["celery"] = "healthy"
-                health_status["workers"] = list(stats.keys())
-            else:
-                health_status["celery"] = "no_workers"
-        else:
-            health_status["celery"] = "unreachable"
-    except Exception as e:
-        health_status["celery"] = f"error: {str(e)}"
+    # From the background worker monitor; no broadcast to the workers
+    queue_status = worker_monitor.status()
+    health_status["celery"] = {"available": "healthy"}.get(queue_status, queue_status)
+    workers = worker_monitor.workers()
+    if workers:
+        health_status["workers"] = workers
     
-    # Check audio directory
-    try:
-        audio_dir = os.path.join("static", "audio")
-        if os.path.exists(audio_dir) and os.access(audio_dir, os.W_OK):
-            health_status["storage"] = "healthy"
-        else:
-            health_status["storage"] = "not_writable"
-    except Exception as e:
-        health_status["storage"] = f"error: {str(e)}"
+    # Breaker state only; probing clamd here would cost a round trip per health check
+    if ENABLE_ANTIVIRUS:
+        health_status["antivirus"] = {"closed": "healthy"}.get(clamd.breaker.state, clamd.breaker.state)
+    
+    # Writability was probed once at startup
+    health_status["storage"] = storage_status
+    
+    # Outstanding characters and recent throughput per queue, as used for admission
+    queues = await asyncio.to_thread(admission.backlog_summary)
+    if queues:
+        health_status["queues"] = queues
     
     return health_status
 
-# List available audio files (for debugging)
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics of this API process, plus queue depth per queue"""
+    body, content_type = await asyncio.to_thread(metrics.render)
+    return Response(body, media_type=content_type)
+
+# List available audio files, newest first
 @app.get("/files")
-async def list_files():
-    audio_dir = os.path.join("static", "audio")
-    if not os.path.exists(audio_dir):
-        return {"files": [], "message": "Audio directory does not exist"}
-    
-    files = []
+async def list_files(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    """One page of the audio index; no directory scan or bucket listing per request"""
+    index = get_audio_index()
     try:
-        for filename in os.listdir(audio_dir):
-            filepath = os.path.join(audio_dir, filename)
-            if os.path.isfile(filepath):
-                stat = os.stat(filepath)
-                files.append({
-                    "filename": filename,
-                    "size": stat.st_size,
-                    "created": stat.st_ctime,
-                    "url": f"/static/audio/{filename}",
-                    "download_url": f"/download/{filename}"
-                })
-        
-        # Sort by creation time (newest first)
-        files.sort(key=lambda x: x["created"], reverse=True)
-        
+        entries = await asyncio.to_thread(index.page, offset, limit)
+        total = await asyncio.to_thread(index.count)
+        total_bytes = await asyncio.to_thread(index.total_bytes)
     except Exception as e:
         return {"error": f"Failed to list files: {str(e)}", "files": []}
     
-    return {"files": files, "count": len(files)}
+    files = []
+    for entry in entries:
+        urls = audio_urls(entry["filename"])
+        files.append({
+            "filename": entry["filename"],
+            "size": entry["size"],
+            "created": entry["created"],
+            "url": urls["audio_url"],
+            "download_url": urls["download_url"]
+        })
+    
+    next_offset = offset + len(files) if offset + len(files) < total else None
+    return {"files": files, "count": len(files), "total": total, "total_bytes": total_bytes,
+            "next_offset": next_offset}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the content-addressed audio cache"""
+    return audio_cache.stats()
 
 # Debug endpoint for Celery workers
 @app.get("/workers")
 async def get_worker_info():
-    """Get information about Celery workers"""
-    try:
-        inspect = celery_app.control.inspect()
-        
-        if not inspect:
-            return {"error": "Cannot connect to Celery"}
-        
-        info = {}
-        
-        # Get worker stats
-        stats = inspect.stats()
-        if stats:
-            info["stats"] = stats
-        
-        # Get active tasks
-        active = inspect.active()
-        if active:
-            info["active_tasks"] = active
-        
-        # Get reserved tasks
-        reserved = inspect.reserved()
-        if reserved:
-            info["reserved_tasks"] = reserved
-        
-        # Get registered tasks
-        registered = inspect.registered()
-        if registered:
-            info["registered_tasks"] = registered
-        
-        return info
-        
-    except Exception as e:
-        return {"error": f"Failed to get worker info: {str(e)}"}
+    """Workers seen in the Celery event stream, with their running tasks"""
+    info = {"status": worker_monitor.status(), "workers": worker_monitor.snapshot()}
+    if worker_monitor.broker_error:
+        info["error"] = worker_monitor.broker_error
+    return info
 
 # Test endpoint for quick TTS test
 @app.post("/test-tts")
@@ -393,7 +558,8 @@ async def test_tts():
     """Test TTS with a short text"""
     try:
         test_text = "Hello, this is a test of the text to speech system. If you can hear this, everything is working correctly."
-        result_task = tasks.convert_text_to_audio.delay(test_text)
+        # Smoke tests go to the health queue instead of waiting behind real books
+        result_task = tasks.convert_text_to_audio.apply_async((test_text,), queue=HEALTH_QUEUE, priority=0)
         
         return {
             "message": "Test TTS task queued",
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Port the Celery workers and the model server serve their metrics on (0 disables); the API uses /metrics
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9100))
+# Stages run from milliseconds (a cache lookup) to hours (queue wait behind long books)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+STAGE_SECONDS = Histogram(
+    "orator_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=STAGE_BUCKETS,
+)
+CHUNK_CHARS_PER_SECOND = Histogram(
+    "orator_chunk_chars_per_second", "Characters synthesized per second of model time, per chunk",
+    buckets=(5, 10, 20, 40, 80, 160, 320, 640, 1280, 2560),
+)
+CHUNK_REALTIME_FACTOR = Histogram(
+    "orator_chunk_realtime_factor", "Synthesis time over audio duration, per chunk (below 1 beats real time)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 4, 8),
+)
+CACHE_LOOKUPS = Counter("orator_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+UPLOADS = Counter("orator_uploads_total", "Uploads by outcome", ["outcome"])
+MODEL_LOAD_SECONDS = Gauge("orator_model_load_seconds", "How long this process took to get the TTS model ready")
+
+
+@contextmanager
+def timed(stage: str):
+    """Observe the time spent in the block under ``stage``, whether or not it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def observe_chunk(chars: int, synthesis_seconds: float, audio_seconds: float) -> None:
+    """Record one chunk the model synthesized (cache hits take no model time)."""
+    STAGE_SECONDS.labels("chunk_synthesis").observe(synthesis_seconds)
+    if synthesis_seconds > 0:
+        CHUNK_CHARS_PER_SECOND.observe(chars / synthesis_seconds)
+    if audio_seconds > 0:
+        CHUNK_REALTIME_FACTOR.observe(synthesis_seconds / audio_seconds)
+
+
+class QueueCollector:
+    """Backlog per queue, read from the admission tracker when scraped.
+
+    Registered by the API only, so one scrape costs a single backlog read
+    rather than one per worker.
+    """
+
+    def collect(self):
+        import admission
+
+        jobs = GaugeMetricFamily("orator_queue_jobs", "Jobs not yet synthesized", labels=["queue"])
+        chars = GaugeMetricFamily("orator_queue_chars", "Characters not yet synthesized", labels=["queue"])
+        rate = GaugeMetricFamily("orator_queue_chars_per_second", "Recent synthesis throughput",
+                                 labels=["queue"])
+        for queue, load in admission.backlog_summary().items():
+            jobs.add_metric([queue], load["jobs"])
+            chars.add_metric([queue], load["chars"])
+            rate.add_metric([queue], load["chars_per_second"])
+        return [jobs, chars, rate]
+
+
+_queue_collector = None
+
+
+def register_queue_collector() -> None:
+    """Export queue depth from this process (the API); importing the app twice registers it once."""
+    global _queue_collector
+    if _queue_collector is None:
+        _queue_collector = QueueCollector()
+        REGISTRY.register(_queue_collector)
+
+
+def _registry():
+    """The default registry, or one merging all processes' files in multiprocess mode."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render() -> tuple[bytes, str]:
+    """Current metrics and their content type, for a /metrics response."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_exporter(port: int | None = None) -> bool:
+    """Serve this process's metrics over HTTP on ``port`` in a background thread.
+
+    Thread-pool workers run every task in the process that serves them; with
+    prefork, set PROMETHEUS_MULTIPROC_DIR so the children's metrics are
+    merged in.
+    """
+    port = WORKER_METRICS_PORT if port is None else port
+    if not port:
+        return False
+    try:
+        start_http_server(port, registry=_registry())
+    except OSError as e:
+        logger.warning(f"Could not serve metrics on port {port}: {e}")
+        return False
+    logger.info(f"Serving metrics on port {port}")
+    return True
@@ -0,0 +1,218 @@
+"""Long-lived synthesis server keeping the TTS model resident.
+
+Celery recycles worker children (``worker_max_tasks_per_child``,
+``worker_max_memory_per_child``) and every fresh child used to pay the full
+torch import and Tacotron2 + vocoder load before its first chunk. Run this
+once per host instead; tasks talk to it over a Unix socket through
+:class:`ModelClient`, which stands in for the model's ``tts_to_file``.
+
+    python model_server.py --socket /run/orator/tts.sock
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import time
+
+from batching import TTS_MAX_BATCH_SIZE, BatchingSynthesizer
+from logs import configure_logging
+from metrics import start_exporter
+
+logger = logging.getLogger(__name__)
+
+# Unix socket of the synthesis server; empty makes each worker load the model itself
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")
+# Seconds a client waits for one chunk, including time queued behind other chunks
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", 900))
+# How long a booting worker waits for the server to finish loading the model
+MODEL_SERVER_WAIT_SECONDS = float(os.getenv("MODEL_SERVER_WAIT_SECONDS", 300))
+
+# Every message is a length-prefixed JSON header, optionally followed by audio bytes
+_LENGTH = struct.Struct("!I")
+
+
+class ModelServerUnavailable(ConnectionError):
+    """The server could not be reached; the task should retry, not skip the chunk."""
+
+
+class ModelServerError(Exception):
+    """The server failed for a reason other than the model rejecting the text."""
+
+
+def _send(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    data = json.dumps(header).encode()
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        part = sock.recv(min(size - len(buf), 1 << 20))
+        if not part:
+            raise ConnectionError("Connection closed mid-message")
+        buf += part
+    return bytes(buf)
+
+
+def _recv(sock: socket.socket) -> dict:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = _recv(self.request)
+        except (ConnectionError, ValueError):
+            return
+        if request.get("op") == "ping":
+            model = self.server.model
+            _send(self.request, {"ok": True, "load_seconds": self.server.load_seconds,
+                                 "served": model.chunks, "batches": model.batches})
+            return
+        try:
+            audio = self.server.synthesize(request["text"])
+        except Exception as e:
+            _send(self.request, {"ok": False, "error": str(e), "error_type": type(e).__name__})
+            return
+        _send(self.request, {"ok": True, "size": len(audio)}, audio)
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve ``tts_to_file`` for one resident model, one request per connection.
+
+    Connections are handled on threads; the model itself is only ever called
+    from the batcher's thread, which groups concurrent requests from every
+    worker into batches of up to ``max_batch_size``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model, load_seconds: float = 0.0,
+                 max_batch_size: int = TTS_MAX_BATCH_SIZE):
+        # A stale socket from a previous run would make bind fail
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.model = BatchingSynthesizer(model, max_batch_size)
+        self.load_seconds = load_seconds
+
+    def synthesize(self, text: str) -> bytes:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.model.tts_to_file(text=text, file_path=path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def load_and_serve(socket_path: str, load_model) -> ModelServer:
+    """Load the model, then bind; clients see the socket only once the model is ready."""
+    start = time.perf_counter()
+    model = load_model()
+    load_seconds = time.perf_counter() - start
+    logger.info(f"Model loaded in {load_seconds:.2f}s, serving on {socket_path}")
+    return ModelServer(socket_path, model, load_seconds)
+
+
+class ModelClient:
+    """Thin client with the model's ``tts_to_file`` interface.
+
+    The model rejecting a text surfaces as ``RuntimeError``, exactly as an
+    in-process model would, so chunk skipping is unchanged; an unreachable
+    server raises :class:`ModelServerUnavailable` so the task retries.
+    """
+
+    def __init__(self, socket_path: str = MODEL_SERVER_SOCKET, timeout: float = MODEL_SERVER_TIMEOUT,
+                 max_batch_size: int = TTS_MAX_BATCH_SIZE):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        # The server batches concurrent requests, so callers may keep this many in flight
+        self.max_batch_size = max_batch_size
+
+    def _call(self, request: dict, timeout: float | None = None) -> tuple[dict, bytes]:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        try:
+            sock.connect(self.socket_path)
+            _send(sock, request)
+            header = _recv(sock)
+            payload = _recv_exactly(sock, header["size"]) if header.get("size") else b""
+            return header, payload
+        except OSError as e:
+            # Refused, missing socket, reset mid-reply and timeouts alike
+            raise ModelServerUnavailable(f"Model server at {self.socket_path}: {e}") from e
+        finally:
+            sock.close()
+
+    def ping(self, timeout: float = 5) -> dict:
+        header, _ = self._call({"op": "ping"}, timeout)
+        return header
+
+    def tts_to_file(self, text: str, file_path) -> None:
+        header, audio = self._call({"op": "synthesize", "text": text})
+        if not header.get("ok"):
+            error = RuntimeError if header.get("error_type") == "RuntimeError" else ModelServerError
+            raise error(header.get("error") or "Synthesis failed")
+        with open(file_path, "wb") as f:
+            f.write(audio)
+
+
+def wait_for_server(client: ModelClient, timeout: float = MODEL_SERVER_WAIT_SECONDS,
+                    interval: float = 0.5) -> dict:
+    """Block until the server answers a ping; it only binds once its model is loaded."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.ping()
+        except ModelServerUnavailable:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TTS synthesis over a Unix socket.")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET or "/tmp/orator-tts.sock")
+    parser.add_argument("--ping", action="store_true", help="exit 0 if a server is answering (healthcheck)")
+    args = parser.parse_args()
+
+    if args.ping:
+        try:
+            print(json.dumps(ModelClient(args.socket).ping()))
+        except ModelServerUnavailable as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        return
+
+    configure_logging()
+    from tasks import load_tts_model
+
+    # Model load time and whatever else this process records, on WORKER_METRICS_PORT
+    start_exporter()
+
+    server = load_and_serve(args.socket, load_tts_model)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterable
+
+# Clean up extracted text before chunking; synthesis time is proportional to what's left
+TEXT_NORMALIZE = os.getenv("TEXT_NORMALIZE", "true").lower() == "true"
+# Lines at the top and bottom of each PDF page that may be running headers, footers or page numbers
+EDGE_LINES = 3
+# A header/footer repeats on at least this many pages, and this share of them
+REPEAT_MIN_PAGES = 3
+REPEAT_MIN_FRACTION = 0.3
+
+_DIGITS = re.compile(r"\d+")
+_ROMAN = r"(?=[mdclxvi])m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})"
+# Bare page numbers, as seen by _line_key: "12", "page 3 of 40", "- 7 -", "(ix)". Roman
+# numerals need a page prefix, dashes or brackets; alone they are words as often ("mix", "I")
+_PAGE_NUMBER = re.compile(
+    r"(?:page\s*)?#(?:\s*(?:of|/)\s*#)?"
+    r"|[-–—(\[\s]*#[-–—)\]\s]*"
+    rf"|page\s+{_ROMAN}|[-–—]\s*{_ROMAN}\s*[-–—]|\(\s*{_ROMAN}\s*\)|\[\s*{_ROMAN}\s*\]"
+)
+# A bare roman numeral is a page number only if pages keep ending (or starting) with one
+_BARE_ROMAN = re.compile(_ROMAN)
+_ROMAN_KEY = "<roman>"
+_HYPHEN_BREAK = re.compile(r"(\w)-\n\s*([a-z])")
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+_ABBREVIATIONS = [
+    (re.compile(rf"\b{abbr}\.(?=\s|$)"), spoken) for abbr, spoken in [
+        ("Mr", "Mister"), ("Mrs", "Missus"), ("Ms", "Miz"), ("Dr", "Doctor"), ("Prof", "Professor"),
+        ("St", "Saint"), ("Mt", "Mount"), ("Jr", "Junior"), ("Sr", "Senior"), ("Capt", "Captain"),
+        ("Col", "Colonel"), ("Gen", "General"), ("Lt", "Lieutenant"), ("Sgt", "Sergeant"),
+        ("Rev", "Reverend"), ("vs", "versus"), ("approx", "approximately"), ("Fig", "figure"),
+    ]
+] + [
+    (re.compile(r"\bNo\.(?=\s*\d)"), "number"),
+    (re.compile(r"\be\.g\.(?=[\s,]|$)"), "for example"),
+    (re.compile(r"\bi\.e\.(?=[\s,]|$)"), "that is"),
+    # Keep the full stop when "etc." also ends the sentence
+    (re.compile(r"\betc\.(?=\s+[A-Z]|\s*$)"), "et cetera."),
+    (re.compile(r"\betc\."), "et cetera"),
+]
+
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+         "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_SCALES = [(10 ** 12, "trillion"), (10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")]
+_ORDINALS = {"one": "first", "two": "second", "three": "third", "five": "fifth", "eight": "eighth",
+             "nine": "ninth", "twelve": "twelfth"}
+
+_CURRENCY = re.compile(r"\$(\d[\d,]*)(?:\.(\d\d))?\b")
+_PERCENT = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s?%")
+_ORDINAL = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b")
+_DECIMAL = re.compile(r"\b(\d[\d,]*)\.(\d+)\b")
+_NUMBER = re.compile(r"\b\d{1,3}(?:,\d{3})+\b|\b\d+\b")
+# Four-digit numbers are read as years only in year-like context: "in 1905", "May 4, 1905",
+# "1914-1918", "1066 AD"; otherwise "1234 items" stays one thousand two hundred thirty-four
+_YEAR_BEFORE = re.compile(
+    r"(?:\b(?:in|since|by|from|until|till|before|after|during|circa|c\.|ad|year|early|mid|late|"
+    r"spring|summer|autumn|fall|winter|january|february|march|april|may|june|july|august|"
+    r"september|october|november|december)|\d{1,2},|\d{4}\s*[-–—])[\s-]*$",
+    re.IGNORECASE,
+)
+_YEAR_AFTER = re.compile(r"\s*(?:[-–—]\s*\d{2,4}\b|(?:BC|AD|BCE|CE)\b)")
+
+
+def number_words(n: int) -> str:
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _TENS[tens] + (f"-{_ONES[ones]}" if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return f"{_ONES[hundreds]} hundred" + (f" {number_words(rest)}" if rest else "")
+    if n >= 1000 * _SCALES[0][0]:
+        return " ".join(_ONES[int(d)] for d in str(n))
+    for scale, name in _SCALES:
+        if n >= scale:
+            high, rest = divmod(n, scale)
+            return f"{number_words(high)} {name}" + (f" {number_words(rest)}" if rest else "")
+
+
+def year_words(n: int) -> str:
+    """Read 1100-1999 and 2010-2099 the way years are spoken ("nineteen oh five")."""
+    if not (1100 <= n <= 2099) or 2000 <= n <= 2009:
+        return number_words(n)
+    high, low = divmod(n, 100)
+    if low == 0:
+        return f"{number_words(high)} hundred"
+    return f"{number_words(high)} {'oh ' if low < 10 else ''}{number_words(low)}"
+
+
+def ordinal_words(n: int) -> str:
+    words = number_words(n)
+    head, last = re.match(r"(.*?)([a-z]+)$", words).groups()
+    if last in _ORDINALS:
+        return head + _ORDINALS[last]
+    return head + (last[:-1] + "ieth" if last.endswith("y") else last + "th")
+
+
+def _digits(s: str) -> str:
+    return " ".join(_ONES[int(d)] for d in s)
+
+
+def _dollars(match: re.Match) -> str:
+    dollars = int(match.group(1).replace(",", ""))
+    spoken = f"{number_words(dollars)} dollar{'' if dollars == 1 else 's'}"
+    cents = int(match.group(2) or 0)
+    if cents:
+        spoken += f" and {number_words(cents)} cent{'' if cents == 1 else 's'}"
+    return spoken
+
+
+def _number(match: re.Match) -> str:
+    digits = match.group(0)
+    if "," in digits:
+        return number_words(int(digits.replace(",", "")))
+    if len(digits) > 1 and digits.startswith("0"):
+        return _digits(digits)
+    if len(digits) == 4 and _is_year(match):
+        return year_words(int(digits))
+    return number_words(int(digits))
+
+
+def _is_year(match: re.Match) -> bool:
+    before = match.string[max(0, match.start() - 24):match.start()]
+    return bool(_YEAR_BEFORE.search(before) or _YEAR_AFTER.match(match.string, match.end()))
+
+
+def expand(text: str) -> str:
+    """Spell out abbreviations and numbers, so sentences split where they are spoken to."""
+    for pattern, spoken in _ABBREVIATIONS:
+        text = pattern.sub(spoken, text)
+    text = _CURRENCY.sub(_dollars, text)
+    text = _PERCENT.sub(lambda m: f"{m.group(1)} percent", text)
+    text = _ORDINAL.sub(lambda m: ordinal_words(int(m.group(1))), text)
+    text = _DECIMAL.sub(lambda m: f"{number_words(int(m.group(1).replace(',', '')))} point {_digits(m.group(2))}", text)
+    return _NUMBER.sub(_number, text)
+
+
+def _edge_indices(lines: list[str]) -> list[int]:
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+
+def _line_key(line: str) -> str:
+    key = _DIGITS.sub("#", " ".join(line.split()).lower())
+    return _ROMAN_KEY if _BARE_ROMAN.fullmatch(key) else key
+
+
+def strip_page_furniture(pages: list[str]) -> tuple[list[str], int]:
+    """Drop running headers, footers and page numbers; returns (pages, lines removed).
+
+    Only the first and last few lines of each page are considered. A line
+    counts as furniture if it is a bare page number, or if it recurs (digits
+    ignored, so "Chapter 3 · 41" matches "Chapter 3 · 42"; bare roman
+    numerals all alike) at the edge of enough pages.
+    """
+    split = [page.splitlines() for page in pages]
+    seen = Counter()
+    for lines in split:
+        seen.update({_line_key(lines[i]) for i in _edge_indices(lines)})
+    threshold = max(REPEAT_MIN_PAGES, REPEAT_MIN_FRACTION * len(pages))
+    repeated = {key for key, count in seen.items() if count >= threshold}
+
+    removed = 0
+    cleaned = []
+    for lines in split:
+        drop = {i for i in _edge_indices(lines)
+                if _line_key(lines[i]) in repeated or _PAGE_NUMBER.fullmatch(_line_key(lines[i]))}
+        removed += len(drop)
+        cleaned.append("\n".join(line for i, line in enumerate(lines) if i not in drop))
+    return cleaned, removed
+
+
+def normalize_pages(pages: Iterable[str], paginated: bool = True) -> tuple[str, dict]:
+    """Extracted pages (or chapters) to the text that gets synthesized, with stats.
+
+    Removes page furniture (``paginated`` documents only), re-joins words
+    hyphenated across line breaks, collapses whitespace, and expands numbers
+    and abbreviations. ``chars_removed`` counts what cleanup dropped before
+    expansion, which lengthens the text a little.
+    """
+    pages = [unicodedata.normalize("NFKC", page) for page in pages if page]
+    chars_in = sum(len(page) + 1 for page in pages)
+    lines_removed = 0
+    if paginated:
+        pages, lines_removed = strip_page_furniture(pages)
+    # Soft hyphens only mark where a word may break
+    text = "\n".join(pages).replace("\u00ad\n", "").replace("\u00ad", "")
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", "\n".join(line.strip() for line in text.splitlines())).strip()
+    chars_removed = chars_in - len(text)
+    text = expand(text)
+    return text, {
+        "chars_in": chars_in,
+        "chars_removed": chars_removed,
+        "chars_out": len(text),
+        "lines_removed": lines_removed,
+    }
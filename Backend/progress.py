@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from task_status import CHANNEL_PREFIX, MemoryStatusStore, RedisStatusStore, get_status_store
+
+logger = logging.getLogger(__name__)
+
+# Comment line sent on idle event streams so proxies don't time them out
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
+# Events buffered per listener before the oldest are dropped (slow client)
+LISTENER_QUEUE_SIZE = 256
+
+
+class ProgressHub:
+    """Fan task progress events out to the API's open event streams.
+
+    The API holds one pattern subscription to every task's channel and routes
+    each event to the listeners of that task, so a thousand open streams cost
+    one Redis connection rather than a thousand.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._listeners: dict[str, set[asyncio.Queue]] = {}
+        self._loop = None
+        self._reader = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.store is None:
+            self.store = get_status_store()
+        if isinstance(self.store, MemoryStatusStore):
+            # Tasks run in this process (eager mode); events arrive from whatever thread ran them
+            self.store.add_listener(self._dispatch_threadsafe)
+        elif isinstance(self.store, RedisStatusStore):
+            self._reader = asyncio.create_task(self._read_redis())
+
+    async def stop(self) -> None:
+        if isinstance(self.store, MemoryStatusStore):
+            self.store.remove_listener(self._dispatch_threadsafe)
+            # Pick up the current store (tests swap it) on the next start
+            self.store = None
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+    async def _read_redis(self) -> None:
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.store.url, decode_responses=True)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        task_id = message["channel"][len(CHANNEL_PREFIX):]
+                        self._dispatch(task_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress subscription lost: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+    def _dispatch(self, task_id: str, event: dict) -> None:
+        for queue in self._listeners.get(task_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _dispatch_threadsafe(self, task_id: str, event: dict) -> None:
+        if self._loop is not None and task_id in self._listeners:
+            self._loop.call_soon_threadsafe(self._dispatch, task_id, event)
+
+    @asynccontextmanager
+    async def listen(self, task_id: str):
+        """Queue receiving ``task_id``'s events for as long as the context is open."""
+        queue: asyncio.Queue = asyncio.Queue(LISTENER_QUEUE_SIZE)
+        self._listeners.setdefault(task_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            listeners = self._listeners.get(task_id)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    del self._listeners[task_id]
+
+
+def sse_message(data: dict, event: str | None = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
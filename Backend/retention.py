@@ -0,0 +1,143 @@
+import logging
+import os
+import shutil
+import time
+
+from segments import JOBS_DIR_NAME, LIVE_RETENTION_SECONDS, read_manifest
+
+logger = logging.getLogger(__name__)
+
+# Finished audio nobody has downloaded for this long is deleted (0 keeps files forever)
+AUDIO_TTL_SECONDS = int(os.getenv("AUDIO_TTL_SECONDS", 7 * 24 * 3600))
+# Cap on the total size of finished audio; least recently used files go first (0 disables)
+AUDIO_QUOTA_BYTES = int(os.getenv("AUDIO_QUOTA_BYTES", 20 * 1024 * 1024 * 1024))
+# How often celery beat runs the retention sweep
+AUDIO_GC_INTERVAL = int(os.getenv("AUDIO_GC_INTERVAL", 600))
+# How often the index is rebuilt from a full listing of storage (and once when beat starts)
+AUDIO_RECONCILE_INTERVAL = int(os.getenv("AUDIO_RECONCILE_INTERVAL", 24 * 3600))
+# Unfinished job directories and partial outputs untouched this long belong to a dead task
+# (well past task_time_limit, since a running job only touches them as chunks finish)
+ORPHAN_JOB_SECONDS = int(os.getenv("ORPHAN_JOB_SECONDS", 3600))
+# Files deleted per index query
+GC_BATCH_SIZE = 500
+
+
+def _delete(storage, index, name: str) -> int:
+    """Delete one file and its index entry; returns the bytes freed."""
+    try:
+        storage.delete(name)
+    except OSError as e:
+        # Keep the entry so the next sweep tries again
+        logger.warning(f"Could not delete {name}: {e}")
+        return -1
+    entry = index.remove(name)
+    return entry.get("size", 0) if entry else 0
+
+
+def expire(storage, index, ttl: float | None = None, now: float | None = None) -> tuple[int, int]:
+    """Delete files not accessed in ``ttl`` seconds; returns (files, bytes) removed."""
+    ttl = AUDIO_TTL_SECONDS if ttl is None else ttl
+    if ttl <= 0:
+        return 0, 0
+    cutoff = (time.time() if now is None else now) - ttl
+    removed = freed = 0
+    while names := index.least_recent(GC_BATCH_SIZE, accessed_before=cutoff):
+        results = [_delete(storage, index, name) for name in names]
+        removed += sum(size >= 0 for size in results)
+        freed += sum(size for size in results if size > 0)
+        if all(size < 0 for size in results):
+            break
+    return removed, freed
+
+
+def enforce_quota(storage, index, quota: int | None = None) -> tuple[int, int]:
+    """Delete least recently used files until the total fits in ``quota``; returns (files, bytes)."""
+    quota = AUDIO_QUOTA_BYTES if quota is None else quota
+    if quota <= 0:
+        return 0, 0
+    removed = freed = 0
+    failed: set[str] = set()
+    while index.total_bytes() > quota:
+        names = [n for n in index.least_recent(GC_BATCH_SIZE + len(failed)) if n not in failed]
+        if not names:
+            break
+        for name in names:
+            if index.total_bytes() <= quota:
+                break
+            size = _delete(storage, index, name)
+            if size < 0:
+                failed.add(name)
+                continue
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+def remove_orphaned_jobs(audio_dir: str, older_than: float | None = None, now: float | None = None) -> int:
+    """Remove per-job scratch directories whose task finished or died.
+
+    Finished and failed jobs go once late live listeners are done with them
+    (``LIVE_RETENTION_SECONDS``); unfinished ones once nothing has been
+    written to them for ``older_than`` seconds, which only happens when the
+    worker running them crashed or was killed.
+    """
+    jobs_root = os.path.join(audio_dir, JOBS_DIR_NAME)
+    try:
+        names = os.listdir(jobs_root)
+    except OSError:
+        return 0
+    older_than = ORPHAN_JOB_SECONDS if older_than is None else older_than
+    now = time.time() if now is None else now
+    removed = 0
+    for name in names:
+        job_dir = os.path.join(jobs_root, name)
+        manifest = read_manifest(job_dir)
+        try:
+            # Publishing a chunk renames it into the directory, which bumps its mtime
+            last_write = max(manifest.get("updated", 0), os.path.getmtime(job_dir))
+        except OSError:
+            continue
+        finished = manifest.get("done") or manifest.get("failed")
+        if now - last_write > (LIVE_RETENTION_SECONDS if finished else older_than):
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def reconcile(storage, index) -> tuple[int, int]:
+    """Make the index match storage; returns (files indexed, stale entries dropped).
+
+    Picks up files written before the index existed or while Redis was
+    unreachable, and forgets files deleted behind its back. The index is read
+    before storage is listed, so a file finished mid-sweep is never mistaken
+    for a stale entry. Listing costs a request per page of files on S3, so
+    this runs on its own slow schedule rather than with every sweep.
+    """
+    indexed = index.names()
+    stored = {info["filename"]: info for info in storage.list()}
+    added = sum(index.add(name, info["size"], created=info["created"])
+                for name, info in stored.items() if name not in indexed)
+    stale = [name for name in indexed if name not in stored]
+    for name in stale:
+        index.remove(name)
+    return added, len(stale)
+
+
+def collect(storage, index, audio_dir: str, ttl: float | None = None, quota: int | None = None,
+            orphan_age: float | None = None, now: float | None = None) -> dict:
+    """One retention sweep: apply the TTL and the quota to the index and clear scratch space.
+
+    Only the index is read; storage is never listed (see ``reconcile``).
+    """
+    orphan_age = ORPHAN_JOB_SECONDS if orphan_age is None else orphan_age
+    expired, expired_bytes = expire(storage, index, ttl, now)
+    evicted, evicted_bytes = enforce_quota(storage, index, quota)
+    return {
+        "expired": expired,
+        "evicted": evicted,
+        "bytes_freed": expired_bytes + evicted_bytes,
+        "orphaned_jobs": remove_orphaned_jobs(audio_dir, orphan_age, now),
+        "partial_uploads": storage.clean_partials(orphan_age),
+        "files": index.count(),
+        "total_bytes": index.total_bytes(),
+    }
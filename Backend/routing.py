@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+from celery_config import LARGE_QUEUE, SMALL_QUEUE
+from task_status import STATUS_REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# Books with more extracted text than this (~100 pages) run on the large queue
+LARGE_JOB_CHARS = int(os.getenv("LARGE_JOB_CHARS", 200_000))
+# Every this many characters a job drops one priority level behind shorter ones
+PRIORITY_CHARS_STEP = int(os.getenv("PRIORITY_CHARS_STEP", 20_000))
+# Submissions a tenant can make within TENANT_WINDOW_SECONDS before its jobs yield to other tenants'
+TENANT_BURST = int(os.getenv("TENANT_BURST", 2))
+TENANT_WINDOW_SECONDS = int(os.getenv("TENANT_WINDOW_SECONDS", 600))
+# Priorities run 0 (first) to 9 on the Redis broker; size and tenant load each use part of the range
+MAX_PRIORITY = 9
+MAX_SIZE_PENALTY = 5
+MAX_TENANT_PENALTY = 4
+KEY_PREFIX = "orator:tenant:"
+
+
+def queue_for_chars(chars: int) -> str:
+    """Queue for a book with ``chars`` characters of extracted text."""
+    return LARGE_QUEUE if chars > LARGE_JOB_CHARS else SMALL_QUEUE
+
+
+def priority_for(chars: int, recent_jobs: int = 0) -> int:
+    """Broker priority for a job: shorter books first, then tenants that submitted less lately.
+
+    ``recent_jobs`` counts the tenant's submissions in the current window,
+    this one included; the first TENANT_BURST of them aren't penalized.
+    """
+    size_penalty = min(MAX_SIZE_PENALTY, chars // PRIORITY_CHARS_STEP)
+    tenant_penalty = min(MAX_TENANT_PENALTY, max(0, recent_jobs - TENANT_BURST))
+    return min(MAX_PRIORITY, size_penalty + tenant_penalty)
+
+
+class RedisTenantTracker:
+    """Sliding-window submission counts per tenant: one sorted set of timestamps each."""
+
+    def __init__(self, url: str, window: int = TENANT_WINDOW_SECONDS):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.window = window
+
+    def record(self, tenant: str, now: float | None = None) -> int:
+        """Count a submission and return the tenant's submissions in the window."""
+        now = time.time() if now is None else now
+        key = KEY_PREFIX + tenant
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+        pipe.zremrangebyscore(key, "-inf", now - self.window)
+        pipe.zcard(key)
+        pipe.expire(key, self.window)
+        return pipe.execute()[2]
+
+    def recent(self, tenant: str, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        return self.client.zcount(KEY_PREFIX + tenant, now - self.window, "+inf")
+
+
+class MemoryTenantTracker:
+    """Process-local stand-in for tests and eager mode."""
+
+    def __init__(self, window: int = TENANT_WINDOW_SECONDS):
+        self.window = window
+        self._submissions: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tenant: str, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            times = [t for t in self._submissions.get(tenant, []) if t > now - self.window]
+            times.append(now)
+            self._submissions[tenant] = times
+            return len(times)
+
+    def recent(self, tenant: str, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            return sum(t > now - self.window for t in self._submissions.get(tenant, []))
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tenant_tracker():
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = RedisTenantTracker(STATUS_REDIS_URL) if STATUS_REDIS_URL else MemoryTenantTracker()
+        return _tracker
+
+
+def tenant_load(tenant: str | None, record: bool = False) -> int:
+    """A tenant's recent submissions, counting this one if ``record``; 0 if unknown or unreachable."""
+    if not tenant:
+        return 0
+    try:
+        tracker = get_tenant_tracker()
+        return tracker.record(tenant) if record else tracker.recent(tenant)
+    except Exception as e:
+        logger.warning(f"Could not read submissions of tenant {tenant}: {e}")
+        return 0
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+import wave
+
+# Finished job directories stay around this long so late listeners can finish streaming
+LIVE_RETENTION_SECONDS = int(os.getenv("LIVE_RETENTION_SECONDS", 900))
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", 0.25))
+# Give up on a live stream if no new chunk shows up for this long (task_soft_time_limit)
+LIVE_IDLE_TIMEOUT = float(os.getenv("LIVE_IDLE_TIMEOUT", 1800))
+# Give up sooner on a job that hasn't started synthesizing yet; the client reconnects later
+LIVE_START_TIMEOUT = float(os.getenv("LIVE_START_TIMEOUT", 60))
+
+# Per-job scratch space on the shared audio volume. Chunk files are renamed into
+# place only once complete, so their presence doubles as the "published" signal.
+JOBS_DIR_NAME = ".jobs"
+MANIFEST_NAME = "manifest.json"
+
+
+def job_dir_for(audio_dir: str, job_id: str) -> str:
+    return os.path.abspath(os.path.join(audio_dir, JOBS_DIR_NAME, job_id))
+
+
+def chunk_path(job_dir: str, index: int) -> str:
+    return os.path.join(job_dir, f"chunk_{index:05d}.wav")
+
+
+def skip_path(job_dir: str, index: int) -> str:
+    return os.path.join(job_dir, f"chunk_{index:05d}.skip")
+
+
+def mark_skipped(job_dir: str, index: int) -> None:
+    """Tell live listeners not to wait for a chunk the model rejected."""
+    with open(skip_path(job_dir, index), "w"):
+        pass
+
+
+def read_manifest(job_dir: str) -> dict:
+    try:
+        with open(os.path.join(job_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def job_started(job_dir: str) -> bool:
+    """Whether a worker has written the job's manifest (it may have finished since)."""
+    return os.path.exists(os.path.join(job_dir, MANIFEST_NAME))
+
+
+def write_manifest(job_dir: str, **fields) -> None:
+    """Merge ``fields`` into the job manifest (total chunk count, done, failed)."""
+    os.makedirs(job_dir, exist_ok=True)
+    manifest = read_manifest(job_dir)
+    manifest.update(fields, updated=time.time())
+    path = os.path.join(job_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def chunk_id(text: str) -> str:
+    """Content-derived id of a chunk; a checkpoint is only reused for the same text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def start_job(job_dir: str, chunks: list[str]) -> int:
+    """Write the manifest for a new or resumed job; returns the chunks already checkpointed.
+
+    Chunk files (and skip markers) left by an earlier attempt of the same job
+    are kept when the chunk at that position has the same id, so a retry or
+    redelivery only synthesizes what is missing. Anything else, including
+    half-written files of a killed attempt, is removed so stale audio never
+    ends up in the book.
+    """
+    ids = [chunk_id(text) for text in chunks]
+    previous = read_manifest(job_dir).get("chunk_ids") or []
+    resumed = 0
+    try:
+        names = os.listdir(job_dir)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.startswith("chunk_"):
+            continue
+        index = int(name[6:11])
+        complete = name.endswith((".wav", ".skip")) and name.count(".") == 1
+        if complete and index < min(len(ids), len(previous)) and previous[index] == ids[index]:
+            resumed += name.endswith(".wav")
+            continue
+        os.remove(os.path.join(job_dir, name))
+    write_manifest(job_dir, total=len(chunks), chunk_ids=ids, done=False, failed=None)
+    return resumed
+
+
+def prune_finished_jobs(audio_dir: str, older_than: float = LIVE_RETENTION_SECONDS) -> int:
+    """Remove job directories that finished more than ``older_than`` seconds ago."""
+    jobs_root = os.path.join(audio_dir, JOBS_DIR_NAME)
+    try:
+        names = os.listdir(jobs_root)
+    except OSError:
+        return 0
+    removed = 0
+    cutoff = time.time() - older_than
+    for name in names:
+        job_dir = os.path.join(jobs_root, name)
+        manifest = read_manifest(job_dir)
+        if manifest.get("done") and manifest.get("updated", 0) < cutoff:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def streaming_wav_header(channels: int, sampwidth: int, framerate: int) -> bytes:
+    """WAV header for a stream of unknown length (sizes set to the 32-bit maximum)."""
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, framerate,
+                                framerate * channels * sampwidth, channels * sampwidth, sampwidth * 8)
+        + b"data" + struct.pack("<I", unknown)
+    )
+
+
+def _read_wav(path: str) -> tuple[tuple[int, int, int], bytes]:
+    with wave.open(path, "rb") as f:
+        return (f.getnchannels(), f.getsampwidth(), f.getframerate()), f.readframes(f.getnframes())
+
+
+async def iter_live_wav(job_dir: str, poll_interval: float | None = None,
+                        idle_timeout: float | None = None, start_timeout: float | None = None):
+    """Yield one continuous WAV stream from a job's chunks as they are published.
+
+    Emits the header with the first chunk, then each chunk's PCM frames in
+    text order, waiting for chunks that aren't synthesized yet. Stops once the
+    manifest says every chunk is accounted for, the job failed, or nothing new
+    appeared for ``idle_timeout`` seconds (``start_timeout`` while there is
+    no manifest yet).
+    """
+    poll_interval = LIVE_POLL_INTERVAL if poll_interval is None else poll_interval
+    idle_timeout = LIVE_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+    start_timeout = LIVE_START_TIMEOUT if start_timeout is None else start_timeout
+    index = 0
+    idle = 0.0
+    header_sent = False
+    while True:
+        path = chunk_path(job_dir, index)
+        if os.path.exists(path):
+            params, frames = await asyncio.to_thread(_read_wav, path)
+            if not header_sent:
+                yield streaming_wav_header(*params)
+                header_sent = True
+            yield frames
+            index += 1
+            idle = 0.0
+            continue
+        if os.path.exists(skip_path(job_dir, index)):
+            index += 1
+            continue
+
+        manifest = read_manifest(job_dir)
+        total = manifest.get("total")
+        if manifest.get("failed") or (total is not None and index >= total):
+            return
+        if idle >= (idle_timeout if manifest else start_timeout):
+            return
+        await asyncio.sleep(poll_interval)
+        idle += poll_interval
@@ -0,0 +1,275 @@
+import logging
+import os
+import time
+import uuid
+
+from encoders import media_type_for
+
+logger = logging.getLogger(__name__)
+
+# Where finished audio lives: "local" (a directory, possibly a shared mount) or "s3"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+S3_BUCKET = os.getenv("S3_BUCKET", "orator-audio")
+S3_PREFIX = os.getenv("S3_PREFIX", "audio/")
+# Set for MinIO or another S3-compatible store; empty means AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+# Endpoint browsers reach for pre-signed downloads, if it differs from the one workers use
+S3_PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL") or S3_ENDPOINT_URL
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+# Multipart part size; S3 requires at least 5 MiB for every part but the last
+S3_PART_BYTES = int(os.getenv("S3_PART_BYTES", 8 * 1024 * 1024))
+S3_PRESIGN_SECONDS = int(os.getenv("S3_PRESIGN_SECONDS", 3600))
+
+
+class LocalWriter:
+    """Writes ``name`` beside its final path and renames it into place on commit.
+
+    ``path`` is exposed so a subprocess (ffmpeg) can write the file directly.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.final_path = os.path.join(directory, name)
+        self.path = f"{self.final_path}.part"
+        self._file = None
+
+    def write(self, data: bytes) -> int:
+        if self._file is None:
+            self._file = open(self.path, "wb")
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def commit(self) -> int:
+        """Publish the file under its final name and return its size."""
+        if self._file is not None:
+            self._file.close()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size == 0:
+            self.abort()
+            raise RuntimeError("Audio generation failed or produced empty file")
+        os.replace(self.path, self.final_path)
+        return size
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class LocalStorage:
+    """Finished audio in a directory the API serves itself (a local disk or a shared mount)."""
+
+    is_local = True
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def check(self) -> None:
+        """Fail unless the directory can be written to."""
+        os.makedirs(self.directory, exist_ok=True)
+        probe = os.path.join(self.directory, f"test_{uuid.uuid4()}.tmp")
+        with open(probe, "w") as f:
+            f.write("test")
+        os.remove(probe)
+
+    def writer(self, name: str) -> LocalWriter:
+        return LocalWriter(self.directory, name)
+
+    def size(self, name: str) -> int | None:
+        try:
+            return os.path.getsize(os.path.join(self.directory, name))
+        except OSError:
+            return None
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def list(self) -> list[dict]:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith(".") and not entry.name.endswith((".part", ".tmp")):
+                stat = entry.stat()
+                files.append({"filename": entry.name, "size": stat.st_size, "created": stat.st_ctime})
+        return files
+
+    def clean_partials(self, older_than: float) -> int:
+        """Remove ``.part`` and probe files a crashed writer left more than ``older_than`` seconds ago."""
+        removed = 0
+        cutoff = time.time() - older_than
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith((".part", ".tmp")):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def download_url(self, name: str, attachment: bool = False) -> str | None:
+        # Served by the API's own /download and /stream handlers
+        return None
+
+
+class S3Writer:
+    """Streams an object to S3 as a multipart upload, one part per ``part_bytes`` written.
+
+    Parts go up while the book is still being synthesized, so only the last
+    part is left to send when it finishes. Objects smaller than one part
+    are sent with a single PUT instead.
+    """
+
+    def __init__(self, client, bucket: str, key: str, content_type: str, part_bytes: int = S3_PART_BYTES):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_bytes = part_bytes
+        self.upload_id = None
+        self.parts: list[dict] = []
+        self.size = 0
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.size += len(data)
+        while len(self._buffer) >= self.part_bytes:
+            self._upload_part(bytes(self._buffer[:self.part_bytes]))
+            del self._buffer[:self.part_bytes]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _upload_part(self, body: bytes) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                           PartNumber=number, Body=body)
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def commit(self) -> int:
+        if self.size == 0:
+            self.abort()
+            raise RuntimeError("Audio generation failed or produced empty file")
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer),
+                                   ContentType=self.content_type)
+            return self.size
+        if self._buffer:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self.client.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                              MultipartUpload={"Parts": self.parts})
+        return self.size
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        if self.upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            except Exception as e:
+                # A bucket lifecycle rule should clean up what this leaves behind
+                logger.warning(f"Could not abort multipart upload of {self.key}: {e}")
+            self.upload_id = None
+
+
+class S3Storage:
+    """Finished audio in an S3-compatible bucket; clients download with pre-signed URLs."""
+
+    is_local = False
+
+    def __init__(self, bucket: str = S3_BUCKET, prefix: str = S3_PREFIX, client=None, public_client=None,
+                 part_bytes: int = S3_PART_BYTES, presign_seconds: int = S3_PRESIGN_SECONDS):
+        if client is None:
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+            if public_client is None and S3_PUBLIC_ENDPOINT_URL != S3_ENDPOINT_URL:
+                public_client = boto3.client("s3", endpoint_url=S3_PUBLIC_ENDPOINT_URL, region_name=S3_REGION)
+        self.client = client
+        self.public_client = public_client or client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_bytes = part_bytes
+        self.presign_seconds = presign_seconds
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def check(self) -> None:
+        """Fail unless objects can be written to the bucket."""
+        key = self._key(f".probe-{uuid.uuid4()}")
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=b"test")
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def writer(self, name: str) -> S3Writer:
+        return S3Writer(self.client, self.bucket, self._key(name), media_type_for(name), self.part_bytes)
+
+    def size(self, name: str) -> int | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(name))["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def delete(self, name: str) -> None:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+        except (BotoCoreError, ClientError) as e:
+            raise OSError(f"Could not delete {self._key(name)}: {e}") from e
+
+    def list(self) -> list[dict]:
+        files = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                name = obj["Key"][len(self.prefix):]
+                if name and "/" not in name and not name.startswith("."):
+                    files.append({"filename": name, "size": obj["Size"],
+                                  "created": obj["LastModified"].timestamp()})
+        return files
+
+    def clean_partials(self, older_than: float) -> int:
+        """Abort multipart uploads a crashed writer started more than ``older_than`` seconds ago."""
+        removed = 0
+        cutoff = time.time() - older_than
+        paginator = self.client.get_paginator("list_multipart_uploads")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for upload in page.get("Uploads", []):
+                if upload["Initiated"].timestamp() < cutoff:
+                    self.client.abort_multipart_upload(Bucket=self.bucket, Key=upload["Key"],
+                                                       UploadId=upload["UploadId"])
+                    removed += 1
+        return removed
+
+    def download_url(self, name: str, attachment: bool = False) -> str:
+        """Pre-signed GET, so the bytes go straight from the bucket to the client."""
+        params = {"Bucket": self.bucket, "Key": self._key(name), "ResponseContentType": media_type_for(name)}
+        if attachment:
+            params["ResponseContentDisposition"] = f'attachment; filename="{name}"'
+        return self.public_client.generate_presigned_url("get_object", Params=params,
+                                                         ExpiresIn=self.presign_seconds)
+
+
+def open_storage(local_dir: str) -> LocalStorage | S3Storage:
+    """The backend selected by STORAGE_BACKEND; ``local_dir`` is used by the local one."""
+    if STORAGE_BACKEND == "s3":
+        return S3Storage()
+    if STORAGE_BACKEND != "local":
+        raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected local or s3")
+    return LocalStorage(local_dir)
@@ -0,0 +1,48 @@
+import math
+import os
+import time
+import wave
+from array import array
+
+STUB_MODEL_NAME = "stub"
+# Simulated model load time, so benchmarks can model a cold start without real weights
+STUB_LOAD_SECONDS = float(os.getenv("STUB_LOAD_SECONDS", 0))
+
+
+class _StubSynthesizer:
+    def __init__(self, sample_rate: int):
+        self.output_sample_rate = sample_rate
+
+
+class StubTTS:
+    """Deterministic stand-in for the Coqui ``TTS`` API.
+
+    Produces a short tone per character so CI, tests and benchmarks can run the
+    whole pipeline on CPU without downloading any model weights. Selected by
+    setting ``TTS_MODEL_NAME=stub``.
+    """
+
+    def __init__(self, sample_rate: int = 16000, seconds_per_char: float = 0.01,
+                 load_seconds: float = STUB_LOAD_SECONDS):
+        time.sleep(load_seconds)
+        self.synthesizer = _StubSynthesizer(sample_rate)
+        self.samples_per_char = max(1, int(sample_rate * seconds_per_char))
+
+    def tts(self, text: str) -> list[float]:
+        if not text.strip():
+            raise RuntimeError("Input text is empty")
+        rate = self.synthesizer.output_sample_rate
+        wav: list[float] = []
+        for ch in text:
+            freq = 200 + (ord(ch) % 64) * 10
+            step = 2 * math.pi * freq / rate
+            wav.extend(0.3 * math.sin(step * n) for n in range(self.samples_per_char))
+        return wav
+
+    def tts_to_file(self, text: str, file_path) -> None:
+        samples = array("h", (int(s * 32767) for s in self.tts(text)))
+        with wave.open(file_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.synthesizer.output_sample_rate)
+            out.writeframes(samples.tobytes())
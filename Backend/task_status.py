@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from celery_config import result_backend
+
+logger = logging.getLogger(__name__)
+
+# Status records outlive the job by as long as Celery keeps results (result_expires)
+STATUS_TTL_SECONDS = int(os.getenv("STATUS_TTL_SECONDS", 7200))
+# Redis holding the records; defaults to the result backend when that is Redis
+STATUS_REDIS_URL = os.getenv("STATUS_REDIS_URL") or (
+    result_backend if result_backend.startswith(("redis://", "rediss://")) else None
+)
+KEY_PREFIX = "orator:status:"
+# Every status change is also published here, one channel per task
+CHANNEL_PREFIX = "orator:progress:"
+
+# Stages a job goes through; everything but the final ones is still in flight
+STAGES = ("queued", "extracting", "synthesizing", "joining", "retrying", "completed", "failed")
+FINAL_STAGES = ("completed", "failed")
+
+
+class RedisStatusStore:
+    """One small hash per task: ``HSET`` to update, ``HGETALL`` to read.
+
+    Values are JSON-encoded so numbers round-trip; counters use
+    ``HINCRBY``/``HINCRBYFLOAT``. Events go out over Redis pub/sub.
+    """
+
+    def __init__(self, url: str, ttl: int = STATUS_TTL_SECONDS):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+
+    def update(self, task_id: str, **fields) -> None:
+        key = KEY_PREFIX + task_id
+        fields["updated"] = time.time()
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def add(self, task_id: str, **amounts) -> dict:
+        """Atomically add to counters and return the whole updated record."""
+        key = KEY_PREFIX + task_id
+        pipe = self.client.pipeline()
+        for field, amount in amounts.items():
+            if isinstance(amount, float):
+                pipe.hincrbyfloat(key, field, amount)
+            else:
+                pipe.hincrby(key, field, amount)
+        pipe.hset(key, "updated", json.dumps(time.time()))
+        pipe.expire(key, self.ttl)
+        pipe.hgetall(key)
+        raw = pipe.execute()[-1]
+        return {name: json.loads(value) for name, value in raw.items()}
+
+    def get(self, task_id: str) -> dict:
+        raw = self.client.hgetall(KEY_PREFIX + task_id)
+        return {name: json.loads(value) for name, value in raw.items()}
+
+    def publish(self, task_id: str, event: dict) -> None:
+        self.client.publish(CHANNEL_PREFIX + task_id, json.dumps(event))
+
+
+class MemoryStatusStore:
+    """Process-local stand-in for tests and eager mode, where API and task share a process."""
+
+    def __init__(self, ttl: int = STATUS_TTL_SECONDS):
+        self.ttl = ttl
+        self._records: dict[str, tuple[float, dict]] = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def _record(self, task_id: str) -> dict:
+        expires, record = self._records.get(task_id, (0, None))
+        if record is None or expires < time.time():
+            record = {}
+        self._records[task_id] = (time.time() + self.ttl, record)
+        return record
+
+    def update(self, task_id: str, **fields) -> None:
+        with self._lock:
+            self._record(task_id).update(fields, updated=time.time())
+
+    def add(self, task_id: str, **amounts) -> dict:
+        with self._lock:
+            record = self._record(task_id)
+            for field, amount in amounts.items():
+                record[field] = record.get(field, 0) + amount
+            record["updated"] = time.time()
+            return dict(record)
+
+    def get(self, task_id: str) -> dict:
+        with self._lock:
+            expires, record = self._records.get(task_id, (0, None))
+            if record is None or expires < time.time():
+                return {}
+            return dict(record)
+
+    def publish(self, task_id: str, event: dict) -> None:
+        for listener in list(self._listeners):
+            listener(task_id, event)
+
+    def add_listener(self, listener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_status_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RedisStatusStore(STATUS_REDIS_URL) if STATUS_REDIS_URL else MemoryStatusStore()
+        return _store
+
+
+def report(task_id: str, **fields) -> None:
+    """Best-effort status update and event; a Redis hiccup must not fail the conversion."""
+    try:
+        store = get_status_store()
+        store.update(task_id, **fields)
+        store.publish(task_id, {"task_id": task_id, **fields})
+    except Exception as e:
+        logger.warning(f"Could not record status for {task_id}: {e}")
+
+
+def report_chunk_done(task_id: str, index: int, audio_seconds: float = 0.0) -> None:
+    """Count a finished chunk and publish a progress event with an ETA.
+
+    The ETA extrapolates the average time per chunk since ``synthesis_started``;
+    counters live in the record, so chunks finished by different workers (chord
+    mode) add up to one consistent view.
+    """
+    try:
+        store = get_status_store()
+        record = store.add(task_id, chunks_done=1, audio_seconds=float(audio_seconds))
+        done = record.get("chunks_done", 0)
+        total = record.get("total") or done
+        event = {
+            "task_id": task_id,
+            "stage": "synthesizing",
+            "chunk": index,
+            "chunks_done": done,
+            "total": total,
+            "audio_seconds": round(record.get("audio_seconds", 0.0), 2),
+        }
+        started = record.get("synthesis_started")
+        if started and done:
+            elapsed = time.time() - started
+            event["eta_seconds"] = round(elapsed / done * max(total - done, 0), 1)
+        store.publish(task_id, event)
+    except Exception as e:
+        logger.warning(f"Could not record progress for {task_id}: {e}")
@@ -1,186 +1,866 @@
 import io
 import os
-import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import time
 import uuid
-import subprocess
 import shutil
+from celery import chord
+from celery.signals import (
+    after_setup_logger, after_setup_task_logger, beat_init, task_failure, task_revoked, worker_init,
+    worker_process_init,
+)
+from celery.exceptions import Retry
+from celery.result import allow_join_result
 from celery.utils.log import get_task_logger
-from celery_config import celery_app
+from celery_config import LARGE_QUEUE, SMALL_QUEUE, celery_app
+import chunking
+from audio_cache import AudioCache, text_key
+from extraction import iter_document_pages
+from normalize import TEXT_NORMALIZE, normalize_pages
+from uploads import discard_upload, upload_path
+from model_server import MODEL_SERVER_SOCKET, MODEL_SERVER_WAIT_SECONDS, ModelClient, wait_for_server
+from task_status import get_status_store, report, report_chunk_done
+from chunk_cache import CHUNK_CACHE_ENABLED, ChunkCache, get_chunk_cache
+from wav import concatenate_wavs, duration_seconds
+from encoders import StreamingEncoder, output_format, size_stats
+from storage import LocalStorage, open_storage
+from audio_index import get_audio_index, record_audio
+from admission import forget_job, job_progress, track_job
+from logs import use_formatter
+from metrics import CACHE_LOOKUPS, MODEL_LOAD_SECONDS, STAGE_SECONDS, observe_chunk, start_exporter, timed
+import retention
+from routing import priority_for, queue_for_chars, tenant_load
+from segments import (
+    chunk_path, job_dir_for, mark_skipped, prune_finished_jobs, skip_path, start_job, write_manifest,
+)
 
 logger = get_task_logger(__name__)
 
 # Globals and chunking configuration
 tts_model = None
+audio_dir = None
+storage = None
+synthesis_pools: dict[int, ProcessPoolExecutor] = {}
+synthesis_pools_lock = threading.Lock()
+TTS_MODEL_NAME = os.getenv("TTS_MODEL_NAME", "tts_models/en/ljspeech/tacotron2-DDC")
 MIN_CHARS = 50       # Minimum chars per chunk to avoid tiny audio segments
 MAX_CHARS = 2000     # Target max chars per chunk (~1–2 minute speech)
+# Worker processes used to synthesize chunks of one job in parallel (<= 1 disables)
+TTS_POOL_SIZE = int(os.getenv("TTS_POOL_SIZE", 0))
+# "single" runs a whole book in one task; "chord" fans chunks out across the fleet
+CONVERSION_MODE = os.getenv("CONVERSION_MODE", "single")
+CHUNKS_PER_SUBTASK = int(os.getenv("CHUNKS_PER_SUBTASK", 4))
+# Documents parsed at once per worker process; the other thread-pool slots wait their turn,
+# since a large PDF's parse is the memory peak of a job
+PARSE_CONCURRENCY = int(os.getenv("PARSE_CONCURRENCY", 2))
+parse_slots = threading.BoundedSemaphore(PARSE_CONCURRENCY)
+# Load the model (or wait for the model server) at worker boot rather than on the first job
+TTS_PRELOAD = os.getenv("TTS_PRELOAD", "true").lower() == "true"
+# Candidate output directories, first writable one wins
+AUDIO_DIR_CANDIDATES = [
+    "/app/static/audio",
+    "./static/audio",
+    "static/audio",
+]
+
+
+def load_tts_model():
+    """Load the TTS engine into this process, with error handling."""
+    start = time.perf_counter()
+    try:
+        logger.info("Initializing TTS model...")
+        if TTS_MODEL_NAME == "stub":
+            from stub_tts import StubTTS
+            return StubTTS()
+        # Heavy imports inside function so module can load in CI/tests
+        from TTS.api import TTS
+        import torch
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        logger.info(f"Using device: {device}")
+        # Force CPU for stability; disable progress bar
+        model = TTS(
+            model_name=TTS_MODEL_NAME,
+            gpu=False,
+            progress_bar=False,
+        )
+        load_seconds = time.perf_counter() - start
+        MODEL_LOAD_SECONDS.set(load_seconds)
+        STAGE_SECONDS.labels("model_load").observe(load_seconds)
+        logger.info("TTS model initialized successfully", extra={"load_seconds": round(load_seconds, 3)})
+        return model
+    except Exception as e:
+        logger.error(f"Failed to initialize TTS model: {e}")
+        # Reraise so callers can retry or fail gracefully
+        raise
 
 
 def get_tts_model():
-    """Lazily load the TTS engine only when needed, with error handling."""
+    """Lazily load the TTS engine only when needed.
+
+    With ``MODEL_SERVER_SOCKET`` set this is a client of the resident model
+    server instead, so recycled worker children start with nothing to load.
+    """
     global tts_model
     if tts_model is None:
-        try:
-            logger.info("Initializing TTS model...")
-            # Heavy imports inside function so module can load in CI/tests
-            from TTS.api import TTS
-            import torch
-
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            logger.info(f"Using device: {device}")
-            # Force CPU for stability; disable progress bar
-            tts_model = TTS(
-                model_name="tts_models/en/ljspeech/tacotron2-DDC",
-                gpu=False,
-                progress_bar=False,
-            )
-            logger.info("TTS model initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize TTS model: {e}")
-            # Reraise so callers can retry or fail gracefully
-            raise
+        if MODEL_SERVER_SOCKET:
+            tts_model = ModelClient(MODEL_SERVER_SOCKET)
+        else:
+            tts_model = load_tts_model()
     return tts_model
 
 
+def preload_model() -> None:
+    """Get the model ready before the first task so no user job pays a cold start."""
+    start = time.perf_counter()
+    try:
+        if MODEL_SERVER_SOCKET:
+            info = wait_for_server(ModelClient(MODEL_SERVER_SOCKET), MODEL_SERVER_WAIT_SECONDS)
+            logger.info(f"Model server ready (loaded in {info.get('load_seconds', 0):.2f}s)")
+        else:
+            get_tts_model()
+    except Exception as e:
+        logger.error(f"Model preload failed, the first task will load it: {e}")
+        return
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+    logger.info(f"TTS model ready after {time.perf_counter() - start:.2f}s")
+
+
+def check_storage() -> None:
+    """Probe the scratch directory and the audio storage once, before any task runs."""
+    find_audio_dir()
+    get_storage().check()
+    logger.info(f"Audio storage ready: {type(storage).__name__}")
+
+
+@after_setup_logger.connect
+@after_setup_task_logger.connect
+def _structured_logs(logger=None, **kwargs):
+    use_formatter(logger)
+
+
+@worker_init.connect
+def _preload_in_worker(sender=None, **kwargs):
+    start_exporter()
+    check_storage()
+    # Thread pools run tasks in the worker process itself; prefork and solo
+    # announce the processes that run tasks through worker_process_init
+    pool = sender.pool_cls if isinstance(sender.pool_cls, str) else sender.pool_cls.__module__
+    if TTS_PRELOAD and not pool.endswith(("prefork", "solo")):
+        preload_model()
+
+
+@worker_process_init.connect
+def _preload_in_child(**kwargs):
+    global storage
+    # HTTP clients don't survive a fork; each child opens its own (the probe result carries over)
+    storage = None
+    if TTS_PRELOAD:
+        preload_model()
+
+
+@task_failure.connect
+def _forget_failed_job(task_id=None, **kwargs):
+    # Also sent by the worker for tasks killed at task_time_limit, which never reach their own handlers
+    forget_job(task_id)
+
+
+@task_revoked.connect
+def _forget_revoked_job(request=None, **kwargs):
+    forget_job(request.id)
+
+
 def make_chunks(text: str) -> list[str]:
     """Split text into sentence-based chunks between MIN_CHARS and MAX_CHARS."""
-    # sentence tokenizer inside function to avoid global nltk download
-    from nltk.tokenize import sent_tokenize
-
-    # Normalize whitespace
-    text = text.replace("\n", " ")
-    sentences = sent_tokenize(text)
-    chunks: list[str] = []
-    current = ""
-
-    for sent in sentences:
-        # If adding the sentence exceeds our max, seal the current chunk
-        if len(current) + len(sent) + 1 > MAX_CHARS:
-            if current:
-                chunks.append(current.strip())
-            current = sent
+    return chunking.make_chunks(text, MIN_CHARS, MAX_CHARS)
+
+
+def find_audio_dir() -> str:
+    """Return the first writable directory in AUDIO_DIR_CANDIDATES.
+
+    Probed once per process (at worker boot); job scratch space, the chunk
+    cache and the audio cache index live here, and with local storage so
+    does the finished audio.
+    """
+    global audio_dir
+    if audio_dir is None:
+        for path in AUDIO_DIR_CANDIDATES:
+            try:
+                LocalStorage(path).check()
+            except Exception:
+                continue
+            logger.info(f"Using audio directory: {path}")
+            audio_dir = path
+            break
         else:
-            current = f"{current} {sent}".strip()
+            raise RuntimeError("No writable audio output directory found")
+    return audio_dir
+
+
+def get_storage():
+    """Where finished audio is written: STORAGE_BACKEND, opened once per process."""
+    global storage
+    if storage is None:
+        storage = open_storage(find_audio_dir())
+    return storage
+
 
-    # Add the final chunk
-    if current:
-        chunks.append(current.strip())
+def audio_cache_for(static_audio_dir: str) -> AudioCache:
+    return AudioCache(static_audio_dir, storage=get_storage())
 
-    # Merge any too-small trailing chunks into the previous one
-    merged: list[str] = []
-    for chunk in chunks:
-        if merged and len(chunk) < MIN_CHARS:
-            merged[-1] = f"{merged[-1]} {chunk}"
+
+def synthesize_chunk(text: str, file_path: str, cache: ChunkCache | None = None,
+                     job_id: str | None = None) -> bool:
+    """Write audio for one chunk to ``file_path``; returns True if it came from the cache.
+
+    Audio is written beside the target and renamed into place, so a file at
+    ``file_path`` is always complete; live listeners and retries rely on that.
+    The chunk then counts as finished in ``job_id``'s share of the admission
+    backlog, and towards its queue's throughput only if the model made it.
+    """
+    partial_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        data = cache.get(text) if cache is not None else None
+        if cache is not None:
+            CACHE_LOOKUPS.labels("chunk", "hits" if data is not None else "misses").inc()
+        if data is not None:
+            with open(partial_path, "wb") as f:
+                f.write(data)
         else:
-            merged.append(chunk)
-    return merged
+            start = time.perf_counter()
+            get_tts_model().tts_to_file(text=text, file_path=partial_path)
+            observe_chunk(len(text), time.perf_counter() - start, duration_seconds(partial_path))
+            if cache is not None:
+                with open(partial_path, "rb") as f:
+                    cache.put(text, f.read())
+        os.replace(partial_path, file_path)
+        if job_id is not None:
+            job_progress(job_id, len(text), synthesized=data is None)
+        return data is not None
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def _init_synthesis_process():
+    """Pool initializer: load the model once per process, not once per chunk."""
+    get_tts_model()
+
+
+def _synthesize_in_process(text: str, file_path: str, cache_dir: str | None, job_id: str | None) -> bool:
+    cache = get_chunk_cache(cache_dir, TTS_MODEL_NAME) if cache_dir else None
+    return synthesize_chunk(text, file_path, cache, job_id)
+
+
+def get_synthesis_pool(size: int) -> ProcessPoolExecutor:
+    """Long-lived process pool shared by every task running in this worker.
+
+    Uses spawn so children don't inherit the worker's threads or a half-loaded
+    torch runtime; each child keeps its own model resident between jobs.
+    """
+    with synthesis_pools_lock:
+        pool = synthesis_pools.get(size)
+        if pool is None:
+            logger.info(f"Starting synthesis process pool with {size} workers")
+            pool = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_synthesis_process,
+            )
+            synthesis_pools[size] = pool
+        return pool
+
+
+def _discard_synthesis_pool(size: int) -> None:
+    with synthesis_pools_lock:
+        pool = synthesis_pools.pop(size, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def chunk_progress(job_id: str):
+    """``on_chunk_done`` callback publishing per-chunk progress for ``job_id``."""
+    def on_chunk_done(index: int, path: str | None) -> None:
+        report_chunk_done(job_id, index, duration_seconds(path) if path else 0.0)
+    return on_chunk_done
+
+
+def observe_queue_wait(task_id: str) -> None:
+    """Record how long a job sat in the broker, if its status record says it was queued."""
+    try:
+        record = get_status_store().get(task_id)
+    except Exception:
+        return
+    if record.get("stage") == "queued" and record.get("updated"):
+        STAGE_SECONDS.labels("queue_wait").observe(max(0.0, time.time() - record["updated"]))
+
+
+def new_encoder(writer) -> StreamingEncoder | None:
+    """Encoder into a storage ``writer`` in AUDIO_FORMAT, or None when the output stays WAV.
+
+    ffmpeg writes local files itself and streams into anything else.
+    """
+    audio_format = output_format()
+    if not audio_format.ffmpeg_args:
+        return None
+    return StreamingEncoder(getattr(writer, "path", None) or writer, audio_format)
+
+
+def write_wav(chunk_files: list[str], writer) -> None:
+    """Join WAV chunks into a storage ``writer``."""
+    if len(chunk_files) == 1:
+        with open(chunk_files[0], "rb") as f:
+            shutil.copyfileobj(f, writer)
+    else:
+        frames = concatenate_wavs(chunk_files, writer)
+        logger.info(f"Combined {len(chunk_files)} chunks ({frames} frames)")
+
+
+def encode_as_done(encoder: StreamingEncoder, on_chunk_done):
+    """Wrap an ``on_chunk_done`` callback so each finished chunk is also encoded.
+
+    Callbacks arrive in text order, so the encoder sees the book front to back.
+    """
+    def on_done(index: int, path: str | None) -> None:
+        if path is not None:
+            encoder.add(path)
+        on_chunk_done(index, path)
+    return on_done
+
+
+def output_stats(audio_bytes: int, encoder: StreamingEncoder | None) -> dict:
+    if encoder is None:
+        return size_stats("wav", audio_bytes, audio_bytes)
+    return size_stats(encoder.audio_format.name, audio_bytes, encoder.wav_bytes)
+
+
+def resumed_chunks(out_dir: str, indices) -> tuple[set[int], set[int]]:
+    """Chunks among ``indices`` an earlier attempt finished: (written, rejected by the model)."""
+    checkpointed = {i for i in indices if os.path.exists(chunk_path(out_dir, i))}
+    rejected = {i for i in indices if os.path.exists(skip_path(out_dir, i))} - checkpointed
+    return checkpointed, rejected
+
+
+def synthesize_chunks(chunks: list[str], out_dir: str, cache: ChunkCache | None = None,
+                      pool_size: int | None = None, on_chunk_done=None,
+                      job_id: str | None = None) -> tuple[list[str], int]:
+    """Synthesize ``chunks`` into ``out_dir`` and return (ordered chunk files, cache hits).
+
+    With ``pool_size`` > 1 chunks fan out over a process pool; with a batching
+    model a batch worth of chunks is kept in flight at once. Either way the
+    files come back in text order and a chunk the model rejects is skipped
+    with a warning (and a skip marker for live listeners). Chunks already in
+    ``out_dir`` (checkpoints of an earlier attempt, see ``start_job``) are
+    reused as they are. ``on_chunk_done`` is called with ``(index, path)``
+    after each chunk; ``path`` is None if the chunk was skipped. Chunks
+    written now count towards ``job_id``'s backlog progress (see
+    ``synthesize_chunk``); checkpoints were counted when they were written.
+    """
+    pool_size = TTS_POOL_SIZE if pool_size is None else pool_size
+    paths = [chunk_path(out_dir, i) for i in range(len(chunks))]
+    batch_size = getattr(get_tts_model(), "max_batch_size", 1) if pool_size <= 1 else 1
+    executor = None
+    checkpointed, rejected = resumed_chunks(out_dir, range(len(chunks)))
+    pending = [i for i in range(len(chunks)) if i not in checkpointed and i not in rejected]
+
+    if pool_size > 1 and len(pending) > 1:
+        pool = get_synthesis_pool(pool_size)
+        # Children keep the cwd they were spawned with, so only hand them absolute paths
+        cache_dir = os.path.abspath(cache.cache_dir) if cache is not None else None
+        paths = [os.path.abspath(path) for path in paths]
+        runs = {i: pool.submit(_synthesize_in_process, chunks[i], paths[i], cache_dir, job_id).result for i in pending}
+    elif batch_size > 1 and len(pending) > 1:
+        # The model batches concurrent calls, so give it up to a batch of this job's chunks at once
+        executor = ThreadPoolExecutor(batch_size, thread_name_prefix="chunk")
+        runs = {i: executor.submit(synthesize_chunk, chunks[i], paths[i], cache, job_id).result for i in pending}
+    else:
+        runs = {i: lambda i=i: synthesize_chunk(chunks[i], paths[i], cache, job_id) for i in pending}
+    if checkpointed or rejected:
+        logger.info(f"Resuming with {len(checkpointed)}/{len(chunks)} chunks already synthesized")
+
+    done: list[str] = []
+    cache_hits = 0
+    try:
+        for i in range(len(chunks)):
+            path = None
+            if i in checkpointed:
+                path = paths[i]
+            elif i in runs:
+                logger.info(f"Converting chunk {i+1}/{len(chunks)}")
+                try:
+                    cache_hits += runs[i]()
+                    path = paths[i]
+                except BrokenProcessPool:
+                    # A child died (OOM, model load failure); don't hand the dead pool to the next job
+                    _discard_synthesis_pool(pool_size)
+                    raise
+                except RuntimeError as e:
+                    logger.warning(f"Chunk {i+1} failed: {e}")
+                    mark_skipped(out_dir, i)
+            if path is not None:
+                done.append(path)
+            if on_chunk_done is not None:
+                on_chunk_done(i, path)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return done, cache_hits
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def convert_text_to_audio(self, text: str) -> str:
-    """Main Celery task: convert input text into a single WAV audio file."""
+def convert_text_to_audio(self, text: str, cache_keys: list[str] | None = None) -> dict:
+    """Main Celery task: convert input text into a single audio file in AUDIO_FORMAT.
+
+    ``cache_keys`` are the content hashes the API looked up before queuing; on
+    success they are pointed at the new file so identical uploads skip synthesis.
+    Retries and redeliveries pick up at the first chunk that is missing.
+    Returns the audio filename along with per-job chunk cache statistics.
+    """
+    return _convert_text(self, text, cache_keys)
+
+
+def _convert_text(self, text: str, cache_keys: list[str] | None = None) -> dict:
+    cache_keys = cache_keys or []
+    static_audio_dir = None
+    job_dir = None
+    writer = None
+    encoder = None
     try:
         logger.info(f"Starting TTS conversion for text length: {len(text)} chars")
         # Generate a unique filename
-        audio_name = f"{uuid.uuid4()}.wav"
-
-        # Discover a writable static directory
-        possible_paths = [
-            "/app/static/audio",
-            "./static/audio",
-            "static/audio",
-        ]
-        static_audio_dir = None
-        for path in possible_paths:
-            try:
-                os.makedirs(path, exist_ok=True)
-                testfile = os.path.join(path, f"test_{uuid.uuid4()}.tmp")
-                with open(testfile, "w") as f:
-                    f.write("test")
-                os.remove(testfile)
-                static_audio_dir = path
-                logger.info(f"Using audio directory: {path}")
-                break
-            except Exception:
-                continue
+        audio_name = f"{uuid.uuid4()}{output_format().extension}"
 
-        if not static_audio_dir:
-            raise RuntimeError("No writable audio output directory found")
-
-        audio_path = os.path.join(static_audio_dir, audio_name)
+        static_audio_dir = find_audio_dir()
+        # Published under its final name only once complete; served files never change
+        writer = get_storage().writer(audio_name)
+        # Compressed formats are encoded (and uploaded) chunk by chunk while synthesis runs
+        encoder = new_encoder(writer)
 
         # Chunk the text
         chunks = make_chunks(text)
         logger.info(f"Text split into {len(chunks)} chunk(s)")
 
-        # Load TTS model
-        model = get_tts_model()
+        # Chunks are published into the job directory as they finish, so
+        # /stream/live/{task_id} can play the start of the book right away
+        job_dir = job_dir_for(static_audio_dir, self.request.id)
+        # A retry or redelivery keeps the job id, so chunks written before a crash are checkpoints
+        resumed = start_job(job_dir, chunks)
+        report(self.request.id, stage="synthesizing", total=len(chunks), chunks_done=0,
+               audio_seconds=0.0, synthesis_started=time.time())
+        track_job(self.request.id, queue_for_chars(len(text)), sum(map(len, chunks)))
 
-        # Single vs multiple chunks
-        if len(chunks) == 1:
-            try:
-                model.tts_to_file(text=chunks[0], file_path=audio_path)
-            except RuntimeError as e:
-                logger.warning(f"Skipping tiny chunk: {e}")
-                # Leave file absent or empty
-        else:
-            # Convert each chunk and concatenate
-            temp_dir = tempfile.mkdtemp()
-            temp_files = []
-            try:
-                for i, chunk in enumerate(chunks):
-                    chunk_path = os.path.join(temp_dir, f"chunk_{i}.wav")
-                    logger.info(f"Converting chunk {i+1}/{len(chunks)}")
-                    try:
-                        model.tts_to_file(text=chunk, file_path=chunk_path)
-                        temp_files.append(chunk_path)
-                    except RuntimeError as e:
-                        logger.warning(f"Chunk {i+1} failed: {e}")
-
-                # Attempt concatenation via ffmpeg
-                list_file = os.path.join(temp_dir, "files.txt")
-                with open(list_file, "w") as f:
-                    for tf in temp_files:
-                        f.write(f"file '{tf}'\n")
-                try:
-                    subprocess.run([
-                        "ffmpeg", "-f", "concat", "-safe", "0",
-                        "-i", list_file, "-c", "copy", audio_path
-                    ], check=True, capture_output=True)
-                    logger.info("Audio chunks combined via ffmpeg")
-                except Exception:
-                    logger.warning("ffmpeg failed or unavailable, using first chunk")
-                    if temp_files:
-                        shutil.copy2(temp_files[0], audio_path)
-            finally:
-                # Cleanup temp files
-                for tf in temp_files:
-                    try: os.remove(tf)
-                    except: pass
-                try: os.rmdir(temp_dir)
-                except: pass
-
-        # Ensure audio exists and is non-empty
-        if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
-            raise RuntimeError("Audio generation failed or produced empty file")
-
-        logger.info(f"TTS conversion complete: {audio_path}")
-        return audio_name
+        chunk_cache = None
+        if CHUNK_CACHE_ENABLED:
+            chunk_cache = get_chunk_cache(os.path.join(static_audio_dir, ".chunks"), TTS_MODEL_NAME)
+
+        on_chunk_done = chunk_progress(self.request.id)
+        if encoder is not None:
+            on_chunk_done = encode_as_done(encoder, on_chunk_done)
+        with timed("synthesis"):
+            chunk_files, cache_hits = synthesize_chunks(
+                chunks, job_dir, chunk_cache, on_chunk_done=on_chunk_done, job_id=self.request.id
+            )
+        report(self.request.id, stage="joining")
+        if encoder is not None:
+            if chunk_files:
+                with timed("encode"):
+                    encoder.close()
+        elif chunk_files:
+            with timed("join"):
+                write_wav(chunk_files, writer)
+
+        # Fails if the audio is empty
+        with timed("store"):
+            audio_bytes = writer.commit()
+        record_audio(audio_name, audio_bytes, task_id=self.request.id)
+        write_manifest(job_dir, done=True)
+        prune_finished_jobs(static_audio_dir)
+
+        hit_ratio = cache_hits / len(chunks) if chunks else 0.0
+        logger.info(f"TTS conversion complete: {audio_name} "
+                    f"(chunk cache hits {cache_hits}/{len(chunks)}, {hit_ratio:.0%})")
+        stats = output_stats(audio_bytes, encoder)
+        if cache_keys:
+            audio_cache_for(static_audio_dir).store(cache_keys, audio_name, task_id=self.request.id,
+                                                    audio_bytes=audio_bytes)
+        result = {
+            "audio_filename": audio_name,
+            "chunks": len(chunks),
+            "chunks_resumed": resumed,
+            "chunk_cache_hits": cache_hits,
+            "chunk_cache_hit_ratio": round(hit_ratio, 4),
+            **stats,
+        }
+        report(self.request.id, stage="completed", **result)
+        forget_job(self.request.id)
+        return result
 
     except Exception as e:
         logger.error(f"TTS conversion failed: {e}")
+        if encoder is not None:
+            encoder.abort()
         # Cleanup partial
         try:
-            if 'audio_path' in locals() and os.path.exists(audio_path):
-                os.remove(audio_path)
+            if writer is not None:
+                writer.abort()
                 logger.info("Cleaned up partial audio file")
         except:
             pass
-        # Retry if possible
+        # Retry if possible; the next attempt resumes from the chunks already in job_dir
         if self.request.retries < self.max_retries:
+            report(self.request.id, stage="retrying", error=str(e), retries=self.request.retries + 1)
             raise self.retry(exc=e, countdown=60)
+        report(self.request.id, stage="failed", error=str(e))
+        forget_job(self.request.id)
+        if job_dir:
+            write_manifest(job_dir, failed=str(e))
+        if cache_keys and static_audio_dir:
+            audio_cache_for(static_audio_dir).discard(cache_keys)
+        raise
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def convert_text_to_audio_distributed(self, text: str, cache_keys: list[str] | None = None):
+    """Split step of the fan-out workflow: one subtask per batch of chunks, then a join.
+
+    The task replaces itself with the chord, so its id (the one handed to the
+    client) resolves to the join's result. Chunk files land in a per-job
+    directory on the shared audio volume, so every worker can contribute and a
+    retried subtask only redoes the chunks it hasn't written yet.
+    """
+    return _fan_out(self, text, cache_keys)
+
+
+def _fan_out(self, text: str, cache_keys: list[str] | None = None):
+    chunks = make_chunks(text)
+    if not chunks:
+        raise RuntimeError("No text to convert")
+    static_audio_dir = find_audio_dir()
+    job_dir = job_dir_for(static_audio_dir, self.request.id)
+    resumed = start_job(job_dir, chunks)
+    if resumed:
+        logger.info(f"{resumed}/{len(chunks)} chunks survive from an earlier attempt")
+    report(self.request.id, stage="synthesizing", total=len(chunks), chunks_done=0,
+           audio_seconds=0.0, synthesis_started=time.time())
+
+    # Subtasks stay on the queue (and at the priority) the book was routed to
+    options = {"queue": queue_for_chars(len(text))}
+    track_job(self.request.id, options["queue"], sum(map(len, chunks)))
+    priority = (self.request.delivery_info or {}).get("priority")
+    if priority is not None:
+        options["priority"] = priority
+    header = [
+        synthesize_chunk_batch.s(job_dir, start, chunks[start:start + CHUNKS_PER_SUBTASK]).set(**options)
+        for start in range(0, len(chunks), CHUNKS_PER_SUBTASK)
+    ]
+    logger.info(f"Fanning {len(chunks)} chunk(s) out to {len(header)} subtask(s) on {options['queue']}")
+    workflow = chord(header, join_chunks.s(job_dir, len(chunks), cache_keys or []).set(**options))
+    if self.request.is_eager:
+        # Eager mode runs the chord inline and has to wait on the header group
+        with allow_join_result():
+            return self.replace(workflow)
+    return self.replace(workflow)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
+def synthesize_chunk_batch(self, job_dir: str, start: int, texts: list[str]) -> dict:
+    """Synthesize chunks ``start..start+len(texts)`` into ``job_dir``.
+
+    Chunks an earlier attempt wrote or skipped are left alone, which makes
+    redelivery and retries idempotent, and are reported like the rest so the
+    job's progress still reaches its total. Each chunk is published for live
+    listeners as soon as it is written.
+    """
+    chunk_cache = None
+    if CHUNK_CACHE_ENABLED:
+        chunk_cache = get_chunk_cache(os.path.join(os.path.dirname(os.path.dirname(job_dir)), ".chunks"),
+                                      TTS_MODEL_NAME)
+    files: list[str] = []
+    cache_hits = 0
+    # The job directory is named after the id clients poll
+    job_id = os.path.basename(job_dir)
+    on_chunk_done = chunk_progress(job_id)
+    checkpointed, rejected = resumed_chunks(job_dir, range(start, start + len(texts)))
+    for offset, text in enumerate(texts):
+        index = start + offset
+        path = chunk_path(job_dir, index)
+        if index in checkpointed or index in rejected:
+            if index in checkpointed:
+                files.append(path)
+            else:
+                path = None
+            # A retry of this batch already reported what its earlier attempt finished
+            if not self.request.retries:
+                on_chunk_done(index, path)
+            continue
+        try:
+            cache_hits += synthesize_chunk(text, path, chunk_cache, job_id)
+            files.append(path)
+        except RuntimeError as e:
+            logger.warning(f"Chunk {index+1} failed: {e}")
+            mark_skipped(job_dir, index)
+            path = None
+        except Exception as e:
+            logger.error(f"Chunk {index+1} errored, retrying batch: {e}")
+            if self.request.retries >= self.max_retries:
+                # The chord fails with this batch and the join never runs
+                report(job_id, stage="failed", error=str(e))
+                forget_job(job_id)
+            raise self.retry(exc=e)
+        on_chunk_done(index, path)
+    return {"start": start, "files": files, "cache_hits": cache_hits}
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def join_chunks(self, batches: list[dict], job_dir: str, chunk_count: int,
+                cache_keys: list[str]) -> dict:
+    """Join step of the fan-out workflow: concatenate chunk files in text order."""
+    try:
+        return _join_chunks(self, batches, job_dir, chunk_count, cache_keys)
+    except Exception as e:
+        report(os.path.basename(job_dir), stage="failed", error=str(e))
+        forget_job(os.path.basename(job_dir))
+        write_manifest(job_dir, failed=str(e))
+        raise
+
+
+def _join_chunks(self, batches: list[dict], job_dir: str, chunk_count: int,
+                 cache_keys: list[str]) -> dict:
+    static_audio_dir = os.path.dirname(os.path.dirname(job_dir))
+    audio_name = f"{uuid.uuid4()}{output_format().extension}"
+
+    batches = sorted(batches, key=lambda batch: batch["start"])
+    files = [path for batch in batches for path in batch["files"]]
+    cache_hits = sum(batch["cache_hits"] for batch in batches)
+    if not files:
+        raise RuntimeError("Audio generation failed or produced empty file")
+
+    report(os.path.basename(job_dir), stage="joining")
+    writer = get_storage().writer(audio_name)
+    # Chunks come from other workers in any order, so here they are encoded at the join
+    encoder = new_encoder(writer)
+    try:
+        if encoder is not None:
+            with timed("encode"):
+                for path in files:
+                    encoder.add(path)
+                encoder.close()
+        else:
+            with timed("join"):
+                write_wav(files, writer)
+        with timed("store"):
+            audio_bytes = writer.commit()
+    except BaseException:
+        if encoder is not None:
+            encoder.abort()
+        writer.abort()
+        raise
+    record_audio(audio_name, audio_bytes, task_id=self.request.id)
+    write_manifest(job_dir, done=True)
+    prune_finished_jobs(static_audio_dir)
+
+    hit_ratio = cache_hits / chunk_count if chunk_count else 0.0
+    logger.info(f"TTS conversion complete: {audio_name} "
+                f"(chunk cache hits {cache_hits}/{chunk_count}, {hit_ratio:.0%})")
+    stats = output_stats(audio_bytes, encoder)
+    if cache_keys:
+        # The chord shares the split task's id, which is what clients were given
+        audio_cache_for(static_audio_dir).store(cache_keys, audio_name, task_id=self.request.id,
+                                                audio_bytes=audio_bytes)
+    result = {
+        "audio_filename": audio_name,
+        "chunks": chunk_count,
+        "chunk_cache_hits": cache_hits,
+        "chunk_cache_hit_ratio": round(hit_ratio, 4),
+        **stats,
+    }
+    report(os.path.basename(job_dir), stage="completed", **result)
+    forget_job(os.path.basename(job_dir))
+    return result
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def convert_document(self, upload_name: str, ext: str, cache_keys: list[str] | None = None,
+                     tenant: str | None = None):
+    """Extraction stage: turn a spooled upload into clean text, then convert it.
+
+    Only the upload's name travels through the broker. The text is extracted
+    and normalized here (headers, footers, page numbers and hyphenation
+    removed; numbers spelled out), checked against the audio cache, and
+    converted in this same task
+    (or fanned out, in chord mode), so the book text never goes on the queue.
+    Books longer than LARGE_JOB_CHARS are handed to the large queue instead.
+    The upload is removed once no retry will need it again.
+    """
+    cache_keys = list(cache_keys or [])
+    static_audio_dir = find_audio_dir()
+    job_dir = job_dir_for(static_audio_dir, self.request.id)
+    audio_cache = audio_cache_for(static_audio_dir)
+    retrying = False
+    observe_queue_wait(self.request.id)
+    report(self.request.id, stage="extracting")
+    try:
+        try:
+            with parse_slots, timed("extraction"):
+                pages = iter_document_pages(upload_path(upload_name), ext)
+                if TEXT_NORMALIZE:
+                    text, text_stats = normalize_pages(pages, paginated=ext == ".pdf")
+                else:
+                    text, text_stats = "".join(f"{page}\n" for page in pages if page), None
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from document: {e}") from e
+        if not text.strip():
+            raise ValueError("No text could be extracted from the document.")
+        logger.info(f"Extracted text length: {len(text)} characters")
+        if text_stats:
+            # Every character dropped here is synthesis time saved
+            logger.info(f"Normalization removed {text_stats['chars_removed']} of {text_stats['chars_in']} "
+                        f"characters ({text_stats['lines_removed']} header, footer and page number lines)")
+            report(self.request.id, text_normalization=text_stats)
+
+        # Same text from a different file (re-export, new metadata) is also a hit
+        key = text_key(text, TTS_MODEL_NAME)
+        cached = audio_cache.lookup(key)
+        if cached and cached.get("audio_filename"):
+            logger.info(f"Audio cache hit for text of {upload_name}")
+            audio_cache.store(cache_keys, cached["audio_filename"], task_id=self.request.id,
+                              audio_bytes=cached.get("audio_bytes"))
+            write_manifest(job_dir, total=0, done=True)
+            result = {"audio_filename": cached["audio_filename"], "cached": True}
+            if cached.get("audio_bytes"):
+                result["audio_bytes"] = cached["audio_bytes"]
+            report(self.request.id, stage="completed", **result)
+            forget_job(self.request.id)
+            return result
+        cache_keys.append(key)
+        audio_cache.mark_pending([key], self.request.id)
+
+        queue = queue_for_chars(len(text))
+        if queue == LARGE_QUEUE and (self.request.delivery_info or {}).get("routing_key") != LARGE_QUEUE:
+            return _hand_off(self, text, cache_keys, queue, priority_for(len(text), tenant_load(tenant)))
+        if CONVERSION_MODE == "chord":
+            return _fan_out(self, text, cache_keys)
+        return _convert_text(self, text, cache_keys)
+    except Retry:
+        retrying = True
+        raise
+    except ValueError as e:
+        # A document we can't read won't get better on retry
+        logger.error(f"Extraction failed for {upload_name}: {e}")
+        report(self.request.id, stage="failed", error=str(e))
+        forget_job(self.request.id)
+        write_manifest(job_dir, failed=str(e))
+        audio_cache.discard(cache_keys)
+        raise
+    finally:
+        if not retrying:
+            discard_upload(upload_name)
+
+
+def _hand_off(self, text: str, cache_keys: list[str], queue: str, priority: int):
+    """Replace this task with the synthesis stage on ``queue``; clients keep polling the same id.
+
+    The text waits in the upload spool, so it doesn't go through the broker either.
+    """
+    text_name = f"{self.request.id}.txt"
+    with open(upload_path(text_name), "w", encoding="utf-8") as f:
+        f.write(text)
+    logger.info(f"Routing {len(text)} characters to {queue} at priority {priority}")
+    report(self.request.id, stage="queued", queue=queue, priority=priority)
+    # It now waits behind the large queue's backlog
+    track_job(self.request.id, queue, len(text))
+    stage = convert_extracted_text.si(text_name, cache_keys).set(queue=queue, priority=priority)
+    if self.request.is_eager:
+        # Eager mode runs the replacement inline and waits on its result
+        with allow_join_result():
+            return self.replace(stage)
+    return self.replace(stage)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def convert_extracted_text(self, text_name: str, cache_keys: list[str] | None = None):
+    """Synthesis stage of a book convert_document routed to another queue.
+
+    Reads the text the extraction stage spooled and removes it once no retry
+    will need it again.
+    """
+    retrying = False
+    # The wait on the second queue, since _hand_off marked the job queued again
+    observe_queue_wait(self.request.id)
+    try:
+        with open(upload_path(text_name), encoding="utf-8") as f:
+            text = f.read()
+        if CONVERSION_MODE == "chord":
+            return _fan_out(self, text, cache_keys)
+        return _convert_text(self, text, cache_keys)
+    except Retry:
+        retrying = True
+        raise
+    finally:
+        if not retrying:
+            discard_upload(text_name)
+
+
+def start_document_conversion(upload_name: str, ext: str, cache_keys: list[str] | None = None,
+                              tenant: str | None = None, estimated_chars: int = 0):
+    """Queue extraction and conversion of a spooled upload.
+
+    The book's length is unknown until extraction, so it starts on the small
+    queue, ranked by ``estimated_chars`` (from the upload's size) and by how
+    much ``tenant`` has submitted lately; convert_document moves long books
+    to the large queue at the priority of their real length. Until then the
+    job counts against the backlog as ``estimated_chars`` characters.
+    """
+    priority = priority_for(estimated_chars, tenant_load(tenant, record=True))
+    # The status record and backlog entry exist before any worker can pick the task up
+    task_id = str(uuid.uuid4())
+    report(task_id, stage="queued", queue=SMALL_QUEUE, priority=priority)
+    track_job(task_id, SMALL_QUEUE, estimated_chars)
+    try:
+        return convert_document.apply_async((upload_name, ext), {"cache_keys": cache_keys, "tenant": tenant},
+                                            task_id=task_id, queue=SMALL_QUEUE, priority=priority)
+    except Exception:
+        forget_job(task_id)
         raise
 
 
+@celery_app.task(bind=True)
+def collect_garbage(self) -> dict:
+    """Retention sweep run by celery beat every AUDIO_GC_INTERVAL seconds.
+
+    Deletes finished audio past AUDIO_TTL_SECONDS since its last download,
+    then the least recently used files until the total fits AUDIO_QUOTA_BYTES,
+    and clears scratch space left behind by crashed jobs.
+    """
+    static_audio_dir = find_audio_dir()
+    stats = retention.collect(get_storage(), get_audio_index(), static_audio_dir)
+    logger.info(f"Retention sweep: {stats['expired']} expired, {stats['evicted']} evicted, "
+                f"{stats['bytes_freed']} bytes freed, {stats['orphaned_jobs']} orphaned job dirs; "
+                f"{stats['files']} files ({stats['total_bytes']} bytes) kept")
+    return stats
+
+
+@celery_app.task(bind=True)
+def reconcile_audio_index(self) -> dict:
+    """Rebuild the audio index from a listing of storage, every AUDIO_RECONCILE_INTERVAL seconds.
+
+    Sweeps only read the index; this catches files it missed or kept after
+    they were deleted.
+    """
+    indexed, stale = retention.reconcile(get_storage(), get_audio_index())
+    logger.info(f"Audio index reconciled: {indexed} files indexed, {stale} stale entries dropped")
+    return {"indexed": indexed, "stale_entries": stale, "files": get_audio_index().count()}
+
+
+@beat_init.connect
+def _reconcile_at_beat_start(**kwargs):
+    # The schedule's first run is a whole interval away; start from an index that matches storage
+    reconcile_audio_index.apply_async()
+
+
 @celery_app.task(bind=True)
 def health_check(self) -> str:
     """Verify Celery worker is responsive."""
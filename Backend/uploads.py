@@ -0,0 +1,116 @@
+import os
+import uuid
+
+from starlette.responses import JSONResponse
+from fastapi import HTTPException
+
+# Shared volume where the API spools uploads for the extraction stage in the workers
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+# Bytes pulled from the request per read while spooling
+UPLOAD_READ_BYTES = 1024 * 1024
+# Room for the multipart envelope around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Leading bytes each accepted document type must start with
+MAGIC_PREFIXES = {
+    ".pdf": (b"%PDF-",),
+    ".epub": (b"PK\x03\x04",),
+}
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadRejected(Exception):
+    pass
+
+
+def upload_path(name: str, upload_dir: str | None = None) -> str:
+    return os.path.join(upload_dir or UPLOAD_DIR, name)
+
+
+def discard_upload(name: str, upload_dir: str | None = None) -> None:
+    try:
+        os.remove(upload_path(name, upload_dir))
+    except OSError:
+        pass
+
+
+async def spool_upload(file, ext: str, max_bytes: int, hasher=None, scanner=None,
+                       upload_dir: str | None = None) -> tuple[str, int]:
+    """Copy an upload to the shared upload directory block by block.
+
+    Returns the spooled file's name and size. The size cap is enforced while
+    copying, and ``hasher`` and ``scanner`` (an INSTREAM scan) are fed every
+    block, so the upload is never held in memory as a whole. The file only
+    appears under its final name once complete.
+    """
+    upload_dir = upload_dir or UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+    name = f"{uuid.uuid4()}{ext}"
+    path = upload_path(name, upload_dir)
+    partial_path = f"{path}.part"
+    size = 0
+    try:
+        with open(partial_path, "wb") as out:
+            while True:
+                block = await file.read(UPLOAD_READ_BYTES)
+                if not block:
+                    break
+                if size == 0 and not block.startswith(MAGIC_PREFIXES.get(ext, (b"",))):
+                    raise UploadRejected("File content does not match its extension.")
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge("File too large.")
+                if hasher is not None:
+                    hasher.update(block)
+                if scanner is not None:
+                    await scanner.write(block)
+                out.write(block)
+        if size == 0:
+            raise UploadRejected("Uploaded file is empty.")
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return name, size
+
+
+class UploadSizeLimit:
+    """ASGI middleware that stops oversized upload bodies as they arrive.
+
+    Requests announcing a larger Content-Length are refused before any body is
+    read; chunked bodies are cut off as soon as the running total passes the
+    limit, instead of being buffered by the form parser first.
+    """
+
+    def __init__(self, app, max_bytes: int, paths=("/upload",), detail: str = "File too large."):
+        self.app = app
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+        self.paths = set(paths)
+        self.detail = detail
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await JSONResponse({"detail": self.detail}, status_code=400)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPException from body parsing as-is
+                    raise HTTPException(status_code=400, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
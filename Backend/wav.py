@@ -0,0 +1,54 @@
+import wave
+
+# Frames copied per read; keeps memory flat no matter how long the book is
+COPY_BLOCK_FRAMES = 64 * 1024
+
+
+def _params(source) -> tuple[tuple[int, int, int], int]:
+    with wave.open(source, "rb") as f:
+        return (f.getnchannels(), f.getsampwidth(), f.getframerate()), f.getnframes()
+
+
+def duration_seconds(source) -> float:
+    """Playing time of a WAV file, from its header."""
+    (_, _, framerate), frames = _params(source)
+    return frames / framerate if framerate else 0.0
+
+
+def concatenate_wavs(sources: list, output) -> int:
+    """Concatenate WAV chunks into ``output`` in-process and return the frame count.
+
+    ``sources`` may be paths or in-memory file objects (``BytesIO``). The chunk
+    headers are read first so the output header is written once with the final
+    size; frames are then appended block by block without ever re-reading or
+    seeking in the output.
+    """
+    if not sources:
+        raise ValueError("No audio chunks to concatenate")
+
+    params = None
+    total_frames = 0
+    for source in sources:
+        chunk_params, frames = _params(source)
+        if params is None:
+            params = chunk_params
+        elif chunk_params != params:
+            raise ValueError(f"Chunk format {chunk_params} does not match {params}")
+        total_frames += frames
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+    channels, sampwidth, framerate = params
+    with wave.open(output, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(sampwidth)
+        out.setframerate(framerate)
+        out.setnframes(total_frames)
+        for source in sources:
+            with wave.open(source, "rb") as chunk:
+                while True:
+                    block = chunk.readframes(COPY_BLOCK_FRAMES)
+                    if not block:
+                        break
+                    out.writeframesraw(block)
+    return total_frames
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# A worker counts as alive for this long after its last heartbeat or task event.
+# Celery workers send a heartbeat every 2 s while events are enabled.
+WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", 10))
+# Task events that mean a worker is done with a task
+TASK_END_EVENTS = {"task-succeeded", "task-failed", "task-revoked", "task-rejected", "task-retried"}
+# Pause before reconnecting the event receiver after a broker error
+MONITOR_RECONNECT_SECONDS = float(os.getenv("MONITOR_RECONNECT_SECONDS", 2))
+
+
+class WorkerMonitor:
+    """Track worker liveness from Celery's event stream in a background thread.
+
+    The API reads :meth:`status` instead of sending a task through the queue
+    on every request; the answer is a couple of attribute reads.
+    """
+
+    def __init__(self, app, heartbeat_timeout: float = WORKER_HEARTBEAT_TIMEOUT,
+                 clock=time.monotonic):
+        self.app = app
+        self.heartbeat_timeout = heartbeat_timeout
+        self.clock = clock
+        self.started_at = None
+        self.broker_error = None
+        self._last_seen: dict[str, float] = {}
+        self._active: dict[str, set[str]] = {}
+        self._freshest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._receiver = None
+        self._thread = None
+
+    def on_event(self, event: dict) -> None:
+        event_type = event.get("type", "")
+        # task-sent comes from producers like this API, not from workers
+        if not event_type.startswith(("worker-", "task-")) or event_type == "task-sent":
+            return
+        hostname = event.get("hostname")
+        if not hostname:
+            return
+        now = self.clock()
+        with self._lock:
+            if event_type == "worker-offline":
+                self._last_seen.pop(hostname, None)
+                self._active.pop(hostname, None)
+                self._freshest = max(self._last_seen.values(), default=None)
+                return
+            self._last_seen[hostname] = now
+            self._freshest = now
+            task_id = event.get("uuid")
+            if event_type == "task-started" and task_id:
+                self._active.setdefault(hostname, set()).add(task_id)
+            elif event_type in TASK_END_EVENTS and task_id:
+                self._active.get(hostname, set()).discard(task_id)
+
+    def workers(self) -> list[str]:
+        """Hostnames heard from within the heartbeat timeout."""
+        cutoff = self.clock() - self.heartbeat_timeout
+        with self._lock:
+            return sorted(name for name, seen in self._last_seen.items() if seen >= cutoff)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Per-worker liveness and running task ids, as seen in the event stream."""
+        now = self.clock()
+        with self._lock:
+            return {
+                name: {
+                    "alive": now - seen < self.heartbeat_timeout,
+                    "last_seen_seconds": round(now - seen, 1),
+                    "active_tasks": sorted(self._active.get(name, ())),
+                }
+                for name, seen in sorted(self._last_seen.items())
+            }
+
+    def workers_available(self) -> bool:
+        freshest = self._freshest
+        return freshest is not None and self.clock() - freshest < self.heartbeat_timeout
+
+    def status(self) -> str:
+        """One of ``available``, ``no_workers``, ``starting``, ``broker_unreachable`` or ``not_running``."""
+        if self.broker_error is not None:
+            return "broker_unreachable"
+        if self.workers_available():
+            return "available"
+        if self.started_at is None:
+            return "not_running"
+        if self.clock() - self.started_at < self.heartbeat_timeout:
+            return "starting"
+        return "no_workers"
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.started_at = self.clock()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="worker-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        receiver = self._receiver
+        if receiver is not None:
+            receiver.should_stop = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.started_at = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self.app.connection_for_read() as connection:
+                    connection.ensure_connection(max_retries=1)
+                    self._receiver = self.app.events.Receiver(connection, handlers={"*": self.on_event})
+                    self.broker_error = None
+                    if self._stop.is_set():
+                        return
+                    # wakeup asks every worker for an immediate heartbeat
+                    self._receiver.capture(limit=None, timeout=None, wakeup=True)
+            except Exception as e:
+                self.broker_error = str(e) or type(e).__name__
+                logger.warning(f"Worker monitor lost the broker: {self.broker_error}")
+            finally:
+                self._receiver = None
+            self._stop.wait(MONITOR_RECONNECT_SECONDS)
@@ -0,0 +1,86 @@
+"""Synthesis throughput in chars/second, unbatched vs. batched across concurrent jobs.
+
+Runs ``--jobs`` conversions at once on threads, like the
+``--pool=threads --concurrency=4`` worker, each synthesizing ``--chunks``
+chunks with ``synthesize_chunks``. The unbatched row is the old path: one
+``tts_to_file`` per chunk. The batched rows put a ``BatchingSynthesizer``
+in front of the same model. Neither the stub nor the bundled Coqui model
+has a batched ``tts_to_files`` entry point, so both run one text at a time
+behind the batcher and this shows only the batching overhead; a model that
+adds one can be measured with the same matrix.
+
+    python benchmarks/bench_batched_synthesis.py --batch-sizes 2 4 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend"))
+
+
+def run(tasks, model, jobs: list[list[str]]) -> float:
+    tasks.tts_model = model
+    with tempfile.TemporaryDirectory() as out_dir:
+        threads = []
+        for j, chunks in enumerate(jobs):
+            job_dir = os.path.join(out_dir, str(j))
+            os.makedirs(job_dir)
+            threads.append(threading.Thread(target=tasks.synthesize_chunks, args=(chunks, job_dir),
+                                            kwargs={"pool_size": 0}))
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent conversions")
+    parser.add_argument("--chunks", type=int, default=8, help="chunks per conversion")
+    parser.add_argument("--chars", type=int, default=400, help="characters per chunk")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--max-wait-ms", type=float, default=50)
+    parser.add_argument("--model", choices=["stub", "coqui"], default="stub")
+    args = parser.parse_args()
+
+    if args.model == "stub":
+        os.environ["TTS_MODEL_NAME"] = "stub"
+    import tasks
+    from batching import BatchingSynthesizer
+
+    model = tasks.load_tts_model()
+    sentence = "The quick brown fox jumps over the lazy dog. "
+    jobs = [[(f"Job {j} chunk {i}. " + sentence * args.chars)[:args.chars] for i in range(args.chunks)]
+            for j in range(args.jobs)]
+    total_chars = sum(len(c) for chunks in jobs for c in chunks)
+
+    # Warm up (first-call allocations, lazy imports) before timing anything
+    run(tasks, model, [jobs[0][:1]])
+    seconds = run(tasks, model, jobs)
+    rows = [{"batch_size": 1, "seconds": round(seconds, 4), "chars_per_second": round(total_chars / seconds, 1)}]
+    for size in args.batch_sizes:
+        batcher = BatchingSynthesizer(model, max_batch_size=size, max_wait=args.max_wait_ms / 1000)
+        seconds = run(tasks, batcher, jobs)
+        rows.append({
+            "batch_size": size,
+            "seconds": round(seconds, 4),
+            "chars_per_second": round(total_chars / seconds, 1),
+            "model_calls": batcher.batches,
+            "mean_batch": round(batcher.chunks / batcher.batches, 2),
+        })
+    for row in rows[1:]:
+        row["speedup"] = round(row["chars_per_second"] / rows[0]["chars_per_second"], 2)
+
+    json.dump({"benchmark": "batched_synthesis", "model": args.model, "jobs": args.jobs,
+               "chunks_per_job": args.chunks, "chars": total_chars, "results": rows}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
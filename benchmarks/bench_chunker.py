@@ -0,0 +1,101 @@
+"""Chunking speed and chunk-size quality on multi-megabyte text, old vs. new chunker.
+
+The text mixes ordinary prose with what PDF extraction really produces:
+tables and lists with no sentence punctuation at all. The old chunker is
+reproduced here with the fallback sentence splitter, since the Punkt data
+isn't installed by default.
+
+    python benchmarks/bench_chunker.py --megabytes 1 4 8
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend"))
+
+MIN_CHARS = 50
+MAX_CHARS = 2000
+
+
+def legacy_make_chunks(text: str) -> list[str]:
+    """The chunker as it was: greedy f-string packing, oversized sentences left whole."""
+    text = text.replace("\n", " ")
+    sentences = re.split(r"(?<=[.!?])\s+", text)
+    chunks: list[str] = []
+    current = ""
+    for sent in sentences:
+        if len(current) + len(sent) + 1 > MAX_CHARS:
+            if current:
+                chunks.append(current.strip())
+            current = sent
+        else:
+            current = f"{current} {sent}".strip()
+    if current:
+        chunks.append(current.strip())
+    merged: list[str] = []
+    for chunk in chunks:
+        if merged and len(chunk) < MIN_CHARS:
+            merged[-1] = f"{merged[-1]} {chunk}"
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def book(megabytes: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["the", "model", "reads", "every", "page", "aloud", "while", "listeners", "wait", "patiently"]
+    parts, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        if rng.random() < 0.02:
+            # A table: thousands of characters without a full stop
+            part = "\n".join(" ".join(str(rng.randint(0, 9999)) for _ in range(8)) for _ in range(rng.randint(20, 200)))
+        else:
+            part = " ".join(rng.choice(words) for _ in range(rng.randint(5, 40))).capitalize() + "."
+        parts.append(part)
+        size += len(part) + 1
+    return "\n".join(parts)
+
+
+def measure(make_chunks, text: str) -> dict:
+    start = time.perf_counter()
+    chunks = make_chunks(text)
+    seconds = time.perf_counter() - start
+    lengths = [len(c) for c in chunks]
+    return {
+        "seconds": round(seconds, 4),
+        "mb_per_second": round(len(text) / 1024 / 1024 / seconds, 2),
+        "chunks": len(chunks),
+        "max_chars": max(lengths),
+        "over_limit": sum(length > MAX_CHARS for length in lengths),
+        "stdev_chars": round(statistics.pstdev(lengths), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    import chunking
+
+    chunking.sentence_tokenizer()  # load (or give up on) Punkt outside the timings
+    results = []
+    for megabytes in args.megabytes:
+        text = book(megabytes)
+        results.append({
+            "megabytes": megabytes,
+            "legacy": measure(legacy_make_chunks, text),
+            "current": measure(lambda t: chunking.make_chunks(t, MIN_CHARS, MAX_CHARS), text),
+        })
+    json.dump({"benchmark": "chunker", "punkt": chunking.sentence_tokenizer() is not None,
+               "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Event-loop responsiveness while a large document is being uploaded.
+
+Starts the API in-process on a real socket, uploads a generated PDF, and polls
+a cheap endpoint (plus /health) the whole time. Latency percentiles while the
+upload is in flight should match the idle ones now that the API only spools
+the file and extraction happens in the worker. Nothing is queued; only the API
+side is measured.
+
+    python benchmarks/bench_extraction_load.py --pages 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+    }
+
+
+async def probe(client, path: str, stop: asyncio.Event, samples: list[float], interval: float):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def run(base_url: str, pdf: bytes, idle_seconds: float, interval: float, paths: list[str]) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        idle = {path: [] for path in paths}
+        stop = asyncio.Event()
+        probes = [asyncio.create_task(probe(client, p, stop, idle[p], interval)) for p in paths]
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        await asyncio.gather(*probes)
+
+        loaded = {path: [] for path in paths}
+        stop = asyncio.Event()
+        probes = [asyncio.create_task(probe(client, p, stop, loaded[p], interval)) for p in paths]
+        start = time.perf_counter()
+        response = await client.post("/upload", files={"file": ("big.pdf", pdf, "application/pdf")})
+        upload_seconds = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*probes)
+
+    return {
+        "upload_status": response.status_code,
+        "upload_seconds": round(upload_seconds, 2),
+        "idle": {path: percentiles(s) for path, s in idle.items()},
+        "during_upload": {path: percentiles(s) for path, s in loaded.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--paths", nargs="+", default=["/cache/stats", "/health"])
+    args = parser.parse_args()
+
+    from pdfgen import make_text_pdf
+    pdf = make_text_pdf(args.pages)
+
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    import uvicorn
+    import main as api
+
+    class QueuedTask:
+        id = "benchmark"
+
+    api.ENABLE_ANTIVIRUS = False
+    api.tasks.start_document_conversion = lambda name, ext, **options: QueuedTask()
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    try:
+        result = asyncio.run(run(f"http://127.0.0.1:{sock.getsockname()[1]}", pdf,
+                                 args.idle_seconds, args.interval, args.paths))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    result.update({"benchmark": "extraction_load", "pages": args.pages, "pdf_bytes": len(pdf)})
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
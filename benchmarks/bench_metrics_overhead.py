@@ -0,0 +1,68 @@
+"""Cost of the Prometheus instrumentation on the hot paths.
+
+Times ``--iterations`` calls each of a bare loop, ``metrics.timed`` around an
+empty block, ``observe_chunk`` and a cache counter increment, plus rendering
+the exposition, and relates the per-chunk cost to a chunk's synthesis time.
+
+    python benchmarks/bench_metrics_overhead.py --iterations 200000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend"))
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+# A 2,000 character chunk on CPU Tacotron2 takes tens of seconds; one second is a generous lower bound
+CHUNK_SECONDS = 1.0
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    import metrics
+
+    def empty():
+        pass
+
+    def timed_block():
+        with metrics.timed("bench"):
+            pass
+
+    def chunk():
+        metrics.observe_chunk(2000, 12.5, 9.8)
+        metrics.CACHE_LOOKUPS.labels("chunk", "misses").inc()
+
+    baseline = per_call_us(empty, args.iterations)
+    timed_us = per_call_us(timed_block, args.iterations) - baseline
+    chunk_us = per_call_us(chunk, args.iterations) - baseline
+    start = time.perf_counter()
+    body, _ = metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    json.dump({
+        "benchmark": "metrics_overhead",
+        "iterations": args.iterations,
+        "timed_block_us": round(timed_us, 3),
+        "per_chunk_us": round(chunk_us, 3),
+        "per_chunk_share_of_synthesis": f"{chunk_us / (CHUNK_SECONDS * 1e6):.6%}",
+        "render_ms": round(render_ms, 3),
+        "exposition_bytes": len(body),
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
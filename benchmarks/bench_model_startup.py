@@ -0,0 +1,101 @@
+"""Startup and first-task latency of a fresh worker child, with and without the model server.
+
+Each measurement runs in a new process, like a child Celery just recycled
+(``worker_max_tasks_per_child``): import the task module, get the model,
+synthesize a first and a second chunk. The stub model sleeps
+``--stub-load-seconds`` on load to stand in for torch + Tacotron2; pass
+``--model coqui`` to time the real model instead.
+
+    python benchmarks/bench_model_startup.py --children 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend")
+sys.path.insert(0, BACKEND)
+
+CHUNK = "The quick brown fox jumps over the lazy dog. " * 8
+
+
+def child():
+    """Time one fresh worker child; prints a JSON row."""
+    start = time.perf_counter()
+    import tasks
+    imported = time.perf_counter()
+    tasks.get_tts_model()
+    ready = time.perf_counter()
+    with tempfile.TemporaryDirectory() as out_dir:
+        tasks.synthesize_chunk(CHUNK, os.path.join(out_dir, "first.wav"))
+        first = time.perf_counter()
+        tasks.synthesize_chunk(CHUNK, os.path.join(out_dir, "second.wav"))
+        second = time.perf_counter()
+    json.dump({
+        "import_seconds": round(imported - start, 4),
+        "model_ready_seconds": round(ready - imported, 4),
+        "first_task_seconds": round(first - start, 4),
+        "warm_chunk_seconds": round(second - first, 4),
+    }, sys.stdout)
+
+
+def run_children(count: int, env: dict) -> list[dict]:
+    rows = []
+    for _ in range(count):
+        out = subprocess.run([sys.executable, __file__, "--child"], env=env, cwd=BACKEND,
+                             capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    return rows
+
+
+def summarize(rows: list[dict]) -> dict:
+    return {key: round(sum(r[key] for r in rows) / len(rows), 4) for key in rows[0]}
+
+
+def main():
+    if "--child" in sys.argv:
+        return child()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, default=3, help="fresh children per mode")
+    parser.add_argument("--model", choices=["stub", "coqui"], default="stub")
+    parser.add_argument("--stub-load-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=BACKEND)
+    if args.model == "stub":
+        env.update(TTS_MODEL_NAME="stub", STUB_LOAD_SECONDS=str(args.stub_load_seconds))
+    env.pop("MODEL_SERVER_SOCKET", None)
+    result = {"benchmark": "model_startup", "model": args.model, "children": args.children}
+    result["in_process"] = summarize(run_children(args.children, env))
+
+    import model_server
+
+    with tempfile.TemporaryDirectory() as run_dir:
+        socket_path = os.path.join(run_dir, "tts.sock")
+        start = time.perf_counter()
+        server = subprocess.Popen([sys.executable, os.path.join(BACKEND, "model_server.py"),
+                                   "--socket", socket_path],
+                                  env=env, cwd=BACKEND, stderr=subprocess.DEVNULL)
+        try:
+            info = model_server.wait_for_server(model_server.ModelClient(socket_path), timeout=600, interval=0.05)
+            result["server_startup_seconds"] = round(time.perf_counter() - start, 4)
+            result["server_model_load_seconds"] = round(info["load_seconds"], 4)
+            result["model_server"] = summarize(
+                run_children(args.children, dict(env, MODEL_SERVER_SOCKET=socket_path))
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    result["first_task_speedup"] = round(
+        result["in_process"]["first_task_seconds"] / result["model_server"]["first_task_seconds"], 2
+    )
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
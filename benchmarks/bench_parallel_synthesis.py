@@ -0,0 +1,58 @@
+"""Wall-clock speedup of process-pool chunk synthesis on a CPU-only machine.
+
+Runs the same set of chunks serially and through pools of increasing size,
+using the stub model by default so no weights are downloaded. Pass
+``--model coqui`` to time the real Tacotron2 model instead.
+
+    python benchmarks/bench_parallel_synthesis.py --chunks 4 8 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--chars", type=int, default=600, help="characters per chunk")
+    parser.add_argument("--model", choices=["stub", "coqui"], default="stub")
+    args = parser.parse_args()
+
+    if args.model == "stub":
+        os.environ["TTS_MODEL_NAME"] = "stub"
+    import tasks
+
+    pool_sizes = args.pool_sizes or sorted({2, max(2, os.cpu_count() or 2)})
+    sentence = "The quick brown fox jumps over the lazy dog. "
+    results = []
+
+    for count in args.chunks:
+        chunks = [(f"Chunk {i}. " + sentence * args.chars)[:args.chars] for i in range(count)]
+        row = {"chunks": count, "chars_per_chunk": args.chars, "cpu_count": os.cpu_count()}
+        for size in [0] + pool_sizes:
+            if size > 1:
+                # Warm the pool so model load isn't billed to the first measurement
+                with tempfile.TemporaryDirectory() as warm_dir:
+                    tasks.synthesize_chunks(chunks[:size], warm_dir, pool_size=size)
+            with tempfile.TemporaryDirectory() as out_dir:
+                start = time.perf_counter()
+                tasks.synthesize_chunks(chunks, out_dir, pool_size=size)
+                row[f"seconds_pool_{size}"] = round(time.perf_counter() - start, 4)
+        for size in pool_sizes:
+            row[f"speedup_pool_{size}"] = round(row["seconds_pool_0"] / row[f"seconds_pool_{size}"], 2)
+        results.append(row)
+
+    for size in list(tasks.synthesis_pools):
+        tasks._discard_synthesis_pool(size)
+    json.dump({"benchmark": "parallel_synthesis", "model": args.model, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""End-to-end benchmark suite with baseline comparison.
+
+Times the pipeline's hot paths in-process: chunking, PDF extraction (with
+normalization, as the worker runs it), WAV concatenation, chunk synthesis,
+the upload handler and status polling. Each case runs ``--repeat`` times
+after a warm-up and reports median, p95 and throughput as JSON. Inputs are
+generated from fixed seeds and synthesis uses the deterministic stub model,
+so a run needs no model download or GPU; ``--model coqui`` synthesizes with
+the real model instead (skipped when Coqui TTS isn't installed).
+
+``--save`` writes the results for later runs to compare against with
+``--baseline``: a case whose median is more than ``--tolerance`` slower than
+its baseline is a regression and the run exits with status 1. Baselines are
+only meaningful on the machine that recorded them.
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --tolerance 0.2
+    python benchmarks/bench_suite.py --quick --cases make_chunks,wav_concat
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "Backend"))
+sys.path.insert(0, BENCH_DIR)
+
+# Sizes per case: (full run, --quick)
+SIZES = {
+    "make_chunks": ({"chars": 500_000}, {"chars": 20_000}),
+    "pdf_extraction": ({"pages": 40}, {"pages": 3}),
+    "wav_concat": ({"chunks": 200, "seconds_per_chunk": 10.0}, {"chunks": 10, "seconds_per_chunk": 1.0}),
+    "synthesis": ({"chunks": 8}, {"chunks": 2}),
+    "upload": ({"pages": 2}, {"pages": 1}),
+    "status_poll": ({"tasks": 20}, {"tasks": 3}),
+}
+WORDS = ("the orator reads every page aloud while listeners follow along quietly in the evening "
+         "chapter seven begins with a storm over the harbour and a letter nobody expected").split()
+
+
+def configure_environment(model: str) -> None:
+    """Settings the Backend modules read at import: in-memory Celery, no clamd, quiet logs."""
+    os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+    os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+    os.environ.setdefault("ENABLE_ANTIVIRUS", "false")
+    os.environ.setdefault("LOG_FORMAT", "text")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # Uploads pile up unserved; don't let admission control start refusing them
+    os.environ.setdefault("ADMISSION_SLO_SECONDS", "0")
+    os.environ.setdefault("CHUNK_CACHE_ENABLED", "false")
+    if model == "stub":
+        os.environ["TTS_MODEL_NAME"] = "stub"
+
+
+def book_text(chars: int, seed: int = 1) -> str:
+    """Deterministic prose of about ``chars`` characters: sentences of 5-30 words."""
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < chars:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 30))]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+# --- Cases ------------------------------------------------------------------
+# Each builds its inputs and returns (run, work, unit): ``run()`` is timed,
+# ``work`` units are processed per run. A case may return None to be skipped.
+
+def case_make_chunks(chars: int):
+    import tasks
+
+    text = book_text(chars)
+    return lambda: tasks.make_chunks(text), len(text), "chars"
+
+
+def case_pdf_extraction(pages: int):
+    from extraction import iter_document_pages
+    from normalize import normalize_pages
+    from pdfgen import make_text_pdf
+
+    pdf = make_text_pdf(pages)
+
+    def run():
+        normalize_pages(iter_document_pages(pdf, ".pdf"), paginated=True)
+
+    return run, pages, "pages"
+
+
+def case_wav_concat(chunks: int, seconds_per_chunk: float):
+    from bench_wav_concat import write_chunks
+    from wav import concatenate_wavs
+
+    chunk_dir = tempfile.mkdtemp(prefix="bench-wav-", dir=".")
+    paths = write_chunks(chunk_dir, chunks, seconds_per_chunk)
+
+    def run():
+        concatenate_wavs(paths, BytesIO())
+
+    return run, chunks * seconds_per_chunk, "audio_seconds"
+
+
+def case_synthesis(chunks: int):
+    import tasks
+
+    if tasks.TTS_MODEL_NAME != "stub" and importlib.util.find_spec("TTS") is None:
+        return None
+    texts = tasks.make_chunks(book_text(chunks * tasks.MAX_CHARS, seed=2))[:chunks]
+    out_root = tempfile.mkdtemp(prefix="bench-synth-", dir=".")
+    tasks.get_tts_model()
+    runs = [0]
+
+    def run():
+        # A fresh directory each time; existing chunk files would count as checkpoints
+        runs[0] += 1
+        out_dir = os.path.join(out_root, str(runs[0]))
+        os.makedirs(out_dir)
+        tasks.synthesize_chunks(texts, out_dir, pool_size=0)
+        shutil.rmtree(out_dir)
+
+    return run, sum(map(len, texts)), "chars"
+
+
+def _client():
+    from fastapi.testclient import TestClient
+
+    import main
+    return TestClient(main.app)
+
+
+def case_upload(pages: int):
+    from pdfgen import make_text_pdf
+
+    client = _client()
+    books = iter(range(10 ** 9))
+
+    def run():
+        # Distinct bytes every time, or the audio cache would answer
+        pdf = make_text_pdf(pages, line=f"Book number {next(books)} of the benchmark. ")
+        response = client.post("/upload", files={"file": ("book.pdf", pdf, "application/pdf")})
+        assert response.status_code == 200, response.text
+
+    return run, 1, "requests"
+
+
+def case_status_poll(tasks: int):
+    from pdfgen import make_text_pdf
+
+    client = _client()
+    task_ids = []
+    for n in range(tasks):
+        pdf = make_text_pdf(1, lines_per_page=2, line=f"Polled book {n}.")
+        task_ids.append(client.post("/upload", files={"file": ("b.pdf", pdf, "application/pdf")}).json()["task_id"])
+
+    def run():
+        for task_id in task_ids:
+            client.get(f"/task/{task_id}").raise_for_status()
+
+    return run, len(task_ids), "requests"
+
+
+CASES = {
+    "make_chunks": case_make_chunks,
+    "pdf_extraction": case_pdf_extraction,
+    "wav_concat": case_wav_concat,
+    "synthesis": case_synthesis,
+    "upload": case_upload,
+    "status_poll": case_status_poll,
+}
+
+
+# --- Running and comparing ---------------------------------------------------
+
+def summarize(samples: list[float], work: float, unit: str) -> dict:
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(median * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "stdev_ms": round(statistics.stdev(ordered) * 1000, 3) if len(ordered) > 1 else 0.0,
+        "throughput": round(work / median, 2) if median else None,
+        "unit": f"{unit}/s",
+    }
+
+
+def run_case(name: str, params: dict, repeat: int, warmup: int = 1) -> dict:
+    built = CASES[name](**params)
+    if built is None:
+        return {"params": params, "skipped": "model not installed"}
+    run, work, unit = built
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {"params": params, **summarize(samples, work, unit)}
+
+
+def run_suite(names: list[str], repeat: int, quick: bool = False) -> dict:
+    return {name: run_case(name, SIZES[name][1 if quick else 0], repeat) for name in names}
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float = 0.1) -> dict:
+    """Each case's median against the baseline's.
+
+    A case is a regression when it is more than ``tolerance`` (a fraction)
+    slower and by more than ``min_delta_ms``, so timer noise on sub-millisecond
+    cases doesn't fail a run. Cases measured with different parameters, or
+    missing on either side, aren't compared.
+    """
+    comparison = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None or "median_ms" not in before or "median_ms" not in result:
+            comparison[name] = {"status": "new" if before is None else "skipped"}
+            continue
+        if before.get("params") != result.get("params"):
+            comparison[name] = {"status": "params_changed"}
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        delta = result["median_ms"] - before["median_ms"]
+        if change > tolerance and delta > min_delta_ms:
+            status = "regression"
+        elif change < -tolerance and -delta > min_delta_ms:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison[name] = {"status": status, "baseline_ms": before["median_ms"],
+                            "median_ms": result["median_ms"], "change": round(change, 4)}
+    return comparison
+
+
+def environment(model: str) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "model": model,
+        "commit": commit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="small inputs, for CI smoke runs")
+    parser.add_argument("--model", choices=["stub", "coqui"], default="stub")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown allowed before a regression")
+    parser.add_argument("--save", help="also write the results here, for use as a baseline")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    configure_environment(args.model)
+    work_dir = tempfile.mkdtemp(prefix="orator-bench-")
+    cwd = os.getcwd()
+    # The API and the workers write static/ and uploads/ relative to the working directory
+    os.chdir(work_dir)
+    try:
+        results = run_suite(names, args.repeat, args.quick)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "suite",
+        "environment": environment(args.model),
+        "repeat": args.repeat,
+        "quick": args.quick,
+        "results": results,
+    }
+    regressions = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            comparison = compare(results, json.load(f)["results"], args.tolerance)
+        report["comparison"] = comparison
+        regressions = [name for name, entry in comparison.items() if entry["status"] == "regression"]
+        report["regressions"] = regressions
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
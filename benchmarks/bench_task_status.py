@@ -0,0 +1,106 @@
+"""Many clients polling GET /task/{id} at once.
+
+Queues ``--tasks`` uploads against an in-memory broker with no worker (so the
+tasks stay in flight), then runs ``--pollers`` concurrent clients polling those
+ids for ``--seconds`` and reports poll latency and throughput.
+
+    python benchmarks/bench_task_status.py --pollers 50 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("ENABLE_ANTIVIRUS", "false")
+
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def run(base_url: str, tasks: int, pollers: int, seconds: float) -> dict:
+    import httpx
+    from pdfgen import make_text_pdf
+
+    limits = httpx.Limits(max_connections=pollers)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        task_ids = []
+        for n in range(tasks):
+            pdf = make_text_pdf(1, lines_per_page=2, line=f"Book {n}.")
+            response = await client.post("/upload", files={"file": (f"b{n}.pdf", pdf, "application/pdf")})
+            task_ids.append(response.json()["task_id"])
+
+        samples: list[float] = []
+        statuses: dict[str, int] = {}
+        deadline = time.perf_counter() + seconds
+
+        async def poll(n: int):
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                body = (await client.get(f"/task/{task_ids[n % len(task_ids)]}")).json()
+                samples.append(time.perf_counter() - start)
+                statuses[body.get("status")] = statuses.get(body.get("status"), 0) + 1
+                n += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(poll(n) for n in range(pollers)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "statuses": statuses,
+        "polls_per_second": round(len(samples) / elapsed, 1),
+        "poll": percentiles(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5)
+    parser.add_argument("--pollers", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    import uvicorn
+    import main as api
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        result = asyncio.run(run(f"http://127.0.0.1:{sock.getsockname()[1]}",
+                                 args.tasks, args.pollers, args.seconds))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    result.update({"benchmark": "task_status", "tasks": args.tasks, "pollers": args.pollers})
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Upload latency with a live (in-process) Celery worker.
+
+Runs the API on a real socket and a solo-pool worker thread over the
+in-memory broker with the stub TTS model, then uploads ``--uploads`` distinct
+one-page PDFs one after another and reports p50/p99 of the /upload response
+time. Antivirus is off, so the number is dominated by what the API does
+before it queues the task (spooling, cache lookup, worker availability).
+
+    python benchmarks/bench_upload_latency.py --uploads 30
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("TTS_MODEL_NAME", "stub")
+os.environ.setdefault("ENABLE_ANTIVIRUS", "false")
+
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=30)
+    parser.add_argument("--warmup-seconds", type=float, default=3.0,
+                        help="time for the worker to come up (and send heartbeats) before measuring")
+    args = parser.parse_args()
+
+    from pdfgen import make_text_pdf
+
+    os.chdir(tempfile.mkdtemp())
+    import httpx
+    import uvicorn
+    from celery.contrib.testing.worker import start_worker
+    import main as api
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(api.app, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+
+    samples = []
+    statuses = {}
+    with start_worker(api.celery_app, pool="solo", perform_ping_check=False, loglevel="error"):
+        server_thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        time.sleep(args.warmup_seconds)
+        base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            for n in range(args.uploads):
+                pdf = make_text_pdf(1, lines_per_page=3, line=f"Upload number {n} reads a short line.")
+                start = time.perf_counter()
+                response = client.post("/upload", files={"file": (f"u{n}.pdf", pdf, "application/pdf")})
+                samples.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        monitor = getattr(api, "worker_monitor", None)
+        worker_status = monitor.status() if monitor is not None else None
+        server.should_exit = True
+        server_thread.join()
+
+    json.dump({
+        "benchmark": "upload_latency",
+        "statuses": statuses,
+        "worker_monitor": worker_status,
+        "upload": percentiles(samples),
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
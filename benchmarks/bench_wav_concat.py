@@ -0,0 +1,105 @@
+"""Peak RSS and wall time of WAV concatenation: in-process vs the old ffmpeg path.
+
+Generates ``--chunks`` synthetic chunk WAVs, then concatenates them in a fresh
+child process per method so each peak RSS is measured in isolation. The ffmpeg
+method (files.txt + ``ffmpeg -f concat``) is skipped when ffmpeg isn't installed.
+
+    python benchmarks/bench_wav_concat.py --chunks 200 --seconds-per-chunk 60
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend"))
+
+SAMPLE_RATE = 22050
+
+
+def write_chunks(out_dir: str, count: int, seconds: float) -> list[str]:
+    frames = bytes(range(256)) * int(SAMPLE_RATE * seconds * 2 / 256)
+    paths = []
+    for i in range(count):
+        path = os.path.join(out_dir, f"chunk_{i:05d}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(frames)
+        paths.append(path)
+    return paths
+
+
+def run_ffmpeg(paths: list[str], output: str) -> None:
+    list_file = os.path.join(os.path.dirname(output), "files.txt")
+    with open(list_file, "w") as f:
+        for path in paths:
+            f.write(f"file '{path}'\n")
+    subprocess.run(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", output],
+                   check=True, capture_output=True)
+
+
+def run_inprocess(paths: list[str], output: str) -> None:
+    from wav import concatenate_wavs
+    concatenate_wavs(paths, output)
+
+
+def measure(method: str, chunk_dir: str) -> dict:
+    """Child-process entry point: concatenate once and report time and peak RSS."""
+    paths = sorted(os.path.join(chunk_dir, n) for n in os.listdir(chunk_dir) if n.endswith(".wav"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        output = os.path.join(out_dir, "out.wav")
+        start = time.perf_counter()
+        {"ffmpeg": run_ffmpeg, "inprocess": run_inprocess}[method](paths, output)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(output)
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "method": method,
+        "seconds": round(seconds, 4),
+        "peak_rss_kb": max(self_rss, child_rss),
+        "processes_spawned": 1 if method == "ffmpeg" else 0,
+        "output_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=100)
+    parser.add_argument("--seconds-per-chunk", type=float, default=30.0)
+    parser.add_argument("--measure", choices=["ffmpeg", "inprocess"], help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.chunk_dir)))
+        return
+
+    methods = ["inprocess"] + (["ffmpeg"] if shutil.which("ffmpeg") else [])
+    with tempfile.TemporaryDirectory() as chunk_dir:
+        write_chunks(chunk_dir, args.chunks, args.seconds_per_chunk)
+        results = []
+        for method in methods:
+            out = subprocess.run([sys.executable, __file__, "--measure", method, "--chunk-dir", chunk_dir],
+                                 check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out))
+
+    json.dump({
+        "benchmark": "wav_concat",
+        "chunks": args.chunks,
+        "seconds_per_chunk": args.seconds_per_chunk,
+        "skipped": [] if "ffmpeg" in methods else ["ffmpeg (not installed)"],
+        "results": results,
+    }, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
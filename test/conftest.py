@@ -0,0 +1,91 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+# The backend modules import each other by bare name (``import tasks``), the
+# same way they run inside the container, so put Backend/ on the path.
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend")
+sys.path.insert(0, BACKEND_DIR)
+
+# Default to in-memory Celery transports so unit tests don't need Redis.
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+# Workers serve metrics on a port; nothing in the test process should bind one.
+os.environ.setdefault("WORKER_METRICS_PORT", "0")
+
+
+class CountingStubTTS:
+    """Stub model that records every text it is asked to synthesize."""
+
+    def __init__(self):
+        from stub_tts import StubTTS
+
+        self.model = StubTTS()
+        self.synthesizer = self.model.synthesizer
+        self.loads = 0
+        self.texts = []
+
+    def load(self):
+        self.loads += 1
+        return self
+
+    def tts(self, text):
+        self.texts.append(text)
+        return self.model.tts(text)
+
+    def tts_to_file(self, text, file_path):
+        self.texts.append(text)
+        self.model.tts_to_file(text=text, file_path=file_path)
+
+
+@pytest.fixture
+def stub_pipeline(tmp_path, monkeypatch):
+    """Run conversions in-process with the stub model inside a scratch static/ dir."""
+    import admission
+    import audio_index
+    import tasks
+    from celery_config import celery_app
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("static", "audio"))
+    monkeypatch.setattr(tasks, "AUDIO_DIR_CANDIDATES", [os.path.join("static", "audio")])
+    # Both are probed once per process; start each test from its own scratch dir
+    monkeypatch.setattr(tasks, "audio_dir", None)
+    monkeypatch.setattr(tasks, "storage", None)
+    monkeypatch.setattr(audio_index, "_index", audio_index.MemoryAudioIndex())
+    monkeypatch.setattr(admission, "_backlog", admission.MemoryBacklog())
+    monkeypatch.setitem(celery_app.conf, "task_always_eager", True)
+
+    model = CountingStubTTS()
+    monkeypatch.setattr(tasks, "get_tts_model", model.load)
+    return model
+
+
+# Stands in for ffmpeg: records its arguments, then "compresses" by keeping every
+# fourth byte, streaming as it goes when the output is pipe:1
+FAKE_FFMPEG = f"""#!{sys.executable}
+""" + textwrap.dedent("""
+    import os, sys
+    if os.environ.get("FAKE_FFMPEG_FAIL"):
+        sys.stderr.write("Unknown encoder 'libopus'\\n")
+        sys.exit(1)
+    out = sys.stdout.buffer if sys.argv[-1] == "pipe:1" else open(sys.argv[-1], "wb")
+    out.write(" ".join(sys.argv[1:-1]).encode() + b"\\n")
+    while block := sys.stdin.buffer.read(4096):
+        out.write(block[::4])
+        out.flush()
+    out.close()
+""")
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    import encoders
+
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG)
+    path.chmod(0o755)
+    monkeypatch.setattr(encoders, "FFMPEG_BINARY", str(path))
+    return path
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from billiard.exceptions import TimeLimitExceeded
+from celery.signals import task_failure
+from fastapi.testclient import TestClient
+
+import admission
+import main
+import tasks
+from celery_config import LARGE_QUEUE, SMALL_QUEUE
+from chunk_cache import ChunkCache
+from segments import chunk_path
+from test_extraction import make_epub
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backlog(request):
+    if request.param == "memory":
+        return admission.MemoryBacklog(window=100, entry_ttl=3600, idle_ttl=600)
+    fakeredis = pytest.importorskip("fakeredis")
+    backlog = admission.RedisBacklog("redis://localhost:6379/0", window=100, entry_ttl=3600, idle_ttl=600)
+    backlog.client = fakeredis.FakeRedis(decode_responses=True)
+    return backlog
+
+
+class BrokenBacklog:
+    def pending(self, queue, now=None):
+        raise ConnectionError("redis is down")
+
+
+def upload(client: TestClient, epub: bytes | None = None):
+    return client.post("/upload", files={"file": ("book.epub", epub or make_epub(), "application/epub+zip")})
+
+
+def test_backlog_counts_outstanding_characters_per_queue(backlog):
+    backlog.track("a", SMALL_QUEUE, 1_000, now=0)
+    backlog.track("b", SMALL_QUEUE, 500, now=0)
+    backlog.track("c", LARGE_QUEUE, 300_000, now=0)
+    backlog.progress("a", 400, now=10)
+    backlog.progress("unknown", 400, now=10)
+
+    assert backlog.pending(SMALL_QUEUE, now=20) == (2, 1_100)
+    assert backlog.pending(LARGE_QUEUE, now=20) == (1, 300_000)
+
+    # Retries resume the job where it got to; finished jobs drop out
+    backlog.track("a", SMALL_QUEUE, 1_000, now=30)
+    backlog.forget("b")
+    assert backlog.pending(SMALL_QUEUE, now=40) == (1, 600)
+    # An entry nobody restarted within the TTL belongs to a lost task
+    assert backlog.pending(LARGE_QUEUE, now=3_601) == (0, 0)
+
+
+def test_running_jobs_that_go_quiet_are_dropped(backlog):
+    backlog.track("queued", SMALL_QUEUE, 1_000, now=0)
+    backlog.track("running", SMALL_QUEUE, 1_000, now=0)
+    backlog.progress("running", 100, now=50)
+
+    assert backlog.pending(SMALL_QUEUE, now=600) == (2, 1_900)
+    # Killed mid-book: no progress for longer than a task may run
+    assert backlog.pending(SMALL_QUEUE, now=651) == (1, 1_000)
+
+
+def test_jobs_killed_by_the_worker_leave_the_backlog(stub_pipeline):
+    admission.get_backlog().track("killed", SMALL_QUEUE, 1_000)
+
+    task_failure.send(sender=tasks.convert_text_to_audio, task_id="killed", exception=TimeLimitExceeded(2400))
+
+    assert admission.get_backlog().pending(SMALL_QUEUE) == (0, 0)
+
+
+def test_throughput_covers_the_recent_window(backlog):
+    backlog.track("a", SMALL_QUEUE, 100_000, now=0)
+    backlog.progress("a", 2_000, now=5)
+    backlog.progress("a", 3_000, now=95)
+    # Cache hits finish part of the job without costing the workers any time
+    backlog.progress("a", 10_000, synthesized=False, now=95)
+
+    assert backlog.pending(SMALL_QUEUE, now=99) == (1, 85_000)
+    assert backlog.throughput(SMALL_QUEUE, now=99) == 50.0
+    assert backlog.throughput(LARGE_QUEUE, now=99) == 0.0
+    # The first slice has left the window
+    assert backlog.throughput(SMALL_QUEUE, now=105) == 30.0
+
+
+def test_only_chunks_the_model_synthesized_count_as_throughput(stub_pipeline, tmp_path):
+    backlog = admission.get_backlog()
+    cache = ChunkCache(str(tmp_path / "chunks"), tasks.TTS_MODEL_NAME)
+    texts = ["Written by the failed attempt.", "Found in the chunk cache.", "Synthesized on the retry."]
+    out = tmp_path / "job"
+    out.mkdir()
+    backlog.track("job", SMALL_QUEUE, sum(map(len, texts)))
+    tasks.synthesize_chunk(texts[0], chunk_path(str(out), 0), job_id="job")
+    tasks.synthesize_chunk(texts[1], str(tmp_path / "another-book.wav"), cache)
+
+    backlog.track("job", SMALL_QUEUE, sum(map(len, texts)))
+    tasks.synthesize_chunks(texts, str(out), cache, pool_size=0, job_id="job")
+
+    assert backlog.pending(SMALL_QUEUE) == (0, 0)
+    assert backlog.throughput(SMALL_QUEUE) * backlog.window == pytest.approx(len(texts[0]) + len(texts[2]))
+
+
+def test_admission_refuses_when_the_wait_exceeds_the_slo(backlog, monkeypatch):
+    monkeypatch.setattr(admission, "MIN_CHARS_PER_SECOND", 1)
+    backlog.track("queued", SMALL_QUEUE, 50_000, now=0)
+    backlog.progress("queued", 10_000, now=50)
+
+    # 40,000 characters ahead at 100/s
+    accepted = admission.admit(2_000, backlog, slo=600, now=99)
+    assert accepted.admitted and accepted.estimated_seconds == 420
+    refused = admission.admit(2_000, backlog, slo=300, now=99)
+    assert not refused.admitted and refused.retry_after == 100
+    assert admission.admit(2_000, backlog, slo=0, now=99).admitted
+
+
+def test_a_long_book_is_admitted_while_its_queue_is_short(backlog, monkeypatch):
+    monkeypatch.setattr(admission, "MIN_CHARS_PER_SECOND", 100)
+
+    decision = admission.admit(5_000_000, backlog, slo=600, now=0)
+
+    assert decision.admitted and decision.queue == LARGE_QUEUE
+    assert decision.estimated_seconds == 50_000
+
+
+def test_an_unreadable_backlog_admits_without_an_estimate():
+    decision = admission.admit(2_000, BrokenBacklog(), slo=1)
+    assert decision.admitted and decision.estimated_seconds is None
+
+
+def test_upload_gets_an_estimate_and_drains_its_backlog(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    client = TestClient(main.app)
+
+    response = upload(client)
+
+    assert response.status_code == 200
+    assert response.json()["estimated_completion_seconds"] >= 0
+    backlog = admission.get_backlog()
+    assert backlog.pending(SMALL_QUEUE) == (0, 0)
+    assert backlog.throughput(SMALL_QUEUE) > 0
+    queues = client.get("/health").json()["queues"]
+    assert queues[SMALL_QUEUE]["jobs"] == 0
+
+
+def test_upload_over_the_slo_gets_429_with_retry_after(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(admission, "ADMISSION_SLO_SECONDS", 60)
+    monkeypatch.setattr(admission, "MIN_CHARS_PER_SECOND", 100)
+    monkeypatch.setattr(tasks.convert_document, "apply_async", lambda *a, **kw: pytest.fail("queued"))
+    # Every scan slot is taken, which the refusal doesn't wait for
+    monkeypatch.setattr(main, "scan_slots", asyncio.Semaphore(0))
+    # Ten minutes of work ahead
+    admission.get_backlog().track("earlier", SMALL_QUEUE, 60_000)
+
+    response = upload(TestClient(main.app))
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "540"
+    # Refused from the declared size, before a byte was spooled
+    assert not os.path.exists("uploads")
+    assert admission.get_backlog().pending(SMALL_QUEUE)[0] == 1
+
+
+def test_admission_is_decided_again_once_the_upload_has_arrived(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(admission, "ADMISSION_SLO_SECONDS", 60)
+    monkeypatch.setattr(admission, "MIN_CHARS_PER_SECOND", 100)
+    monkeypatch.setattr(tasks.convert_document, "apply_async", lambda *a, **kw: pytest.fail("queued"))
+    spool = main.uploads.spool_upload
+
+    async def spool_while_the_backlog_grows(*args, **kwargs):
+        admission.get_backlog().track("earlier", SMALL_QUEUE, 60_000)
+        return await spool(*args, **kwargs)
+
+    monkeypatch.setattr(main.uploads, "spool_upload", spool_while_the_backlog_grows)
+
+    response = upload(TestClient(main.app))
+
+    assert response.status_code == 429
+    # Nothing is left behind for a job that was never queued
+    assert os.listdir("uploads") == []
+
+
+def test_uploads_wait_for_a_scan_slot(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(main, "SCAN_WAIT_SECONDS", 0.05)
+    # Every slot is taken
+    monkeypatch.setattr(main, "scan_slots", asyncio.Semaphore(0))
+
+    response = upload(TestClient(main.app))
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    # Refused before a byte was spooled
+    assert not os.path.exists("uploads")
+
+
+def test_document_parses_are_limited_per_worker(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "parse_slots", threading.BoundedSemaphore(2))
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_pages(path, ext):
+        with lock:
+            active.append(path)
+            peak.append(len(active))
+        try:
+            time.sleep(0.05)
+            yield f"Page text of {os.path.basename(path)} long enough to read aloud."
+        finally:
+            with lock:
+                active.remove(path)
+
+    monkeypatch.setattr(tasks, "iter_document_pages", slow_pages)
+    os.makedirs("uploads", exist_ok=True)
+    threads = [threading.Thread(target=tasks.convert_document.apply, args=[[f"book-{i}.pdf", ".pdf"]])
+               for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(peak) == 6 and max(peak) == 2
@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from audio_cache import AudioCache, file_key, text_key
+
+TEST_PDF = os.path.join(os.path.dirname(__file__), "Tts Test Audiobook.pdf")
+
+
+@pytest.fixture
+def client(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(main, "audio_cache", AudioCache(os.path.join("static", "audio")))
+    return TestClient(main.app)
+
+
+def upload(client, name="Tts Test Audiobook.pdf"):
+    with open(TEST_PDF, "rb") as f:
+        return client.post("/upload", files={"file": (name, f, "application/pdf")})
+
+
+def test_second_identical_upload_skips_synthesis(client, stub_pipeline):
+    first = upload(client)
+    assert first.status_code == 200
+    assert first.json()["status"] == "processing"
+    assert stub_pipeline.loads >= 1
+    loads = stub_pipeline.loads
+
+    second = upload(client)
+    assert second.status_code == 200
+    body = second.json()
+    assert body["status"] == "completed"
+    assert body["cached"] is True
+    assert body["task_id"] == first.json()["task_id"]
+    assert os.path.exists(os.path.join("static", "audio", body["audio_filename"]))
+    assert stub_pipeline.loads == loads
+
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] == 1
+    assert stats["misses"] >= 1
+
+
+def test_pending_entry_is_shared_then_expires(tmp_path):
+    cache = AudioCache(str(tmp_path), pending_ttl=60)
+    cache.mark_pending(["k"], "task-1")
+    assert cache.lookup("k")["task_id"] == "task-1"
+
+    cache.pending_ttl = 0
+    time.sleep(0.01)
+    assert cache.lookup("k") is None
+    assert cache.stats()["pending_hits"] == 1
+
+
+def test_retention_is_the_only_evictor(stub_pipeline):
+    import audio_index
+    import retention
+    from storage import LocalStorage
+
+    audio_dir = os.path.join("static", "audio")
+    cache = AudioCache(audio_dir)
+    index = audio_index.get_audio_index()
+    for i in range(3):
+        with open(os.path.join(audio_dir, f"{i}.wav"), "wb") as f:
+            f.write(b"x" * 100)
+        index.add(f"{i}.wav", 100, created=i)
+        cache.store([f"key{i}"], f"{i}.wav", audio_bytes=100)
+    # Storing never deletes audio, however much there is
+    assert all(os.path.exists(os.path.join(audio_dir, f"{i}.wav")) for i in range(3))
+
+    # A hit counts as a use of the file in the index the quota is enforced by
+    assert cache.lookup("key0")["audio_filename"] == "0.wav"
+    assert retention.enforce_quota(LocalStorage(audio_dir), index, quota=250) == (1, 100)
+    assert not os.path.exists(os.path.join(audio_dir, "1.wav"))
+    assert cache.lookup("key1") is None
+    assert cache.lookup("key0")["audio_filename"] == "0.wav"
+
+
+def test_keys_depend_on_model_and_content():
+    assert file_key(b"abc", "m1") != file_key(b"abc", "m2")
+    assert file_key(b"abc", "m1") != file_key(b"abd", "m1")
+    assert text_key("hello", "m1") != file_key(b"hello", "m1")
@@ -0,0 +1,166 @@
+import asyncio
+import os
+from email.utils import formatdate
+
+import pytest
+from fastapi.testclient import TestClient
+
+import audio_serving
+import main
+
+BIG_FILE_BYTES = 300 * 1024 * 1024
+# Recognizable bytes at a few offsets of the otherwise sparse big file
+MARKERS = {0: b"RIFF-start", 150 * 1024 * 1024: b"middle-of-book", BIG_FILE_BYTES - 8: b"the-end!"}
+
+
+@pytest.fixture
+def audio_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("static", "audio"))
+    files = audio_serving.AudioFiles(os.path.join("static", "audio"))
+    monkeypatch.setattr(main, "audio_files", files)
+    return tmp_path / "static" / "audio"
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def big_file(audio_dir):
+    path = audio_dir / "book.ogg"
+    with open(path, "wb") as f:
+        f.truncate(BIG_FILE_BYTES)
+        for offset, marker in MARKERS.items():
+            f.seek(offset)
+            f.write(marker)
+    return path
+
+
+def test_range_requests_on_a_large_file(big_file, client):
+    middle = 150 * 1024 * 1024
+
+    response = client.get("/stream/book.ogg", headers={"Range": f"bytes={middle}-{middle + 13}"})
+    assert response.status_code == 206
+    assert response.content == b"middle-of-book"
+    assert response.headers["content-range"] == f"bytes {middle}-{middle + 13}/{BIG_FILE_BYTES}"
+    assert response.headers["content-type"] == "audio/ogg"
+
+    response = client.get("/stream/book.ogg", headers={"Range": "bytes=-8"})
+    assert response.status_code == 206
+    assert response.content == b"the-end!"
+
+    response = client.get("/download/book.ogg", headers={"Range": "bytes=0-9"})
+    assert response.content == b"RIFF-start"
+    assert response.headers["content-disposition"] == 'attachment; filename="book.ogg"'
+
+
+def test_unsatisfiable_range(big_file, client):
+    response = client.get("/stream/book.ogg", headers={"Range": f"bytes={BIG_FILE_BYTES}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{BIG_FILE_BYTES}"
+
+
+def test_head_sends_validators_without_the_body(big_file, client):
+    response = client.head("/download/book.ogg")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(BIG_FILE_BYTES)
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_etag_is_derived_from_content(audio_dir, client):
+    (audio_dir / "a.wav").write_bytes(b"same audio")
+    (audio_dir / "b.wav").write_bytes(b"same audio")
+    (audio_dir / "c.wav").write_bytes(b"other audio")
+
+    tags = [client.get(f"/stream/{name}").headers["etag"] for name in ("a.wav", "b.wav", "c.wav")]
+
+    assert tags[0] == tags[1] != tags[2]
+    assert tags[0] == audio_serving.content_etag(str(audio_dir / "a.wav"))
+    assert not tags[0].startswith("W/")
+
+
+def test_conditional_requests(big_file, client):
+    first = client.get("/stream/book.ogg", headers={"Range": "bytes=0-0"})
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    response = client.get("/stream/book.ogg", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get("/stream/book.ogg", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    # If-None-Match wins over If-Modified-Since
+    response = client.get("/stream/book.ogg", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified,
+                                                        "Range": "bytes=0-9"})
+    assert response.status_code == 206
+
+    older = formatdate(os.stat(big_file).st_mtime - 60, usegmt=True)
+    response = client.get("/stream/book.ogg", headers={"If-Modified-Since": older, "Range": "bytes=0-9"})
+    assert response.status_code == 206
+
+
+def test_if_range_with_a_stale_etag_sends_the_whole_file(audio_dir, client):
+    (audio_dir / "short.wav").write_bytes(b"0123456789")
+
+    response = client.get("/stream/short.wav", headers={"Range": "bytes=2-4", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.content == b"0123456789"
+
+    etag = response.headers["etag"]
+    response = client.get("/stream/short.wav", headers={"Range": "bytes=2-4", "If-Range": etag})
+    assert response.status_code == 206 and response.content == b"234"
+
+
+def test_stat_results_and_hashes_are_cached(big_file, client):
+    for start in range(0, 10 * 4096, 4096):
+        assert client.get("/stream/book.ogg", headers={"Range": f"bytes={start}-{start + 1}"}).status_code == 206
+
+    stats = main.audio_files.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 9
+    assert stats["hashes"] == 1
+
+
+def test_expired_entries_are_only_rehashed_when_the_file_changed(audio_dir):
+    now = [0.0]
+    files = audio_serving.AudioFiles(str(audio_dir), ttl=10, clock=lambda: now[0])
+    path = audio_dir / "book.wav"
+    path.write_bytes(b"first")
+
+    first = asyncio.run(files.info("book.wav"))
+    now[0] = 11
+    assert asyncio.run(files.info("book.wav")).etag == first.etag
+    assert files.hashes == 1 and files.misses == 2
+
+    path.write_bytes(b"second take")
+    assert asyncio.run(files.info("book.wav")).etag == first.etag  # still fresh
+    now[0] = 22
+    assert asyncio.run(files.info("book.wav")).etag != first.etag
+    assert files.hashes == 2
+
+    path.unlink()
+    now[0] = 33
+    assert asyncio.run(files.info("book.wav")) is None
+
+
+def test_files_deleted_while_cached_are_not_found(audio_dir, client):
+    path = audio_dir / "swept.wav"
+    path.write_bytes(b"0123456789")
+    assert client.get("/stream/swept.wav").status_code == 200
+
+    # The retention sweep deletes it inside the cache window
+    path.unlink()
+
+    assert client.get("/stream/swept.wav").status_code == 404
+    assert client.get("/download/swept.wav").status_code == 404
+    assert main.audio_files.stats()["entries"] == 0
+
+
+def test_missing_and_invalid_files(audio_dir, client):
+    assert client.get("/stream/missing.ogg").status_code == 404
+    assert client.get("/download/missing.ogg").status_code == 404
+    assert client.get("/download/..%5Csecret").status_code == 400
@@ -0,0 +1,108 @@
+import threading
+import wave
+
+import pytest
+
+import tasks
+from batching import BatchingSynthesizer
+from stub_tts import StubTTS
+
+
+def frames(path):
+    with wave.open(str(path), "rb") as f:
+        return f.readframes(f.getnframes())
+
+
+class RecordingModel(StubTTS):
+    """Stub with a batched entry point that records how it was called."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def tts_to_files(self, texts, paths):
+        self.batches.append(list(texts))
+        errors = []
+        for text, path in zip(texts, paths):
+            try:
+                self.tts_to_file(text, str(path))
+                errors.append(None)
+            except RuntimeError as e:
+                errors.append(e)
+        return errors
+
+
+def test_concurrent_callers_share_batches(tmp_path):
+    model = RecordingModel()
+    batcher = BatchingSynthesizer(model, max_batch_size=4, max_wait=0.2)
+    texts = [f"Chunk number {i} from one of several jobs." for i in range(8)]
+    start = threading.Barrier(len(texts))
+
+    def call(i):
+        start.wait()
+        batcher.tts_to_file(texts[i], tmp_path / f"{i}.wav")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(len(b) for b in model.batches) == [4, 4]
+    assert sorted(t for b in model.batches for t in b) == sorted(texts)
+    for i, text in enumerate(texts):
+        StubTTS().tts_to_file(text, str(tmp_path / "expected.wav"))
+        assert frames(tmp_path / f"{i}.wav") == frames(tmp_path / "expected.wav")
+
+
+def test_lone_chunk_waits_at_most_max_wait(tmp_path):
+    model = RecordingModel()
+    batcher = BatchingSynthesizer(model, max_batch_size=4, max_wait=0.05)
+    batcher.tts_to_file("Nobody else is here.", tmp_path / "alone.wav")
+    assert model.batches == [["Nobody else is here."]]
+
+
+def test_rejected_text_fails_only_its_own_call(tmp_path):
+    batcher = BatchingSynthesizer(StubTTS(), max_batch_size=2, max_wait=0.2)
+    good = batcher.submit("A perfectly fine sentence.", str(tmp_path / "good.wav"))
+    blank = batcher.submit("   ", str(tmp_path / "blank.wav"))
+
+    good.result()
+    with pytest.raises(RuntimeError):
+        blank.result()
+    assert batcher.batches == 1
+
+
+def test_job_keeps_a_batch_of_chunks_in_flight(tmp_path, monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(tasks, "tts_model", BatchingSynthesizer(model, max_batch_size=3, max_wait=0.2))
+    chunks = [f"Sentence number {i} of the book." for i in range(6)]
+    chunks.insert(2, "   ")
+    (tmp_path / "batched").mkdir()
+    (tmp_path / "serial").mkdir()
+
+    batched, _ = tasks.synthesize_chunks(chunks, str(tmp_path / "batched"), pool_size=0)
+    monkeypatch.setattr(tasks, "tts_model", StubTTS())
+    serial, _ = tasks.synthesize_chunks(chunks, str(tmp_path / "serial"), pool_size=0)
+
+    assert max(len(b) for b in model.batches) == 3
+    assert len(model.batches) < len(chunks)
+    assert [p.rsplit("/", 1)[1] for p in batched] == [p.rsplit("/", 1)[1] for p in serial]
+    assert "chunk_2.wav" not in [p.rsplit("/", 1)[1] for p in batched]
+    assert [frames(p) for p in batched] == [frames(p) for p in serial]
+
+
+def test_batch_size_one_keeps_the_model_unbatched(tmp_path):
+    model = RecordingModel()
+    batcher = BatchingSynthesizer(model, max_batch_size=1, max_wait=0.2)
+    threads = [threading.Thread(target=batcher.tts_to_file, args=[f"Sentence {i}.", str(tmp_path / f"{i}.wav")])
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every chunk went through the model's own tts_to_file, never the batched entry point
+    assert model.batches == []
+    assert batcher.chunks == 3 and batcher.batches == 3
+    assert all(frames(tmp_path / f"{i}.wav") for i in range(3))
@@ -0,0 +1,42 @@
+import os
+import sys
+
+from conftest import BACKEND_DIR
+
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "benchmarks"))
+import bench_suite  # noqa: E402
+
+
+def result(median_ms: float, **params) -> dict:
+    return {"params": params or {"chars": 1000}, "median_ms": median_ms}
+
+
+def test_comparison_flags_slowdowns_beyond_the_tolerance():
+    baseline = {"a": result(10.0), "b": result(10.0), "c": result(10.0), "d": result(0.05),
+                "e": result(10.0, chars=5)}
+    current = {"a": result(14.0), "b": result(11.0), "c": result(6.0), "d": result(0.1),
+               "e": result(20.0), "f": result(1.0)}
+
+    comparison = bench_suite.compare(current, baseline, tolerance=0.25)
+
+    assert {name: entry["status"] for name, entry in comparison.items()} == {
+        "a": "regression",
+        "b": "ok",
+        "c": "improvement",
+        # Doubled, but by less than timer noise
+        "d": "ok",
+        "e": "params_changed",
+        "f": "new",
+    }
+    assert comparison["a"]["change"] == 0.4
+
+
+def test_quick_cases_run_on_deterministic_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert bench_suite.book_text(5_000) == bench_suite.book_text(5_000)
+
+    results = bench_suite.run_suite(["make_chunks", "wav_concat"], repeat=2, quick=True)
+
+    for name, entry in results.items():
+        assert entry["params"] == bench_suite.SIZES[name][1]
+        assert entry["runs"] == 2 and entry["median_ms"] > 0 and entry["throughput"] > 0
@@ -0,0 +1,134 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+from celery.exceptions import SoftTimeLimitExceeded
+
+import segments
+import tasks
+from celery_config import celery_app
+from conftest import BACKEND_DIR
+
+SENTENCES = [f"This is sentence number {i} of a fairly long book." for i in range(12)]
+TEXT = " ".join(SENTENCES)
+
+# A worker process running one conversion with a slow stub model, to be killed mid-run
+WORKER = textwrap.dedent("""
+    import os, sys, time
+    sys.path.insert(0, {backend!r})
+    import tasks
+    from celery_config import celery_app
+    from stub_tts import StubTTS
+
+    celery_app.conf.task_always_eager = True
+    tasks.AUDIO_DIR_CANDIDATES = [os.path.join("static", "audio")]
+    tasks.CHUNK_CACHE_ENABLED = False
+    tasks.MAX_CHARS, tasks.MIN_CHARS = 60, 10
+    model = StubTTS()
+
+    class SlowModel:
+        def tts_to_file(self, text, file_path):
+            model.tts_to_file(text=text, file_path=file_path)
+            time.sleep(0.2)
+
+    slow = SlowModel()
+    tasks.get_tts_model = lambda: slow
+    tasks.convert_text_to_audio.apply(args=[sys.argv[1]], task_id="job-1")
+""")
+
+
+def configure(monkeypatch):
+    monkeypatch.setattr(tasks, "CHUNK_CACHE_ENABLED", False)
+    monkeypatch.setattr(tasks, "MAX_CHARS", 60)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+
+
+def job_chunks(task_id: str) -> list[str]:
+    job_dir = segments.job_dir_for(os.path.join("static", "audio"), task_id)
+    return sorted(name for name in os.listdir(job_dir) if name.endswith(".wav"))
+
+
+def read_audio(name: str) -> bytes:
+    with open(os.path.join("static", "audio", name), "rb") as f:
+        return f.read()
+
+
+def clean_run(stub_pipeline) -> bytes:
+    """Output of the same book converted without interruption."""
+    result = tasks.convert_text_to_audio.apply(args=[TEXT], task_id="clean").get()
+    del stub_pipeline.texts[:]
+    return read_audio(result["audio_filename"])
+
+
+def test_retry_after_soft_time_limit_resumes_at_the_first_missing_chunk(stub_pipeline, monkeypatch):
+    configure(monkeypatch)
+    expected = clean_run(stub_pipeline)
+    synthesize = stub_pipeline.tts_to_file
+    attempts = []
+
+    def hits_time_limit(text, file_path):
+        if text == SENTENCES[5] and not attempts:
+            attempts.append(text)
+            raise SoftTimeLimitExceeded()
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", hits_time_limit)
+    # Let apply() run the retry inline instead of raising Retry
+    monkeypatch.setitem(celery_app.conf, "task_eager_propagates", False)
+
+    result = tasks.convert_text_to_audio.apply(args=[TEXT], task_id="job-1").get()
+
+    assert attempts
+    assert result["chunks_resumed"] == 5
+    # Every chunk was synthesized exactly once across both attempts
+    assert sorted(stub_pipeline.texts) == sorted(SENTENCES)
+    assert read_audio(result["audio_filename"]) == expected
+
+
+def test_killed_worker_is_resumed_by_redelivery(stub_pipeline, tmp_path, monkeypatch):
+    configure(monkeypatch)
+    expected = clean_run(stub_pipeline)
+    script = tmp_path / "worker.py"
+    script.write_text(WORKER.format(backend=BACKEND_DIR))
+    worker = subprocess.Popen([sys.executable, str(script), TEXT], cwd=tmp_path)
+    try:
+        deadline = time.monotonic() + 30
+        job_dir = segments.job_dir_for(os.path.join("static", "audio"), "job-1")
+        while time.monotonic() < deadline:
+            if os.path.isdir(job_dir) and len(job_chunks("job-1")) >= 4:
+                break
+            time.sleep(0.02)
+        worker.send_signal(signal.SIGKILL)
+    finally:
+        worker.wait(timeout=30)
+    assert worker.returncode == -signal.SIGKILL
+    survivors = len(job_chunks("job-1"))
+    assert 4 <= survivors < len(SENTENCES)
+
+    # The broker hands the unacknowledged task (same id) to another worker
+    result = tasks.convert_text_to_audio.apply(args=[TEXT], task_id="job-1").get()
+
+    assert result["chunks_resumed"] == survivors
+    assert stub_pipeline.texts == SENTENCES[survivors:]
+    assert read_audio(result["audio_filename"]) == expected
+    assert not [name for name in os.listdir(job_dir) if name.endswith(".part")]
+
+
+def test_checkpoints_of_different_text_are_discarded(tmp_path):
+    job_dir = str(tmp_path / "job")
+    segments.start_job(job_dir, ["First chunk.", "Second chunk.", "Third chunk."])
+    for i in range(3):
+        with open(segments.chunk_path(job_dir, i), "wb") as f:
+            f.write(b"RIFF")
+    with open(segments.chunk_path(job_dir, 2) + ".123.456.part", "wb") as f:
+        f.write(b"RIFF")
+
+    # Re-chunked differently from the second chunk on
+    resumed = segments.start_job(job_dir, ["First chunk.", "Second chunk, longer now.", "Third chunk."])
+
+    assert resumed == 2
+    assert sorted(os.listdir(job_dir)) == ["chunk_00000.wav", "chunk_00002.wav", segments.MANIFEST_NAME]
+    assert segments.read_manifest(job_dir)["chunk_ids"][1] == segments.chunk_id("Second chunk, longer now.")
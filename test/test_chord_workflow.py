@@ -0,0 +1,81 @@
+import os
+
+import segments
+import task_status
+import tasks
+from celery_config import celery_app
+from test_extraction import make_epub
+
+TEXT = " ".join(f"This is sentence number {i} of a fairly long book." for i in range(12))
+
+
+def test_chord_runs_eagerly_and_joins_in_order(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CHARS", 60)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+    monkeypatch.setattr(tasks, "CHUNKS_PER_SUBTASK", 5)
+
+    result = tasks.convert_text_to_audio_distributed.apply(args=[TEXT], kwargs={"cache_keys": ["k"]}).get()
+
+    assert result["chunks"] == 12
+    assert os.path.getsize(os.path.join("static", "audio", result["audio_filename"])) > 0
+    # The job's chunks stay published (for live listeners) and are marked finished
+    (job_id,) = os.listdir(os.path.join("static", "audio", ".jobs"))
+    assert segments.read_manifest(segments.job_dir_for(os.path.join("static", "audio"), job_id))["done"]
+    assert stub_pipeline.texts == [f"This is sentence number {i} of a fairly long book." for i in range(12)]
+
+
+def test_retry_only_reruns_missing_chunks(stub_pipeline, monkeypatch, tmp_path):
+    monkeypatch.setattr(tasks, "CHUNK_CACHE_ENABLED", False)
+    texts = ["First chunk of text.", "Second chunk of text.", "Third chunk of text."]
+    failures = []
+    synthesize = stub_pipeline.tts_to_file
+
+    def flaky(text, file_path):
+        if text.startswith("Second") and not failures:
+            failures.append(text)
+            raise OSError("worker lost its scratch disk")
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", flaky)
+    # Let apply() re-run the retry signature instead of raising Retry
+    monkeypatch.setitem(celery_app.conf, "task_eager_propagates", False)
+    job_dir = tmp_path / "job"
+    job_dir.mkdir()
+
+    batch = tasks.synthesize_chunk_batch.apply(args=[str(job_dir), 0, texts]).get()
+
+    assert len(batch["files"]) == 3
+    assert failures
+    # The first chunk survived the failed attempt and wasn't synthesized again
+    assert stub_pipeline.texts.count("First chunk of text.") == 1
+    assert sorted(os.listdir(job_dir)) == ["chunk_00000.wav", "chunk_00001.wav", "chunk_00002.wav"]
+
+
+def test_resumed_batch_reports_checkpointed_and_skipped_chunks(stub_pipeline, monkeypatch, tmp_path):
+    store = task_status.MemoryStatusStore()
+    monkeypatch.setattr(task_status, "_store", store)
+    monkeypatch.setattr(tasks, "CHUNK_CACHE_ENABLED", False)
+    job_dir = tmp_path / "resumed-job"
+    job_dir.mkdir()
+    stub_pipeline.tts_to_file(text="earlier", file_path=segments.chunk_path(str(job_dir), 3))
+    segments.mark_skipped(str(job_dir), 4)
+    stub_pipeline.texts.clear()
+
+    batch = tasks.synthesize_chunk_batch.apply(args=[str(job_dir), 3, ["Kept.", "Rejected.", "New."]]).get()
+
+    assert batch["files"] == [segments.chunk_path(str(job_dir), i) for i in (3, 5)]
+    assert stub_pipeline.texts == ["New."]
+    assert store.get("resumed-job")["chunks_done"] == 3
+
+
+def test_document_conversion_honours_mode(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "CONVERSION_MODE", "chord")
+    os.makedirs("uploads")
+    with open(os.path.join("uploads", "book.epub"), "wb") as f:
+        f.write(make_epub())
+
+    result = tasks.start_document_conversion("book.epub", ".epub").get()
+
+    assert result["chunks"] >= 1
+    # Single-task results count resumed chunks; the chord's join doesn't
+    assert "chunks_resumed" not in result
@@ -0,0 +1,60 @@
+import os
+
+import tasks
+from chunk_cache import ChunkCache, chunk_key
+
+BOILERPLATE = (
+    "Copyright 2024 Orator Press. All rights reserved. "
+    "No part of this book may be reproduced without permission. "
+)
+
+
+def test_shared_chunks_are_synthesized_once(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CHARS", 80)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+
+    first = tasks.convert_text_to_audio.apply(
+        args=[BOILERPLATE + "Chapter one is about a dog who learned to read."]
+    ).get()
+    assert first["chunk_cache_hits"] == 0
+    synthesized = len(stub_pipeline.texts)
+
+    second = tasks.convert_text_to_audio.apply(
+        args=[BOILERPLATE + "Chapter one is about a cat who never did."]
+    ).get()
+    assert second["chunks"] == first["chunks"]
+    assert second["chunk_cache_hits"] == second["chunks"] - 1
+    assert 0 < second["chunk_cache_hit_ratio"] < 1
+    # Only the one new chunk reached the model
+    assert len(stub_pipeline.texts) == synthesized + 1
+    assert stub_pipeline.texts[-1].startswith("Chapter one is about a cat")
+
+
+def test_key_ignores_layout_whitespace_but_not_model():
+    assert chunk_key("Hello  world.\n", "m") == chunk_key("Hello world.", "m")
+    assert chunk_key("Hello world.", "m") != chunk_key("Hello world.", "other")
+
+
+def test_eviction_keeps_cache_under_byte_cap(tmp_path):
+    cache = ChunkCache(str(tmp_path), "m", max_bytes=250)
+    for i in range(5):
+        cache.put(f"sentence {i}", b"x" * 100)
+        os.utime(cache._path(f"sentence {i}"), (i, i))
+    cache.evict()
+
+    assert cache.get("sentence 4") == b"x" * 100
+    assert cache.get("sentence 0") is None
+    _, total = cache._measure()
+    assert total <= 250
+
+
+def test_jobs_share_one_measured_cache_per_process(stub_pipeline, monkeypatch):
+    walks = []
+    measure = ChunkCache._measure
+    monkeypatch.setattr(ChunkCache, "_measure", lambda self: walks.append(self) or measure(self))
+
+    for ending in ("a dog.", "a cat.", "a bird."):
+        tasks.convert_text_to_audio.apply(args=[BOILERPLATE + f"Chapter one is about {ending}"]).get()
+
+    # The first put measures the directory; later jobs reuse the running total
+    assert len(walks) == 1
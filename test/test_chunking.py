@@ -0,0 +1,106 @@
+import random
+import re
+
+import pytest
+
+import chunking
+import tasks
+
+
+def random_text(rng: random.Random, sentences: int) -> str:
+    """Prose with the awkward parts of extracted PDFs: huge unpunctuated runs, long tokens, newlines."""
+    parts = []
+    for _ in range(sentences):
+        kind = rng.random()
+        if kind < 0.05:
+            # A table row or list with no sentence punctuation at all
+            words = [str(rng.randint(0, 10 ** 6)) for _ in range(rng.randint(200, 800))]
+            parts.append(" ".join(words))
+        elif kind < 0.08:
+            parts.append("x" * rng.randint(50, 3000))
+        else:
+            words = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(1, 12)))
+                     for _ in range(rng.randint(1, 40))]
+            for i in range(len(words) - 1):
+                if rng.random() < 0.1:
+                    words[i] += rng.choice([",", ";", ":"])
+            parts.append(" ".join(words).capitalize() + rng.choice([".", "!", "?", '."']))
+    return rng.choice([" ", "\n", "  "]).join(parts)
+
+
+def squeeze(text: str) -> str:
+    return re.sub(r"\s+", "", text)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_chunks_fit_keep_every_character_and_stay_minimal(seed):
+    rng = random.Random(seed)
+    max_chars = rng.choice([80, 300, 2000])
+    text = random_text(rng, rng.randint(1, 120))
+
+    chunks = chunking.make_chunks(text, 10, max_chars)
+
+    assert all(0 < len(chunk) <= max_chars for chunk in chunks)
+    assert squeeze("".join(chunks)) == squeeze(text)
+    assert all(chunk == chunk.strip() for chunk in chunks)
+    # Balancing never costs an extra chunk over plain greedy packing
+    normalized = text.replace("\n", " ")
+    spans = []
+    for start, end in chunking.sentence_spans(normalized):
+        spans.extend(chunking.split_span(normalized, start, end, max_chars))
+    assert len(chunks) == len(chunking._pack(spans, max_chars))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_words_are_only_cut_when_longer_than_a_chunk(seed):
+    rng = random.Random(seed)
+    words = ["".join(rng.choice("klmnop") for _ in range(rng.randint(1, 15))) for _ in range(3000)]
+    text = " ".join(words)  # one giant "sentence"
+
+    chunks = chunking.make_chunks(text, 10, 200)
+
+    assert [w for chunk in chunks for w in chunk.split()] == words
+
+
+def test_oversized_sentence_splits_after_a_clause():
+    clause = "which runs on for a while without stopping"
+    text = ", ".join([clause] * 20) + "."
+
+    chunks = chunking.make_chunks(text, 10, 200)
+
+    assert all(len(c) <= 200 for c in chunks)
+    assert all(c.endswith((",", ".")) for c in chunks)
+
+
+def test_chunks_are_balanced():
+    # Greedy packing gives 1973 + 1973 + 93 chars; balanced chunks come out even
+    sentence = "Nine words of filler text to pad the book out."
+    text = " ".join([sentence] * 86)
+
+    chunks = chunking.make_chunks(text, 50, 2000)
+    lengths = [len(c) for c in chunks]
+
+    assert len(chunks) == 3
+    assert max(lengths) - min(lengths) <= len(sentence) + 1
+
+
+def test_short_tail_is_merged():
+    text = "A first sentence that is long enough. " * 3 + "Tail."
+    assert chunking.make_chunks(text, 20, 80)[-1].endswith("Tail.")
+    assert all(len(c) >= 20 for c in chunking.make_chunks(text, 20, 80))
+
+
+def test_tokenizer_loads_once(monkeypatch):
+    loads = []
+    monkeypatch.setattr(chunking, "_tokenizer_loaded", False)
+    monkeypatch.setattr(chunking, "_tokenizer", None)
+    monkeypatch.setattr(chunking, "_load_punkt", lambda: loads.append(1) or None)
+
+    for _ in range(3):
+        tasks.make_chunks("One sentence. Another sentence follows it.")
+
+    assert loads == [1]
+
+
+def test_empty_text_has_no_chunks():
+    assert chunking.make_chunks(" \n ", 10, 100) == []
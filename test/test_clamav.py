@@ -0,0 +1,191 @@
+import asyncio
+import os
+import socketserver
+import struct
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import clamav
+import main
+import uploads
+
+EICAR_MARKER = b"EICAR-STANDARD-ANTIVIRUS-TEST-FILE"
+
+
+class FakeClamd(socketserver.ThreadingTCPServer):
+    """Just enough of clamd: IDSESSION, PING, INSTREAM (with StreamMaxLength) and END."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, stream_max: int = 25 * 1024 * 1024):
+        super().__init__(("127.0.0.1", 0), FakeClamdHandler)
+        self.stream_max = stream_max
+        self.connections = 0
+        self.scanned_bytes = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class FakeClamdHandler(socketserver.BaseRequestHandler):
+    def recv_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            block = self.request.recv(size - len(data))
+            if not block:
+                raise ConnectionError("client went away")
+            data += block
+        return data
+
+    def command(self) -> bytes:
+        data = b""
+        while not data.endswith(b"\0"):
+            data += self.recv_exact(1)
+        return data[1:-1]
+
+    def handle(self):
+        self.server.connections += 1
+        request_id = 0
+        try:
+            if self.command() != b"IDSESSION":
+                return
+            while True:
+                command = self.command()
+                request_id += 1
+                if command == b"END":
+                    return
+                if command == b"PING":
+                    self.request.sendall(f"{request_id}: PONG\0".encode())
+                elif command == b"INSTREAM":
+                    data = b""
+                    while True:
+                        (size,) = struct.unpack("!L", self.recv_exact(4))
+                        if not size:
+                            break
+                        data += self.recv_exact(size)
+                        if len(data) > self.server.stream_max:
+                            self.request.sendall(f"{request_id}: INSTREAM size limit exceeded. ERROR\0".encode())
+                            return
+                    self.server.scanned_bytes += len(data)
+                    verdict = "Eicar-Test-Signature FOUND" if EICAR_MARKER in data else "OK"
+                    self.request.sendall(f"{request_id}: stream: {verdict}\0".encode())
+        except ConnectionError:
+            pass
+
+
+@pytest.fixture
+def fake_clamd():
+    server = FakeClamd()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sessions_are_reused_across_scans(fake_clamd):
+    client = clamav.AsyncClamd("127.0.0.1", fake_clamd.port)
+
+    async def scan_three():
+        results = [await client.scan_bytes(b"clean %d" % i) for i in range(3)]
+        assert await client.ping()
+        client.close()
+        return results
+
+    assert asyncio.run(scan_three()) == [None, None, None]
+    assert fake_clamd.connections == 1
+
+
+def test_streamed_scan_reports_signature(fake_clamd):
+    client = clamav.AsyncClamd("127.0.0.1", fake_clamd.port)
+
+    async def scan():
+        scan = await client.instream()
+        # The marker straddles two writes, as it would across upload blocks
+        await scan.write(b"x" * 100_000 + EICAR_MARKER[:10])
+        await scan.write(EICAR_MARKER[10:] + b"y" * 100_000)
+        return await scan.result()
+
+    assert asyncio.run(scan()) == "Eicar-Test-Signature"
+
+
+def test_stream_limit_is_an_error_not_an_outage(fake_clamd):
+    client = clamav.AsyncClamd("127.0.0.1", fake_clamd.port, stream_max=1000)
+
+    with pytest.raises(clamav.ClamdError) as error:
+        asyncio.run(client.scan_bytes(b"x" * 1001))
+    assert not isinstance(error.value, clamav.ClamdUnavailable)
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_stops_connecting_after_repeated_failures():
+    now = [0.0]
+    client = clamav.AsyncClamd("127.0.0.1", 1, breaker=clamav.CircuitBreaker(2, 30, clock=lambda: now[0]))
+    attempts = []
+
+    async def refuse():
+        attempts.append(now[0])
+        raise ConnectionRefusedError("refused")
+
+    client._connect = refuse
+
+    async def scan():
+        with pytest.raises(clamav.ClamdUnavailable):
+            await client.instream()
+
+    for _ in range(5):
+        asyncio.run(scan())
+    assert len(attempts) == 2
+    assert client.breaker.state == "open"
+
+    # After the reset timeout exactly one trial connection goes through
+    now[0] = 31
+    assert client.breaker.state == "half_open"
+    asyncio.run(scan())
+    asyncio.run(scan())
+    assert len(attempts) == 3
+    assert client.breaker.state == "open"
+
+
+@pytest.fixture
+def scanning_client(stub_pipeline, fake_clamd, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", True)
+    monkeypatch.setattr(main, "clamd", clamav.AsyncClamd("127.0.0.1", fake_clamd.port))
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_infected_upload_is_rejected(scanning_client, fake_clamd):
+    pdf = b"%PDF-1.4\n" + b"0" * 3 * uploads.UPLOAD_READ_BYTES + EICAR_MARKER
+    response = scanning_client.post("/upload", files={"file": ("bad.pdf", pdf, "application/pdf")})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Malware detected in uploaded file."
+    assert fake_clamd.scanned_bytes == len(pdf)
+    assert not os.listdir(uploads.UPLOAD_DIR)
+
+
+def test_unscannable_upload_is_rejected(scanning_client, monkeypatch):
+    monkeypatch.setattr(main.clamd, "stream_max", uploads.UPLOAD_READ_BYTES)
+    pdf = b"%PDF-1.4\n" + b"0" * 3 * uploads.UPLOAD_READ_BYTES
+
+    response = scanning_client.post("/upload", files={"file": ("big.pdf", pdf, "application/pdf")})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File could not be scanned for malware."
+
+
+def test_clean_uploads_share_one_clamd_session(scanning_client, fake_clamd):
+    from test_extraction import make_epub
+
+    for compress in (False, True):
+        response = scanning_client.post(
+            "/upload", files={"file": ("book.epub", make_epub(compress), "application/epub+zip")}
+        )
+        assert response.status_code == 200
+    assert fake_clamd.connections == 1
+    assert scanning_client.get("/health").json()["antivirus"] == "healthy"
@@ -0,0 +1,148 @@
+import os
+import shutil
+import wave
+
+import pytest
+from fastapi.testclient import TestClient
+
+import encoders
+import tasks
+from stub_tts import StubTTS
+
+TEXT = " ".join(f"This is sentence number {i} of a fairly long book." for i in range(12))
+
+
+def read_fake(path: str) -> tuple[str, bytes]:
+    with open(path, "rb") as f:
+        args, _, data = f.read().partition(b"\n")
+    return args.decode(), data
+
+
+def write_chunk(path, text: str) -> bytes:
+    StubTTS().tts_to_file(text=text, file_path=str(path))
+    with wave.open(str(path), "rb") as f:
+        return f.readframes(f.getnframes())
+
+
+@pytest.mark.parametrize("filename, media_type", [
+    ("book.wav", "audio/wav"), ("book.ogg", "audio/ogg"), ("book.mp3", "audio/mpeg"), ("book.flac", "audio/flac"),
+])
+def test_media_type_follows_the_extension(filename, media_type):
+    assert encoders.media_type_for(filename) == media_type
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unknown audio format"):
+        encoders.output_format("aiff")
+
+
+def test_wav_output_reports_no_savings(stub_pipeline):
+    result = tasks.convert_text_to_audio.apply(args=[TEXT]).get()
+
+    assert result["audio_filename"].endswith(".wav")
+    size = os.path.getsize(os.path.join("static", "audio", result["audio_filename"]))
+    assert result["audio_format"] == "wav"
+    assert result["audio_bytes"] == result["wav_bytes"] == size
+    assert result["bytes_saved"] == 0
+
+
+def test_chunks_are_encoded_while_synthesis_runs(stub_pipeline, fake_ffmpeg, monkeypatch):
+    monkeypatch.setattr(encoders, "AUDIO_FORMAT", "opus")
+    monkeypatch.setattr(tasks, "MAX_CHARS", 60)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+    encoders_made = []
+    new_encoder = tasks.new_encoder
+    monkeypatch.setattr(tasks, "new_encoder", lambda writer: encoders_made.append(new_encoder(writer)) or encoders_made[-1])
+    piped_before_chunk = []
+    synthesize = stub_pipeline.tts_to_file
+
+    def tts_to_file(text, file_path):
+        piped_before_chunk.append(encoders_made[0].pcm_bytes)
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", tts_to_file)
+
+    result = tasks.convert_text_to_audio.apply(args=[TEXT]).get()
+
+    assert len(piped_before_chunk) == 12
+    # Every chunk was already in the encoder by the time the next one started
+    assert piped_before_chunk == sorted(set(piped_before_chunk))
+    assert piped_before_chunk[0] == 0 and piped_before_chunk[-1] > 0
+    assert result["audio_filename"].endswith(".ogg")
+    args, data = read_fake(os.path.join("static", "audio", result["audio_filename"]))
+    assert "-f s16le -ar 16000 -ac 1 -i pipe:0 -c:a libopus" in args
+    assert result["audio_format"] == "opus"
+    assert result["wav_bytes"] == 44 + 4 * len(data)
+    assert result["bytes_saved"] == result["wav_bytes"] - result["audio_bytes"] > 0
+    assert result["compression_ratio"] > 3
+
+
+def test_chord_join_encodes(stub_pipeline, fake_ffmpeg, monkeypatch):
+    monkeypatch.setattr(encoders, "AUDIO_FORMAT", "flac")
+    monkeypatch.setattr(tasks, "MAX_CHARS", 60)
+    monkeypatch.setattr(tasks, "CHUNKS_PER_SUBTASK", 5)
+
+    result = tasks.convert_text_to_audio_distributed.apply(args=[TEXT]).get()
+
+    assert result["audio_filename"].endswith(".flac")
+    args, _ = read_fake(os.path.join("static", "audio", result["audio_filename"]))
+    assert "-c:a flac" in args
+    assert result["audio_format"] == "flac" and result["bytes_saved"] > 0
+
+
+def test_encoder_failure_removes_the_partial_file(tmp_path, fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv("FAKE_FFMPEG_FAIL", "1")
+    write_chunk(tmp_path / "0.wav", "A short chunk of text.")
+    out = tmp_path / "book.mp3"
+    out.write_bytes(b"partial")
+    encoder = encoders.StreamingEncoder(str(out), encoders.output_format("mp3"))
+
+    with pytest.raises(encoders.EncoderError, match="Unknown encoder"):
+        encoder.add(str(tmp_path / "0.wav"))
+        encoder.close()
+    encoder.abort()
+
+    assert not out.exists()
+
+
+def test_mismatched_chunks_are_rejected(tmp_path, fake_ffmpeg):
+    write_chunk(tmp_path / "0.wav", "First chunk.")
+    StubTTS(sample_rate=22050).tts_to_file(text="Second chunk.", file_path=str(tmp_path / "1.wav"))
+    encoder = encoders.StreamingEncoder(str(tmp_path / "book.ogg"), encoders.output_format("opus"))
+    encoder.add(str(tmp_path / "0.wav"))
+
+    with pytest.raises(ValueError, match="does not match"):
+        encoder.add(str(tmp_path / "1.wav"))
+    encoder.abort()
+
+
+def test_download_and_stream_send_the_right_content_type(stub_pipeline):
+    import main
+
+    with open(os.path.join("static", "audio", "book.ogg"), "wb") as f:
+        f.write(b"OggS" + b"\0" * 100)
+    client = TestClient(main.app)
+
+    assert client.get("/download/book.ogg").headers["content-type"] == "audio/ogg"
+    assert client.get("/stream/book.ogg").headers["content-type"] == "audio/ogg"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+@pytest.mark.parametrize("name, magic", [("opus", b"OggS"), ("mp3", None), ("flac", b"fLaC")])
+def test_real_ffmpeg_encodes_each_format(tmp_path, name, magic):
+    frames = 0
+    encoder = encoders.StreamingEncoder(str(tmp_path / f"book{encoders.FORMATS[name].extension}"),
+                                        encoders.output_format(name))
+    for i in range(3):
+        frames += len(write_chunk(tmp_path / f"{i}.wav", f"Chunk number {i} of the book."))
+        encoder.add(str(tmp_path / f"{i}.wav"))
+
+    size = encoder.close()
+
+    data = (tmp_path / f"book{encoders.FORMATS[name].extension}").read_bytes()
+    assert size == len(data) > 0
+    assert encoder.wav_bytes == 44 + frames
+    if magic:
+        assert data.startswith(magic)
+    else:
+        assert data[:3] == b"ID3" or data[0] == 0xFF
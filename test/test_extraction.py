@@ -0,0 +1,73 @@
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import extraction
+import main
+
+TEST_PDF = os.path.join(os.path.dirname(__file__), "Tts Test Audiobook.pdf")
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="c2" href="text/ch2.xhtml" media-type="application/xhtml+xml"/>
+    <item id="c1" href="text/ch1.xhtml" media-type="application/xhtml+xml"/>
+    <item id="css" href="style.css" media-type="text/css"/>
+  </manifest>
+  <spine><itemref idref="c1"/><itemref idref="c2"/></spine>
+</package>"""
+
+CHAPTER = """<html xmlns="http://www.w3.org/1999/xhtml"><head><title>ignored</title>
+<style>p {{ color: red; }}</style></head>
+<body><h1>{title}</h1><p>{body} &amp; more.</p><script>var x = 1;</script></body></html>"""
+
+
+def make_epub(compress: bool = False) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED) as book:
+        book.writestr("mimetype", "application/epub+zip")
+        book.writestr("META-INF/container.xml", CONTAINER)
+        book.writestr("OEBPS/content.opf", OPF)
+        book.writestr("OEBPS/text/ch1.xhtml", CHAPTER.format(title="Chapter One", body="It was a dark night"))
+        book.writestr("OEBPS/text/ch2.xhtml", CHAPTER.format(title="Chapter Two", body="Morning came"))
+        book.writestr("OEBPS/style.css", "p {}")
+    return buf.getvalue()
+
+
+def test_epub_chapters_follow_spine_order():
+    chapters = list(extraction.iter_epub_chapters(make_epub()))
+    assert chapters == [
+        "Chapter One\nIt was a dark night & more.",
+        "Chapter Two\nMorning came & more.",
+    ]
+
+
+def test_pdf_pages_are_yielded_lazily():
+    with open(TEST_PDF, "rb") as f:
+        pages = extraction.iter_document_pages(f.read(), ".pdf")
+        first = next(pages)
+    assert first.strip()
+    pages.close()
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError):
+        extraction.extract_text(b"", ".txt")
+
+
+def test_epub_upload_is_converted(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    client = TestClient(main.app)
+
+    response = client.post("/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")})
+
+    assert response.status_code == 200
+    assert "Morning came" in " ".join(stub_pipeline.texts)
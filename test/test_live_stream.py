@@ -0,0 +1,112 @@
+import os
+import socket
+import threading
+import time
+import wave
+
+import httpx
+import pytest
+import uvicorn
+
+import main
+import segments
+import task_status
+import tasks
+
+CHUNK_SECONDS = 0.4
+TEXT = " ".join(f"Paragraph {i} of the audiobook, read aloud as it is written." for i in range(5))
+
+
+@pytest.fixture
+def server(stub_pipeline):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    srv = uvicorn.Server(uvicorn.Config(main.app, log_level="warning"))
+    thread = threading.Thread(target=srv.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not srv.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    srv.should_exit = True
+    thread.join()
+
+
+def test_first_audio_arrives_after_one_chunk(server, stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CHARS", 70)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+    monkeypatch.setattr(tasks, "CHUNK_CACHE_ENABLED", False)
+    monkeypatch.setattr(segments, "LIVE_POLL_INTERVAL", 0.02)
+    synthesize = stub_pipeline.tts_to_file
+
+    def slow_tts_to_file(text, file_path):
+        time.sleep(CHUNK_SECONDS)
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", slow_tts_to_file)
+
+    # The API records an upload as queued before handing out its id
+    task_status.report("live-job", stage="queued")
+    job = threading.Thread(target=tasks.convert_text_to_audio.apply,
+                           kwargs={"args": [TEXT], "task_id": "live-job"})
+    start = time.perf_counter()
+    job.start()
+
+    first_audio = None
+    body = b""
+    with httpx.stream("GET", f"{server}/stream/live/live-job", timeout=30) as response:
+        assert response.headers["content-type"] == "audio/wav"
+        for data in response.iter_bytes():
+            body += data
+            if first_audio is None and len(body) > 44:
+                first_audio = time.perf_counter() - start
+    finished = time.perf_counter() - start
+    job.join()
+
+    print(f"time to first audio {first_audio:.2f}s, full book {finished:.2f}s")
+    assert first_audio < 2 * CHUNK_SECONDS
+    assert finished >= 5 * CHUNK_SECONDS
+
+    # The stream carries every chunk's frames, in order, behind one header
+    job_dir = segments.job_dir_for(os.path.join("static", "audio"), "live-job")
+    frames = b""
+    for i in range(5):
+        with wave.open(segments.chunk_path(job_dir, i), "rb") as f:
+            frames += f.readframes(f.getnframes())
+    assert body[:4] == b"RIFF"
+    assert body[44:] == frames
+
+
+def test_failed_job_ends_stream(stub_pipeline, tmp_path):
+    import asyncio
+
+    job_dir = str(tmp_path / "job")
+    segments.write_manifest(job_dir, total=3, failed="model crashed")
+
+    async def collect():
+        return [part async for part in segments.iter_live_wav(job_dir, poll_interval=0.01, idle_timeout=1)]
+
+    assert asyncio.run(collect()) == []
+
+
+def test_unknown_or_finished_tasks_have_no_live_stream(stub_pipeline):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    assert client.get("/stream/live/no-such-task").status_code == 404
+    # Finished long enough ago that its job directory was pruned
+    task_status.report("old-job", stage="completed", audio_filename="old.wav")
+    assert client.get("/stream/live/old-job").status_code == 404
+
+
+def test_queued_job_stream_gives_up_after_the_start_timeout(stub_pipeline, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(segments, "LIVE_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(segments, "LIVE_START_TIMEOUT", 0.1)
+    task_status.report("queued-job", stage="queued")
+
+    start = time.perf_counter()
+    response = TestClient(main.app).get("/stream/live/queued-job")
+
+    assert response.status_code == 200 and response.content == b""
+    assert time.perf_counter() - start < 5
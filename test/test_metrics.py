@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import logs
+import main
+import metrics
+import tasks
+from chunk_cache import ChunkCache
+from test_extraction import make_epub
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def stage_count(stage: str) -> float:
+    return sample("orator_stage_seconds_count", stage=stage)
+
+
+def test_upload_records_every_stage(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    stages = ["upload_spool", "queue_wait", "extraction", "synthesis", "chunk_synthesis", "join", "store"]
+    before = {stage: stage_count(stage) for stage in stages}
+    chunks_before = sample("orator_chunk_chars_per_second_count")
+    queued_before = sample("orator_uploads_total", outcome="queued")
+    client = TestClient(main.app)
+
+    response = client.post("/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")})
+
+    assert response.status_code == 200
+    assert {stage: stage_count(stage) - before[stage] for stage in stages} == {
+        "upload_spool": 1, "queue_wait": 1, "extraction": 1, "synthesis": 1,
+        "chunk_synthesis": len(stub_pipeline.texts), "join": 1, "store": 1,
+    }
+    assert sample("orator_chunk_chars_per_second_count") - chunks_before == len(stub_pipeline.texts)
+    assert sample("orator_chunk_realtime_factor_count") > 0
+    assert sample("orator_uploads_total", outcome="queued") - queued_before == 1
+
+    exposition = client.get("/metrics")
+    assert exposition.status_code == 200
+    assert exposition.headers["content-type"].startswith("text/plain")
+    assert 'orator_queue_jobs{queue="tts_small"} 0.0' in exposition.text
+    assert "orator_cache_lookups_total" in exposition.text
+
+
+def test_cache_lookups_are_counted(stub_pipeline, tmp_path):
+    cache = ChunkCache(str(tmp_path / "chunks"), tasks.TTS_MODEL_NAME)
+    misses = sample("orator_cache_lookups_total", cache="chunk", result="misses")
+    hits = sample("orator_cache_lookups_total", cache="chunk", result="hits")
+    model_time = stage_count("chunk_synthesis")
+
+    for name in ("a.wav", "b.wav"):
+        tasks.synthesize_chunk("The same sentence twice.", os.path.join("static", "audio", name), cache)
+
+    assert sample("orator_cache_lookups_total", cache="chunk", result="misses") - misses == 1
+    assert sample("orator_cache_lookups_total", cache="chunk", result="hits") - hits == 1
+    # Only the miss took model time
+    assert stage_count("chunk_synthesis") - model_time == 1
+
+
+def test_failed_stages_are_timed_too():
+    before = stage_count("test_stage")
+    try:
+        with metrics.timed("test_stage"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert stage_count("test_stage") - before == 1
+
+
+def test_json_logs_carry_extra_fields_and_the_running_task(stub_pipeline):
+    formatter = logs.JsonFormatter()
+    record = logging.LogRecord("main", logging.INFO, __file__, 1, "Task queued", (), None)
+    record.queue = "tts_small"
+
+    entry = json.loads(formatter.format(record))
+    assert entry["message"] == "Task queued" and entry["level"] == "INFO"
+    assert entry["queue"] == "tts_small"
+    assert "task_id" not in entry
+
+    lines = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            lines.append(formatter.format(record))
+
+    handler = Capture()
+    tasks.logger.addHandler(handler)
+    try:
+        tasks.convert_text_to_audio.apply(args=["A short book."], task_id="job-7").get()
+    finally:
+        tasks.logger.removeHandler(handler)
+    assert lines and all(json.loads(line)["task_id"] == "job-7" for line in lines)
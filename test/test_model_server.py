@@ -0,0 +1,93 @@
+import threading
+import wave
+
+import pytest
+
+import model_server
+import tasks
+from stub_tts import StubTTS
+
+
+def frames(path):
+    with wave.open(str(path), "rb") as f:
+        return f.readframes(f.getnframes())
+
+
+@pytest.fixture
+def server(tmp_path):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return StubTTS()
+
+    srv = model_server.load_and_serve(str(tmp_path / "tts.sock"), load)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    srv.loads = loads
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+
+
+def test_client_writes_the_same_audio_as_the_model(server, tmp_path):
+    client = model_server.ModelClient(server.server_address)
+    client.tts_to_file("Served from a resident model.", tmp_path / "served.wav")
+    StubTTS().tts_to_file("Served from a resident model.", str(tmp_path / "local.wav"))
+
+    assert frames(tmp_path / "served.wav") == frames(tmp_path / "local.wav")
+    assert client.ping()["served"] == 1
+
+
+def test_model_errors_stay_runtime_errors(server, tmp_path):
+    client = model_server.ModelClient(server.server_address)
+    # The stub rejects blank text like Tacotron does; chunk skipping relies on RuntimeError
+    with pytest.raises(RuntimeError, match="empty"):
+        client.tts_to_file("   ", tmp_path / "blank.wav")
+
+
+def test_unreachable_server_is_not_a_chunk_failure(tmp_path):
+    client = model_server.ModelClient(str(tmp_path / "missing.sock"))
+    with pytest.raises(model_server.ModelServerUnavailable) as excinfo:
+        client.tts_to_file("Hello.", tmp_path / "out.wav")
+    assert not isinstance(excinfo.value, RuntimeError)
+    with pytest.raises(model_server.ModelServerUnavailable):
+        model_server.wait_for_server(client, timeout=0.1, interval=0.02)
+
+
+def test_worker_children_share_one_loaded_model(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(tasks, "MODEL_SERVER_SOCKET", server.server_address)
+    chunks = [f"Chunk {i} of a long book." for i in range(3)]
+
+    # Each recycled child starts with an empty model slot
+    for i in range(2):
+        monkeypatch.setattr(tasks, "tts_model", None)
+        tasks.preload_model()
+        out = tmp_path / f"child{i}"
+        out.mkdir()
+        done, _ = tasks.synthesize_chunks(chunks, str(out), pool_size=0)
+        assert len(done) == 3
+
+    assert len(server.loads) == 1
+    assert server.model.chunks == 6
+
+
+def test_preload_without_a_server_loads_in_process(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(tasks, "MODEL_SERVER_SOCKET", "")
+    tasks.preload_model()
+    assert stub_pipeline.loads == 1
+
+
+def test_boot_hook_preloads_where_tasks_run(monkeypatch):
+    from types import SimpleNamespace
+
+    calls = []
+    monkeypatch.setattr(tasks, "preload_model", lambda: calls.append("preload"))
+    # Neither may touch the host: /app/static/audio, or a metrics port bound from pytest
+    monkeypatch.setattr(tasks, "check_storage", lambda: calls.append("storage"))
+    monkeypatch.setattr(tasks, "start_exporter", lambda: calls.append("exporter"))
+    tasks._preload_in_worker(sender=SimpleNamespace(pool_cls="threads"))
+    # Prefork children preload themselves via worker_process_init
+    tasks._preload_in_worker(sender=SimpleNamespace(pool_cls="prefork"))
+    assert calls == ["exporter", "storage", "preload", "exporter", "storage"]
@@ -0,0 +1,102 @@
+import pytest
+
+import normalize
+import task_status
+import tasks
+
+NAMES = ["Winston", "Julia", "Parsons", "Syme", "Charrington", "Katharine", "Ampleforth", "Tillotson"]
+
+
+def book_pages(count: int) -> list[str]:
+    pages = []
+    for n in range(count):
+        name = NAMES[n % len(NAMES)]
+        body = [
+            f"It was a bright cold day and {name} heard the clocks striking thir-",
+            f"teen. {name} slipped quickly through the glass doors.",
+            f"The hallway {name} entered smelt of boiled cabbage.",
+        ]
+        pages.append("\n".join([f"THE LONG BOOK · Chapter {n // 3 + 1}", *body, f"Page {n + 1} of {count}"]))
+    return pages
+
+
+def test_running_headers_footers_and_page_numbers_are_dropped():
+    text, stats = normalize.normalize_pages(book_pages(6))
+
+    assert "LONG BOOK" not in text
+    assert "Page" not in text
+    assert text.count("thirteen. ") == 6
+    assert stats["lines_removed"] == 12
+    assert stats["chars_removed"] > 12 * len("Page 1 of 6")
+    assert stats["chars_out"] == len(text)
+
+
+def test_lines_repeated_on_too_few_pages_are_kept():
+    pages = ["Preface\nA short note.", "Preface\nAnother short note."]
+    text, stats = normalize.normalize_pages(pages)
+    assert text.count("Preface") == 2
+    assert stats["lines_removed"] == 0
+
+
+def test_chapters_keep_their_edge_lines():
+    text, stats = normalize.normalize_pages(["Chapter one.\n12", "Chapter two.\n12", "Chapter three.\n12"],
+                                            paginated=False)
+    assert text.count("twelve") == 3
+    assert stats["lines_removed"] == 0
+
+
+def test_roman_numerals_need_a_page_number_context():
+    lines = ["mix", "- vi -", "(xii)", "I", "Page ix", "The end."]
+    pages = [f"{name} walked home.\n{line}" for name, line in zip(NAMES, lines)]
+    text, stats = normalize.normalize_pages(pages)
+
+    # Two lone numerals on six pages aren't a pattern; they are words
+    assert text.split("\n") == [
+        "Winston walked home.", "mix", "Julia walked home.", "Parsons walked home.", "Syme walked home.", "I",
+        "Charrington walked home.", "Katharine walked home.", "The end.",
+    ]
+    assert stats["lines_removed"] == 3
+
+
+def test_bare_roman_numerals_repeated_across_pages_are_page_numbers():
+    pages = [f"{name} wrote the preface.\n{n}" for name, n in zip(NAMES, ["i", "ii", "iii", "iv", "v", "vi"])]
+    text, stats = normalize.normalize_pages(pages)
+    assert "\n".join(f"{name} wrote the preface." for name in NAMES[:6]) == text
+    assert stats["lines_removed"] == 6
+
+
+def test_hyphenation_and_whitespace():
+    text, _ = normalize.normalize_pages(["An exam-\nple of   soft­ware and a well-\nKnown name."])
+    assert text == "An example of software and a well-\nKnown name."
+
+
+@pytest.mark.parametrize("raw, spoken", [
+    ("Dr. Smith met Mr. Jones.", "Doctor Smith met Mister Jones."),
+    ("It cost $3.50 in 1999.", "It cost three dollars and fifty cents in nineteen ninety-nine."),
+    ("On the 21st, 12,000 people came.", "On the twenty-first, twelve thousand people came."),
+    ("Growth was 3.25% in 2005.", "Growth was three point two five percent in two thousand five."),
+    ("See No. 7, e.g. the red one.", "See number seven, for example the red one."),
+    ("Apples, pears etc. Then more.", "Apples, pears et cetera. Then more."),
+    ("Agent 007 called.", "Agent zero zero seven called."),
+    ("Mrs. Dalloway bought 1234 items.", "Missus Dalloway bought one thousand two hundred thirty-four items."),
+    ("Born May 4, 1905, died 1987 AD.", "Born May four, nineteen oh five, died nineteen eighty-seven AD."),
+    ("The war of 1914-1918 cost 1500 lives.",
+     "The war of nineteen fourteen-nineteen eighteen cost one thousand five hundred lives."),
+])
+def test_numbers_and_abbreviations_are_spelled_out(raw, spoken):
+    assert normalize.expand(raw) == spoken
+
+
+def test_conversion_synthesizes_normalized_text(stub_pipeline, monkeypatch):
+    store = task_status.MemoryStatusStore()
+    monkeypatch.setattr(task_status, "_store", store)
+    monkeypatch.setattr(tasks, "iter_document_pages", lambda source, ext: iter(book_pages(6)))
+
+    tasks.convert_document.apply(args=["book.pdf", ".pdf"], task_id="norm-job").get()
+
+    spoken = " ".join(stub_pipeline.texts)
+    assert "LONG BOOK" not in spoken and "Page" not in spoken
+    assert "thirteen" in spoken
+    record = store.get("norm-job")
+    assert record["stage"] == "completed"
+    assert record["text_normalization"]["lines_removed"] == 12
@@ -0,0 +1,41 @@
+import wave
+
+import pytest
+
+import tasks
+
+
+def frames(path):
+    with wave.open(path, "rb") as f:
+        return f.readframes(f.getnframes())
+
+
+@pytest.fixture
+def stub_model_env(monkeypatch):
+    # Pool children import tasks afresh, so select the stub through the environment
+    monkeypatch.setenv("TTS_MODEL_NAME", "stub")
+    monkeypatch.setattr(tasks, "tts_model", None)
+    monkeypatch.setattr(tasks, "TTS_MODEL_NAME", "stub")
+    yield
+    for size in list(tasks.synthesis_pools):
+        tasks._discard_synthesis_pool(size)
+
+
+def test_pool_matches_serial_order_and_skips_failures(tmp_path, stub_model_env):
+    chunks = [f"Sentence number {i} of the book." for i in range(6)]
+    chunks.insert(3, "   ")  # The model rejects blank chunks with RuntimeError
+
+    serial_dir = tmp_path / "serial"
+    pool_dir = tmp_path / "pool"
+    serial_dir.mkdir()
+    pool_dir.mkdir()
+
+    serial, _ = tasks.synthesize_chunks(chunks, str(serial_dir), pool_size=0)
+    parallel, _ = tasks.synthesize_chunks(chunks, str(pool_dir), pool_size=2)
+
+    assert len(parallel) == len(chunks) - 1
+    assert [p.rsplit("/", 1)[1] for p in parallel] == [p.rsplit("/", 1)[1] for p in serial]
+    assert "chunk_3.wav" not in [p.rsplit("/", 1)[1] for p in parallel]
+    assert [frames(p) for p in parallel] == [frames(p) for p in serial]
+    # The pool is kept warm for the next job
+    assert 2 in tasks.synthesis_pools
@@ -0,0 +1,101 @@
+import json
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+
+import main
+import task_status
+import tasks
+
+TEXT = " ".join(f"Paragraph {i} of the audiobook, read aloud as it is written." for i in range(4))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = task_status.MemoryStatusStore()
+    monkeypatch.setattr(task_status, "_store", store)
+    return store
+
+
+@pytest.fixture
+def server(stub_pipeline, store):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    srv = uvicorn.Server(uvicorn.Config(main.app, log_level="warning"))
+    thread = threading.Thread(target=srv.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not srv.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    srv.should_exit = True
+    thread.join()
+
+
+def read_events(response):
+    """Yield (event, data) pairs from a text/event-stream response."""
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+            event = None
+
+
+def test_stream_pushes_every_chunk_then_the_result(server, stub_pipeline, store, monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CHARS", 70)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+    monkeypatch.setattr(tasks, "CHUNK_CACHE_ENABLED", False)
+    synthesize = stub_pipeline.tts_to_file
+
+    def slow_tts_to_file(text, file_path):
+        time.sleep(0.1)
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", slow_tts_to_file)
+    task_status.report("sse-job", stage="queued")
+    job = threading.Thread(target=tasks.convert_text_to_audio.apply,
+                           kwargs={"args": [TEXT], "task_id": "sse-job"})
+
+    events = []
+    with httpx.stream("GET", f"{server}/task/sse-job/events", timeout=30) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for event in read_events(response):
+            events.append(event)
+            if len(events) == 1:
+                job.start()
+    job.join()
+
+    kind, first = events[0]
+    assert kind == "status"
+    assert (first["status"], first["stage"]) == ("pending", "queued")
+    chunks = [data for kind, data in events if kind == "progress" and "chunk" in data]
+    assert sorted(c["chunk"] for c in chunks) == [0, 1, 2, 3]
+    assert [c["chunks_done"] for c in chunks] == [1, 2, 3, 4]
+    assert all(c["total"] == 4 for c in chunks)
+    assert chunks[-1]["eta_seconds"] == 0
+    assert chunks[0]["eta_seconds"] > 0
+    # Seconds of audio grow with every chunk
+    assert 0 < chunks[0]["audio_seconds"] < chunks[-1]["audio_seconds"]
+
+    kind, final = events[-1]
+    assert kind == "status"
+    assert final["status"] == "completed"
+    assert final["audio_url"].endswith(".wav")
+
+
+def test_finished_and_unknown_jobs_end_after_one_event(server, store):
+    store.update("done-job", stage="failed", error="No text could be extracted from the document.")
+
+    with httpx.stream("GET", f"{server}/task/done-job/events", timeout=5) as response:
+        failed = list(read_events(response))
+    with httpx.stream("GET", f"{server}/task/never-queued/events", timeout=5) as response:
+        unknown = list(read_events(response))
+
+    assert failed == [("status", {"status": "failed", "task_id": "done-job",
+                                  "error": "No text could be extracted from the document."})]
+    assert unknown == [("status", {"status": "unknown", "task_id": "never-queued"})]
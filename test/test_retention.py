@@ -0,0 +1,224 @@
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import audio_index
+import retention
+import segments
+import tasks
+from audio_index import MemoryAudioIndex, RedisAudioIndex
+from storage import LocalStorage
+
+DAY = 24 * 3600
+
+
+class ExpiredResult:
+    """What Celery reports for an id whose result has expired."""
+
+    state = status = "PENDING"
+
+
+@pytest.fixture(params=["memory", "redis"])
+def index(request, monkeypatch):
+    if request.param == "memory":
+        return MemoryAudioIndex()
+    fakeredis = pytest.importorskip("fakeredis")
+    index = RedisAudioIndex("redis://localhost:6379/0", touch_interval=0)
+    index.client = fakeredis.FakeRedis(decode_responses=True)
+    return index
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStorage(str(tmp_path))
+
+
+def add_file(store, index, name: str, size: int, created: float, **kwargs) -> None:
+    with open(os.path.join(store.directory, name), "wb") as f:
+        f.write(b"x" * size)
+    index.add(name, size, created=created, **kwargs)
+
+
+def test_index_pages_newest_first_and_tracks_totals(index):
+    for i in range(5):
+        index.add(f"{i}.ogg", 100 + i, task_id=f"task-{i}", created=1000 + i)
+    assert not index.add("0.ogg", 100, created=2000)
+
+    assert [e["filename"] for e in index.page(0, 2)] == ["4.ogg", "3.ogg"]
+    assert [e["filename"] for e in index.page(4, 2)] == ["0.ogg"]
+    assert index.count() == 5 and index.total_bytes() == 510
+    assert index.by_task("task-2")["filename"] == "2.ogg"
+
+    assert index.remove("2.ogg")["size"] == 102
+    assert index.remove("2.ogg") is None
+    assert index.by_task("task-2") is None
+    assert index.total_bytes() == 408
+    assert index.names() == {"0.ogg", "1.ogg", "3.ogg", "4.ogg"}
+
+
+def test_least_recent_follows_access_not_creation(index):
+    for i in range(3):
+        index.add(f"{i}.ogg", 10, created=1000 + i)
+    index.touch("0.ogg", now=5000)
+    index.touch("missing.ogg", now=5000)
+
+    assert index.least_recent(10) == ["1.ogg", "2.ogg", "0.ogg"]
+    assert index.least_recent(10, accessed_before=1002) == ["1.ogg"]
+    assert "missing.ogg" not in index.names()
+
+
+def test_redis_touches_are_throttled():
+    fakeredis = pytest.importorskip("fakeredis")
+    index = RedisAudioIndex("redis://localhost:6379/0", touch_interval=60)
+    index.client = fakeredis.FakeRedis(decode_responses=True)
+    index.add("a.ogg", 10, created=0)
+
+    index.touch("a.ogg", now=1000)
+    index.touch("a.ogg", now=1030)
+    assert index.client.zscore(index.accessed_key, "a.ogg") == 1000
+    index.touch("a.ogg", now=1061)
+    assert index.client.zscore(index.accessed_key, "a.ogg") == 1061
+
+
+def test_ttl_deletes_files_not_accessed_recently(store, index):
+    now = 100 * DAY
+    add_file(store, index, "old.ogg", 10, created=now - 30 * DAY)
+    add_file(store, index, "old-but-played.ogg", 10, created=now - 30 * DAY)
+    add_file(store, index, "new.ogg", 10, created=now - DAY)
+    index.touch("old-but-played.ogg", now=now - 2 * DAY)
+
+    assert retention.expire(store, index, ttl=7 * DAY, now=now) == (1, 10)
+
+    assert sorted(os.listdir(store.directory)) == ["new.ogg", "old-but-played.ogg"]
+    assert index.names() == {"new.ogg", "old-but-played.ogg"}
+    assert retention.expire(store, index, ttl=0, now=now) == (0, 0)
+
+
+def test_quota_evicts_least_recently_used(store, index):
+    for i in range(5):
+        add_file(store, index, f"{i}.ogg", 100, created=1000 + i)
+    index.touch("0.ogg", now=2000)
+
+    assert retention.enforce_quota(store, index, quota=250) == (3, 300)
+
+    assert sorted(os.listdir(store.directory)) == ["0.ogg", "4.ogg"]
+    assert index.total_bytes() == 200
+
+
+def test_quota_skips_files_that_cannot_be_deleted(store, index, monkeypatch):
+    for i in range(3):
+        add_file(store, index, f"{i}.ogg", 100, created=1000 + i)
+    delete = store.delete
+
+    def flaky_delete(name):
+        if name == "0.ogg":
+            raise OSError("permission denied")
+        delete(name)
+
+    monkeypatch.setattr(store, "delete", flaky_delete)
+
+    assert retention.enforce_quota(store, index, quota=150) == (2, 200)
+    assert index.names() == {"0.ogg"}
+
+
+def test_orphaned_job_directories_are_removed(tmp_path):
+    now = time.time()
+    stale = now - 2 * 3600
+    jobs = {
+        "running": ({"total": 5}, now - 60),
+        "crashed": ({"total": 5}, stale),
+        "finished": ({"total": 5, "done": True}, now - 60),
+        "failed-long-ago": ({"total": 5, "failed": "boom"}, stale),
+    }
+    for name, (manifest, updated) in jobs.items():
+        job_dir = segments.job_dir_for(str(tmp_path), name)
+        os.makedirs(job_dir)
+        with open(segments.chunk_path(job_dir, 0), "wb") as f:
+            f.write(b"RIFF")
+        with open(os.path.join(job_dir, segments.MANIFEST_NAME), "w") as f:
+            json.dump({**manifest, "updated": updated}, f)
+        os.utime(job_dir, (updated, updated))
+
+    removed = retention.remove_orphaned_jobs(str(tmp_path), older_than=3600, now=now)
+
+    assert removed == 2
+    assert sorted(os.listdir(tmp_path / segments.JOBS_DIR_NAME)) == ["finished", "running"]
+
+
+def test_stale_partial_outputs_are_removed(store):
+    for name in ("book.ogg.part", "test_probe.tmp", "fresh.ogg.part", "book.ogg"):
+        open(os.path.join(store.directory, name), "wb").close()
+    old = time.time() - 7200
+    for name in ("book.ogg.part", "test_probe.tmp", "book.ogg"):
+        os.utime(os.path.join(store.directory, name), (old, old))
+
+    assert store.clean_partials(3600) == 2
+    assert sorted(os.listdir(store.directory)) == ["book.ogg", "fresh.ogg.part"]
+
+
+def test_reconcile_indexes_strays_and_drops_missing_files(store, index):
+    add_file(store, index, "indexed.ogg", 10, created=1000)
+    index.add("deleted.ogg", 20, created=1000)
+    with open(os.path.join(store.directory, "from-before.ogg"), "wb") as f:
+        f.write(b"x" * 30)
+
+    assert retention.reconcile(store, index) == (1, 1)
+
+    assert index.names() == {"indexed.ogg", "from-before.ogg"}
+    assert index.total_bytes() == 40
+
+
+def test_collect_runs_every_step(store, index, monkeypatch):
+    now = time.time()
+    add_file(store, index, "expired.ogg", 10, created=now - 30 * DAY)
+    for i in range(3):
+        add_file(store, index, f"{i}.ogg", 100, created=now - 60 + i)
+    # A sweep works from the index alone; listing storage is reconcile's job
+    monkeypatch.setattr(store, "list", lambda: pytest.fail("listed storage"))
+
+    stats = retention.collect(store, index, store.directory, ttl=7 * DAY, quota=250, now=now)
+
+    assert stats["expired"] == 1 and stats["evicted"] == 1
+    assert stats["bytes_freed"] == 110
+    assert stats["files"] == 2 and stats["total_bytes"] == 200
+
+
+def test_gc_task_and_paginated_listing(stub_pipeline, monkeypatch):
+    import main
+
+    names = [tasks.convert_text_to_audio.apply(args=[f"Book number {i} is short."], task_id=f"job-{i}").get()
+             ["audio_filename"] for i in range(3)]
+    with open(os.path.join("static", "audio", "stray.wav"), "wb") as f:
+        f.write(b"RIFF")
+
+    # The sweep doesn't list storage, so the stray is only picked up by the reconcile
+    assert tasks.collect_garbage.apply().get()["files"] == 3
+    stats = tasks.reconcile_audio_index.apply().get()
+    assert stats["indexed"] == 1 and stats["files"] == 4
+
+    client = TestClient(main.app)
+    first = client.get("/files", params={"limit": 3}).json()
+    assert first["total"] == 4 and first["count"] == 3 and first["next_offset"] == 3
+    rest = client.get("/files", params={"limit": 3, "offset": 3}).json()
+    assert rest["next_offset"] is None
+    listed = [f["filename"] for f in first["files"] + rest["files"]]
+    assert sorted(listed) == sorted(names + ["stray.wav"])
+    assert client.get("/files", params={"limit": 0}).status_code == 422
+
+    # The Celery result and status record are long gone, the file is still there
+    monkeypatch.setattr(main.task_status, "_store", main.task_status.MemoryStatusStore())
+    monkeypatch.setattr(main.celery_app, "AsyncResult", lambda task_id: ExpiredResult())
+    response = client.get("/task/job-1").json()
+    assert response["status"] == "completed"
+    assert response["audio_filename"] == names[1]
+    assert client.get("/task/unknown").json()["status"] == "unknown"
+
+    # Quota sweep deletes the least recently downloaded file
+    client.get(f"/download/{names[0]}")
+    monkeypatch.setattr(retention, "AUDIO_QUOTA_BYTES", audio_index.get_audio_index().total_bytes() - 1)
+    assert tasks.collect_garbage.apply().get()["evicted"] == 1
+    remaining = audio_index.get_audio_index().names()
+    assert names[0] in remaining and len(remaining) == 3
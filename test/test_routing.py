@@ -0,0 +1,302 @@
+import heapq
+import itertools
+import json
+import os
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import routing
+import task_status
+import tasks
+from celery_config import HEALTH_QUEUE, LARGE_QUEUE, SMALL_QUEUE, celery_app
+from test_extraction import make_epub
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = task_status.MemoryStatusStore()
+    monkeypatch.setattr(task_status, "_store", store)
+    return store
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = routing.MemoryTenantTracker()
+    monkeypatch.setattr(routing, "_tracker", tracker)
+    return tracker
+
+
+def test_queue_and_priority_follow_length():
+    assert routing.queue_for_chars(5_000) == SMALL_QUEUE
+    assert routing.queue_for_chars(routing.LARGE_JOB_CHARS + 1) == LARGE_QUEUE
+    assert routing.priority_for(5_000) == 0
+    assert routing.priority_for(45_000) == 2
+    assert routing.priority_for(10_000_000) == routing.MAX_SIZE_PENALTY
+
+
+def test_busy_tenants_yield_to_others():
+    assert routing.priority_for(5_000, recent_jobs=routing.TENANT_BURST) == 0
+    assert routing.priority_for(5_000, recent_jobs=routing.TENANT_BURST + 2) == 2
+    assert routing.priority_for(10_000_000, recent_jobs=100) == routing.MAX_PRIORITY
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_tenant_submissions_are_counted_in_a_sliding_window(kind):
+    if kind == "memory":
+        tracker = routing.MemoryTenantTracker(window=600)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        tracker = routing.RedisTenantTracker("redis://localhost:6379/0", window=600)
+        tracker.client = fakeredis.FakeRedis(decode_responses=True)
+
+    assert [tracker.record("a", now=t) for t in (0, 0, 100)] == [1, 2, 3]
+    assert tracker.record("b", now=100) == 1
+    assert tracker.recent("a", now=650) == 1
+    assert tracker.record("a", now=699) == 2
+
+
+def test_health_tasks_have_their_own_queue():
+    route = celery_app.amqp.router.route
+    assert route({}, "tasks.health_check")["queue"].name == HEALTH_QUEUE
+    assert route({}, "tasks.collect_garbage")["queue"].name == HEALTH_QUEUE
+    assert route({}, "tasks.convert_document")["queue"].name == SMALL_QUEUE
+
+
+def test_uploads_start_small_at_a_priority_set_by_the_tenant(stub_pipeline, store, tracker, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    # The test client stands in for the proxy that sets the tenant header
+    monkeypatch.setattr(main, "TRUSTED_PROXIES", {"testclient"})
+    sent = []
+    original = tasks.convert_document.apply_async
+
+    def record(args, kwargs, **options):
+        sent.append({"tenant": kwargs["tenant"], "queue": options["queue"], "priority": options["priority"]})
+        return original(args, kwargs, **options)
+
+    monkeypatch.setattr(tasks.convert_document, "apply_async", record)
+    client = TestClient(main.app)
+    for tenant in ["bulk"] * 4 + ["reader"]:
+        # Different bytes each time so the audio cache doesn't answer
+        epub = make_epub() + tenant.encode() + os.urandom(8)
+        response = client.post("/upload", headers={"X-Tenant-ID": tenant},
+                               files={"file": ("book.epub", epub, "application/epub+zip")})
+        assert response.status_code == 200
+
+    assert [s["queue"] for s in sent] == [SMALL_QUEUE] * 5
+    assert [s["priority"] for s in sent] == [0, 0, 1, 2, 0]
+    assert sent[-1]["tenant"] == "reader"
+
+
+def test_tenant_header_is_only_believed_from_trusted_proxies(stub_pipeline, store, tracker, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    sent = []
+    original = tasks.convert_document.apply_async
+
+    def record(args, kwargs, **options):
+        sent.append((kwargs["tenant"], options["priority"]))
+        return original(args, kwargs, **options)
+
+    monkeypatch.setattr(tasks.convert_document, "apply_async", record)
+    client = TestClient(main.app)
+    # A bulk uploader rotating tenant ids is still one client
+    for n in range(4):
+        epub = make_epub() + os.urandom(8)
+        response = client.post("/upload", headers={"X-Tenant-ID": f"tenant-{n}"},
+                               files={"file": ("book.epub", epub, "application/epub+zip")})
+        assert response.status_code == 200
+
+    assert sent == [("testclient", 0), ("testclient", 0), ("testclient", 1), ("testclient", 2)]
+
+
+def test_arrivals_are_ranked_by_their_estimated_size(stub_pipeline, store, tracker, monkeypatch):
+    sent = []
+    monkeypatch.setattr(tasks.convert_document, "apply_async",
+                        lambda args, kwargs, **options: sent.append(options["priority"]))
+
+    for estimate in (5_000, 45_000, 10_000_000):
+        tasks.start_document_conversion("book.pdf", ".pdf", estimated_chars=estimate)
+
+    assert sent == [0, 2, routing.MAX_SIZE_PENALTY]
+
+
+def test_long_books_are_handed_to_the_large_queue(stub_pipeline, store, tracker, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(routing, "LARGE_JOB_CHARS", 20)
+    handed_off = []
+    original = tasks.convert_extracted_text.si
+    monkeypatch.setattr(tasks.convert_extracted_text, "si",
+                        lambda *args: handed_off.append(args) or original(*args))
+
+    response = TestClient(main.app).post(
+        "/upload", headers={"X-Tenant-ID": "reader"},
+        files={"file": ("book.epub", make_epub(), "application/epub+zip")},
+    )
+
+    task_id = response.json()["task_id"]
+    record = store.get(task_id)
+    assert len(handed_off) == 1
+    assert record["queue"] == LARGE_QUEUE
+    assert record["stage"] == "completed" and record["audio_filename"]
+    # Neither the upload nor the spooled text outlive the job
+    assert os.listdir("uploads") == []
+
+
+def test_short_books_stay_on_the_extraction_worker(stub_pipeline, store, tracker, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(tasks.convert_extracted_text, "si", lambda *args: pytest.fail("short book handed off"))
+
+    response = TestClient(main.app).post(
+        "/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")}
+    )
+
+    record = store.get(response.json()["task_id"])
+    assert record["stage"] == "completed" and record["queue"] == SMALL_QUEUE
+
+
+# --- Queue simulation -------------------------------------------------------
+
+CHARS_PER_SECOND = 1_000  # synthesis speed of one worker slot
+EXTRACT_CHARS_PER_SECOND = 50_000  # extraction and normalization, on the same slot
+
+
+def make_workload(seed: int = 7, jobs: int = 6_000) -> list[tuple[float, int, int, str]]:
+    """(arrival, chars, estimated chars, tenant): mostly short books, a few very long ones, and one
+    tenant uploading in bursts. Estimates from the upload's size are off by up to 2x either way."""
+    rng = random.Random(seed)
+    workload = []
+    now = 0.0
+
+    def job(chars, tenant):
+        return now, chars, int(chars * rng.uniform(0.5, 2)), tenant
+
+    while len(workload) < jobs:
+        now += rng.expovariate(0.08)
+        if rng.random() < 0.03:
+            workload.append(job(rng.randint(250_000, 1_000_000), f"reader-{rng.randrange(20)}"))
+        elif rng.random() < 0.02:
+            # A whole series at once
+            workload.extend(job(rng.randint(5_000, 30_000), "bulk") for _ in range(12))
+        else:
+            workload.append(job(rng.randint(5_000, 50_000), f"reader-{rng.randrange(20)}"))
+    return workload
+
+
+def simulate(workload, workers: dict[str, int], arrive, hand_off) -> list[tuple[float, int, str]]:
+    """Discrete-event run of ``workload``; returns (queue wait, chars, tenant) per job.
+
+    Follows the shipped two-stage flow: a job arrives knowing only its
+    estimated size and is queued where ``arrive(estimate, tenant, now)``
+    says, as ``(queue, priority)``. The slot that picks it up extracts the
+    text, then ``hand_off(chars, tenant, now, queue)`` either returns None
+    (synthesize on the same slot) or re-queues it, as convert_document does.
+    A job's wait is all its time in queues before synthesis starts.
+    """
+    waiting = {queue: [] for queue in workers}
+    free = dict(workers)
+    events: list[tuple[float, int, str, int, str]] = []  # (time, seq, queue, job, stage finished)
+    order = itertools.count()
+    queued_at: dict[int, float] = {}
+    waited = [0.0] * len(workload)
+    extracted = set()
+    waits = []
+    next_job = 0
+    while next_job < len(workload) or events:
+        arrival = workload[next_job][0] if next_job < len(workload) else float("inf")
+        if events and events[0][0] < arrival:
+            now, _, queue, index, stage = heapq.heappop(events)
+            _, chars, _, tenant = workload[index]
+            if stage == "synthesis":
+                free[queue] += 1
+            else:
+                extracted.add(index)
+                moved = hand_off(chars, tenant, now, queue)
+                if moved is None:
+                    waits.append((waited[index], chars, tenant))
+                    heapq.heappush(events, (now + chars / CHARS_PER_SECOND, next(order), queue, index, "synthesis"))
+                else:
+                    free[queue] += 1
+                    queued_at[index] = now
+                    heapq.heappush(waiting[moved[0]], (moved[1], next(order), index))
+        else:
+            now, _, estimate, tenant = workload[next_job]
+            queue, priority = arrive(estimate, tenant, now)
+            queued_at[next_job] = now
+            heapq.heappush(waiting[queue], (priority, next(order), next_job))
+            next_job += 1
+        for queue, jobs in waiting.items():
+            while free[queue] and jobs:
+                _, _, index = heapq.heappop(jobs)
+                _, chars, _, tenant = workload[index]
+                free[queue] -= 1
+                waited[index] += now - queued_at[index]
+                if index in extracted:
+                    waits.append((waited[index], chars, tenant))
+                    heapq.heappush(events, (now + chars / CHARS_PER_SECOND, next(order), queue, index, "synthesis"))
+                else:
+                    heapq.heappush(events, (now + chars / EXTRACT_CHARS_PER_SECOND, next(order), queue, index,
+                                            "extraction"))
+    return waits
+
+
+def percentiles(waits: list[float]) -> dict:
+    waits = sorted(waits)
+    pick = lambda p: round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))], 1)
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "jobs": len(waits)}
+
+
+def report(waits) -> dict:
+    short = [w for w, chars, _ in waits if chars <= routing.LARGE_JOB_CHARS]
+    return {
+        "short": percentiles(short),
+        "short_other_tenants": percentiles([w for w, chars, t in waits
+                                            if chars <= routing.LARGE_JOB_CHARS and t != "bulk"]),
+        "long": percentiles([w for w, chars, _ in waits if chars > routing.LARGE_JOB_CHARS]),
+    }
+
+
+def to_large_queue(recent_jobs=lambda tenant, now: 0):
+    """convert_document's hand-off: long books move to the large queue at their real length's priority."""
+    def hand_off(chars, tenant, now, queue):
+        if routing.queue_for_chars(chars) != LARGE_QUEUE or queue == LARGE_QUEUE:
+            return None
+        return LARGE_QUEUE, routing.priority_for(chars, recent_jobs(tenant, now))
+    return hand_off
+
+
+def test_simulated_queue_waits_with_mixed_job_sizes():
+    workload = make_workload()
+    workers = {SMALL_QUEUE: 4, LARGE_QUEUE: 2}
+
+    # Before: one FIFO queue in front of all six worker slots, each job extracted and synthesized in place
+    fifo = simulate(workload, {"celery": 6}, arrive=lambda *job: ("celery", 0), hand_off=lambda *job: None)
+
+    # After: the compose split (4 small slots, 2 large). Without a size estimate every arrival ranks alike
+    unsized = simulate(workload, workers, arrive=lambda estimate, tenant, now: (SMALL_QUEUE, 0),
+                       hand_off=to_large_queue())
+    # Arrivals ranked by their estimated size, as start_document_conversion does
+    routed = simulate(workload, workers,
+                      arrive=lambda estimate, tenant, now: (SMALL_QUEUE, routing.priority_for(estimate)),
+                      hand_off=to_large_queue())
+    # ... and by how much their tenant submitted lately
+    tracker = routing.MemoryTenantTracker()
+    fair = simulate(workload, workers,
+                    arrive=lambda estimate, tenant, now: (
+                        SMALL_QUEUE, routing.priority_for(estimate, tracker.record(tenant, now))),
+                    hand_off=to_large_queue(tracker.recent))
+
+    results = {"fifo": report(fifo), "routed_unsized": report(unsized), "routed": report(routed),
+               "routed_fair": report(fair)}
+    print(json.dumps(results, indent=2))
+
+    # Short books no longer wait behind long ones
+    assert results["routed"]["short"]["p95"] < results["fifo"]["short"]["p95"] / 2
+    assert results["routed"]["short"]["p99"] < results["fifo"]["short"]["p99"]
+    # Ranking arrivals by their estimated size helps even though the estimate is rough
+    assert results["routed"]["short"]["p95"] < results["routed_unsized"]["short"]["p95"]
+    # A tenant uploading in bursts no longer delays everyone else's short books
+    assert (results["routed_fair"]["short_other_tenants"]["p95"]
+            < results["routed"]["short_other_tenants"]["p95"])
+    assert results["routed_fair"]["short_other_tenants"]["p99"] <= results["routed"]["short_other_tenants"]["p99"]
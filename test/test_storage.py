@@ -0,0 +1,169 @@
+import os
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+import encoders
+import tasks
+from storage import LocalStorage, S3Storage
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+
+BUCKET = "orator-test"
+PART_BYTES = 5 * 1024 * 1024
+TEXT = " ".join(f"This is sentence number {i} of a fairly long book." for i in range(12))
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, "books/", client=client, part_bytes=PART_BYTES)
+
+
+def read_object(s3: S3Storage, name: str) -> bytes:
+    return s3.client.get_object(Bucket=BUCKET, Key=f"books/{name}")["Body"].read()
+
+
+def test_parts_are_uploaded_while_writing(s3):
+    writer = s3.writer("book.ogg")
+    data = os.urandom(PART_BYTES * 2 + 1234)
+
+    for offset in range(0, PART_BYTES * 2, 64 * 1024):
+        writer.write(data[offset:offset + 64 * 1024])
+    assert len(writer.parts) == 2
+    assert s3.size("book.ogg") is None
+    writer.write(data[PART_BYTES * 2:])
+
+    assert writer.commit() == len(data)
+    assert read_object(s3, "book.ogg") == data
+    assert s3.client.head_object(Bucket=BUCKET, Key="books/book.ogg")["ContentType"] == "audio/ogg"
+
+
+def test_small_objects_use_a_single_put(s3):
+    writer = s3.writer("short.wav")
+    writer.write(b"RIFF" + b"\0" * 100)
+
+    assert writer.commit() == 104
+    assert writer.upload_id is None
+    assert s3.size("short.wav") == 104
+
+
+def test_aborted_upload_leaves_nothing_behind(s3):
+    writer = s3.writer("book.mp3")
+    writer.write(os.urandom(PART_BYTES + 10))
+    assert writer.upload_id is not None
+
+    writer.abort()
+
+    assert s3.size("book.mp3") is None
+    assert s3.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+def test_empty_output_fails(s3, tmp_path):
+    with pytest.raises(RuntimeError, match="empty"):
+        s3.writer("book.wav").commit()
+    with pytest.raises(RuntimeError, match="empty"):
+        LocalStorage(str(tmp_path)).writer("book.wav").commit()
+
+
+def test_presigned_downloads(s3):
+    url = urlparse(s3.download_url("book.ogg", attachment=True))
+    query = parse_qs(url.query)
+
+    assert url.path.endswith("/books/book.ogg")
+    assert query["response-content-type"] == ["audio/ogg"]
+    assert query["response-content-disposition"] == ['attachment; filename="book.ogg"']
+    assert any("Signature" in param for param in query)
+
+
+def test_listing_and_deleting(s3):
+    for name in ("a.ogg", "b.ogg"):
+        writer = s3.writer(name)
+        writer.write(b"audio")
+        writer.commit()
+    s3.check()  # leaves no probe object behind
+
+    assert sorted(f["filename"] for f in s3.list()) == ["a.ogg", "b.ogg"]
+    s3.delete("a.ogg")
+    assert [f["filename"] for f in s3.list()] == ["b.ogg"]
+
+
+def test_local_writer_publishes_only_complete_files(tmp_path):
+    writer = LocalStorage(str(tmp_path)).writer("book.wav")
+    writer.write(b"RIFF")
+    assert not (tmp_path / "book.wav").exists()
+
+    assert writer.commit() == 4
+    assert (tmp_path / "book.wav").read_bytes() == b"RIFF"
+    assert not (tmp_path / "book.wav.part").exists()
+
+
+def test_audio_directory_is_probed_once(stub_pipeline, monkeypatch):
+    probes = []
+    check = LocalStorage.check
+    monkeypatch.setattr(LocalStorage, "check", lambda self: probes.append(self.directory) or check(self))
+
+    for _ in range(2):
+        tasks.convert_text_to_audio.apply(args=["One short sentence for the probe."]).get()
+
+    assert probes == [os.path.join("static", "audio")]
+
+
+def test_conversion_uploads_to_s3_as_chunks_finish(stub_pipeline, fake_ffmpeg, s3, monkeypatch):
+    monkeypatch.setattr(moto.s3.models, "S3_UPLOAD_PART_MIN_SIZE", 1024)
+    monkeypatch.setattr(s3, "part_bytes", 1024)
+    monkeypatch.setattr(tasks, "storage", s3)
+    monkeypatch.setattr(encoders, "AUDIO_FORMAT", "opus")
+    monkeypatch.setattr(tasks, "MAX_CHARS", 60)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 10)
+    writers = []
+    open_writer = s3.writer
+    monkeypatch.setattr(s3, "writer", lambda name: writers.append(open_writer(name)) or writers[-1])
+    parts_before_chunk = []
+    synthesize = stub_pipeline.tts_to_file
+
+    def tts_to_file(text, file_path):
+        if len(parts_before_chunk) == 11:
+            # Encoded output arrives through a pipe; give the copier a moment to catch up
+            deadline = time.monotonic() + 5
+            while not writers[0].parts and time.monotonic() < deadline:
+                time.sleep(0.01)
+        parts_before_chunk.append(len(writers[0].parts))
+        synthesize(text=text, file_path=file_path)
+
+    monkeypatch.setattr(stub_pipeline, "tts_to_file", tts_to_file)
+
+    result = tasks.convert_text_to_audio.apply(args=[TEXT], kwargs={"cache_keys": ["k"]}).get()
+
+    name = result["audio_filename"]
+    assert name.endswith(".ogg")
+    assert parts_before_chunk[0] == 0 and parts_before_chunk[-1] > 0
+    assert len(read_object(s3, name)) == result["audio_bytes"]
+    assert tasks.audio_cache_for(os.path.join("static", "audio")).lookup("k")["audio_filename"] == name
+    # Nothing but scratch space on the local disk
+    assert not [n for n in os.listdir(os.path.join("static", "audio")) if not n.startswith(".")]
+
+    import main
+    monkeypatch.setattr(main, "storage", s3)
+    client = TestClient(main.app)
+    response = client.get(f"/download/{name}", follow_redirects=False)
+    assert response.status_code == 307
+    assert f"/books/{name}" in response.headers["location"]
+    assert [f["filename"] for f in client.get("/files").json()["files"]] == [name]
+    assert main.completed_task_response("t", result)["audio_url"] == f"/stream/{name}"
+
+
+def test_stale_multipart_uploads_are_aborted(s3):
+    writer = s3.writer("crashed.ogg")
+    writer.write(os.urandom(PART_BYTES + 10))
+
+    # moto dates every upload in 2010, so it always looks abandoned
+    assert s3.clean_partials(3600) == 1
+    assert s3.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import task_status
+import tasks
+from celery_config import celery_app
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = task_status.MemoryStatusStore()
+    monkeypatch.setattr(task_status, "_store", store)
+    return store
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def no_broadcasts():
+        raise AssertionError("status endpoints must not broadcast to workers")
+
+    monkeypatch.setattr(celery_app.control, "inspect", no_broadcasts)
+    return TestClient(main.app)
+
+
+def test_conversion_records_every_stage(stub_pipeline, store, monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CHARS", 40)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 5)
+    stages = []
+    original = store.update
+    monkeypatch.setattr(store, "update", lambda task_id, **f: stages.append(f.get("stage")) or original(task_id, **f))
+
+    result = tasks.convert_text_to_audio.apply(
+        args=["First sentence is here. Second sentence is here. Third one ends it."], task_id="job-1"
+    ).get()
+
+    record = store.get("job-1")
+    assert [s for s in stages if s] == ["synthesizing", "joining", "completed"]
+    assert record["chunks_done"] == record["total"] == result["chunks"] == 3
+    assert record["audio_filename"] == result["audio_filename"]
+
+
+def test_in_flight_task_is_pending_with_progress(client, store):
+    store.update("job-2", stage="synthesizing", total=12)
+    store.add("job-2", chunks_done=1)
+    store.add("job-2", chunks_done=1)
+
+    body = client.get("/task/job-2").json()
+
+    assert body["status"] == "pending"
+    assert body["stage"] == "synthesizing"
+    assert body["progress"] == {"chunks_done": 2, "total": 12}
+
+
+def test_finished_and_failed_records(client, store, stub_pipeline):
+    result = tasks.convert_text_to_audio.apply(args=["A short book about nothing at all."], task_id="job-3").get()
+    store.update("job-4", stage="failed", error="No text could be extracted from the document.")
+
+    done = client.get("/task/job-3").json()
+    failed = client.get("/task/job-4").json()
+
+    assert done["status"] == "completed"
+    assert done["audio_url"] == f"/static/audio/{result['audio_filename']}"
+    assert done["file_size"] > 0
+    assert failed == {"status": "failed", "task_id": "job-4",
+                      "error": "No text could be extracted from the document."}
+
+
+def test_unknown_task_is_one_backend_read(client, store):
+    body = client.get("/task/never-queued").json()
+    assert body["status"] == "unknown"
+
+
+def test_upload_records_queued_before_the_worker_starts(stub_pipeline, store, monkeypatch):
+    from test_extraction import make_epub
+
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    first_stage = {}
+    original = tasks.convert_document.apply_async
+
+    def record_first_stage(args, kwargs, task_id, **options):
+        first_stage.update(store.get(task_id))
+        return original(args, kwargs, task_id=task_id, **options)
+
+    monkeypatch.setattr(tasks.convert_document, "apply_async", record_first_stage)
+    response = TestClient(main.app).post(
+        "/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")}
+    )
+
+    assert first_stage["stage"] == "queued"
+    assert store.get(response.json()["task_id"])["stage"] == "completed"
+
+
+def test_health_and_workers_use_the_monitor(client, monkeypatch):
+    monitor = main.worker_monitor
+    monkeypatch.setattr(monitor, "_last_seen", {})
+    monkeypatch.setattr(monitor, "_active", {})
+    monkeypatch.setattr(monitor, "_freshest", None)
+    monitor.on_event({"type": "worker-heartbeat", "hostname": "celery@a"})
+    monitor.on_event({"type": "task-started", "hostname": "celery@a", "uuid": "job-5"})
+
+    assert client.get("/health").json()["workers"] == ["celery@a"]
+    workers = client.get("/workers").json()["workers"]
+    assert workers["celery@a"]["active_tasks"] == ["job-5"]
+    assert workers["celery@a"]["alive"] is True
@@ -0,0 +1,132 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import tasks
+import uploads
+from celery_config import celery_app
+from test_extraction import TEST_PDF, make_epub
+
+
+@pytest.fixture
+def client(stub_pipeline, monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Eager results of every extraction task the API queued, in order."""
+    results = []
+    original = tasks.start_document_conversion
+
+    def record(*args, **kwargs):
+        results.append(original(*args, **kwargs))
+        return results[-1]
+
+    monkeypatch.setattr(tasks, "start_document_conversion", record)
+    return results
+
+
+def test_only_a_file_reference_is_queued(client, stub_pipeline, monkeypatch):
+    queued = []
+    original = tasks.convert_document.apply_async
+    monkeypatch.setattr(tasks.convert_document, "apply_async",
+                        lambda args, kwargs, **options: queued.append((args, kwargs))
+                        or original(args, kwargs, **options))
+
+    response = client.post("/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")})
+
+    assert response.status_code == 200
+    (upload_name, ext), kwargs = queued[0]
+    assert ext == ".epub" and upload_name.endswith(".epub")
+    assert all(len(key) == 64 for key in kwargs["cache_keys"])
+    # The worker extracted and converted the book, then removed the spooled upload
+    assert "Morning came" in " ".join(stub_pipeline.texts)
+    assert not os.listdir(uploads.UPLOAD_DIR)
+
+
+def test_worker_extracts_and_converts(client, stub_pipeline, queued):
+    with open(TEST_PDF, "rb") as f:
+        response = client.post("/upload", files={"file": ("book.pdf", f, "application/pdf")})
+
+    assert response.status_code == 200
+    assert queued[0].id == response.json()["task_id"]
+    assert os.path.exists(os.path.join("static", "audio", queued[0].get()["audio_filename"]))
+    assert stub_pipeline.texts
+
+
+def test_same_text_in_a_new_file_reuses_audio(client, stub_pipeline, queued):
+    first = client.post("/upload", files={"file": ("a.epub", make_epub(), "application/epub+zip")})
+    synthesized = len(stub_pipeline.texts)
+    # Different zip bytes (compression), same chapters
+    second = client.post("/upload", files={"file": ("b.epub", make_epub(compress=True), "application/epub+zip")})
+
+    assert first.status_code == second.status_code == 200
+    assert len(stub_pipeline.texts) == synthesized
+    result = queued[1].get()
+    assert result["cached"] is True
+    assert result["audio_filename"] == queued[0].get()["audio_filename"]
+
+
+def test_unreadable_document_fails_the_task(client, queued, monkeypatch):
+    monkeypatch.setitem(celery_app.conf, "task_eager_propagates", False)
+    client.post("/upload", files={"file": ("bad.epub", b"PK\x03\x04 not a zip", "application/epub+zip")})
+
+    assert queued[0].failed()
+    assert "Failed to extract text" in str(queued[0].result)
+    assert not os.listdir(uploads.UPLOAD_DIR)
+
+
+def test_content_must_match_extension(client):
+    response = client.post("/upload", files={"file": ("fake.pdf", b"MZ\x90\x00", "application/pdf")})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File content does not match its extension."
+
+
+def test_chunked_body_is_cut_off_at_the_limit(client):
+    # Drive the ASGI app directly: TestClient buffers generator bodies before sending
+    received = []
+    sent = []
+
+    preamble = (b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n'
+                b"Content-Type: application/pdf\r\n\r\n%PDF-")
+
+    async def receive():
+        received.append(1)
+        body = preamble if len(received) == 1 else b"x" * (1024 * 1024)
+        return {"type": "http.request", "body": body, "more_body": len(received) < 40}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/upload", "raw_path": b"/upload", "root_path": "",
+        "query_string": b"", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=b"),
+                    (b"transfer-encoding", b"chunked")],
+    }
+    asyncio.run(main.app(scope, receive, send))
+
+    assert sent[0]["status"] == 400
+    assert b"File too large." in sent[1]["body"]
+    assert len(received) <= main.MAX_FILE_SIZE_MB + 2
+
+
+def test_spool_enforces_cap_while_copying(tmp_path):
+    class Upload:
+        def __init__(self, data):
+            self.stream = io.BytesIO(data)
+
+        async def read(self, size):
+            return self.stream.read(size)
+
+    with pytest.raises(uploads.UploadTooLarge):
+        asyncio.run(uploads.spool_upload(Upload(b"%PDF-" + b"x" * 3 * uploads.UPLOAD_READ_BYTES), ".pdf",
+                                         2 * uploads.UPLOAD_READ_BYTES, upload_dir=str(tmp_path)))
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,54 @@
+import io
+import wave
+
+import pytest
+
+import tasks
+from wav import concatenate_wavs
+
+
+def make_wav(frames: bytes, rate=16000, channels=1) -> io.BytesIO:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(frames)
+    buf.seek(0)
+    return buf
+
+
+def test_concatenates_buffers_and_files(tmp_path):
+    first = tmp_path / "a.wav"
+    first.write_bytes(make_wav(b"\x01\x00" * 1000).read())
+    output = tmp_path / "out.wav"
+
+    frames = concatenate_wavs([str(first), make_wav(b"\x02\x00" * 500)], str(output))
+
+    assert frames == 1500
+    with wave.open(str(output), "rb") as f:
+        assert f.getnframes() == 1500
+        assert f.readframes(1500) == b"\x01\x00" * 1000 + b"\x02\x00" * 500
+    # Header was written once with the final size, nothing trailing
+    assert output.stat().st_size == 44 + 3000
+
+
+def test_rejects_mismatched_formats(tmp_path):
+    with pytest.raises(ValueError):
+        concatenate_wavs([make_wav(b"\x00\x00", rate=16000), make_wav(b"\x00\x00", rate=22050)],
+                         str(tmp_path / "out.wav"))
+
+
+def test_multi_chunk_job_keeps_every_chunk(stub_pipeline, monkeypatch):
+    # Without ffmpeg the old path silently shipped only the first chunk
+    monkeypatch.setattr(tasks, "MAX_CHARS", 40)
+    monkeypatch.setattr(tasks, "MIN_CHARS", 5)
+    text = "One small sentence. Another small sentence. A third one here."
+
+    result = tasks.convert_text_to_audio.apply(args=[text]).get()
+
+    with wave.open(f"static/audio/{result['audio_filename']}", "rb") as f:
+        frames = f.getnframes()
+    per_char = stub_pipeline.model.samples_per_char
+    assert result["chunks"] == 3
+    assert frames == per_char * sum(len(t) for t in stub_pipeline.texts)
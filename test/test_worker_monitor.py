@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+
+import main
+from celery_config import celery_app
+from worker_monitor import WorkerMonitor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_monitor(clock):
+    monitor = WorkerMonitor(celery_app, heartbeat_timeout=10, clock=clock)
+    monitor.started_at = clock()
+    return monitor
+
+
+def test_heartbeats_mark_workers_available_until_they_go_quiet():
+    clock = Clock()
+    monitor = make_monitor(clock)
+    assert monitor.status() == "starting"
+
+    monitor.on_event({"type": "worker-heartbeat", "hostname": "celery@a"})
+    clock.now += 5
+    monitor.on_event({"type": "task-started", "hostname": "celery@b"})
+    assert monitor.status() == "available"
+    assert monitor.workers() == ["celery@a", "celery@b"]
+
+    clock.now += 6
+    assert monitor.workers() == ["celery@b"]
+    clock.now += 5
+    assert monitor.status() == "no_workers"
+
+
+def test_producer_events_and_offline_workers_do_not_count():
+    clock = Clock()
+    monitor = make_monitor(clock)
+
+    monitor.on_event({"type": "task-sent", "hostname": "api@host"})
+    assert not monitor.workers_available()
+
+    monitor.on_event({"type": "worker-online", "hostname": "celery@a"})
+    monitor.on_event({"type": "worker-offline", "hostname": "celery@a"})
+    assert monitor.workers() == []
+    assert not monitor.workers_available()
+
+
+def test_upload_is_refused_while_the_broker_is_down(stub_pipeline, monkeypatch):
+    from test_extraction import make_epub
+
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(main.worker_monitor, "broker_error", "Connection refused")
+    client = TestClient(main.app)
+
+    response = client.post("/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")})
+
+    assert response.status_code == 503
+    assert not stub_pipeline.texts
+
+
+def test_upload_does_not_send_a_probe_task(stub_pipeline, monkeypatch):
+    from test_extraction import make_epub
+    import tasks
+
+    monkeypatch.setattr(main, "ENABLE_ANTIVIRUS", False)
+    monkeypatch.setattr(tasks.health_check, "delay", lambda: (_ for _ in ()).throw(AssertionError("probe sent")))
+    client = TestClient(main.app)
+
+    response = client.post("/upload", files={"file": ("book.epub", make_epub(), "application/epub+zip")})
+
+    assert response.status_code == 200